@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the site generator.
+
+Run a benchmark from the src directory, e.g. ``python3 -m benchmarks.inline``.
+"""
@@ -0,0 +1,169 @@
+"""
+Deterministic synthetic markdown corpus.
+
+The same parameters and seed always produce the same pages, so timings from
+different runs and machines measure the code rather than the input.
+
+    python3 -m benchmarks.corpus /tmp/corpus --pages 500 --blocks 40
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+
+WORDS = (
+    "the quick ring bearer walked through misty mountains toward distant "
+    "rivendell while elves sang old songs of valinor and dwarves counted "
+    "gold beneath lonely peaks as wizards argued about hobbits and maps"
+).split()
+
+
+class CorpusSpec:
+    """Shape of a synthetic corpus."""
+
+    def __init__(
+        self,
+        pages: int = 100,
+        blocks: int = 30,
+        words_per_paragraph: int = 60,
+        link_density: float = 0.1,
+        emphasis_density: float = 0.05,
+        list_depth: int = 2,
+        list_items: int = 5,
+        code_blocks: int = 2,
+        code_lines: int = 8,
+        seed: int = 0,
+    ):
+        self.pages = pages
+        self.blocks = blocks
+        self.words_per_paragraph = words_per_paragraph
+        # Fraction of words that become links / emphasis runs.
+        self.link_density = link_density
+        self.emphasis_density = emphasis_density
+        self.list_depth = list_depth
+        self.list_items = list_items
+        self.code_blocks = code_blocks
+        self.code_lines = code_lines
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def make_paragraph(rng: random.Random, spec: CorpusSpec, words: int = None) -> str:
+    parts = []
+    for _ in range(words if words is not None else spec.words_per_paragraph):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < spec.link_density:
+            if rng.random() < 0.2:
+                parts.append(f"![{word}](/images/{word}.png)")
+            else:
+                parts.append(f"[{word}](/blog/{rng.choice(WORDS)})")
+        elif roll < spec.link_density + spec.emphasis_density:
+            parts.append(rng.choice(("**{}**", "_{}_", "`{}`")).format(word))
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def make_list(rng: random.Random, spec: CorpusSpec) -> str:
+    lines = []
+    ordered = rng.random() < 0.5
+
+    def add_items(depth: int):
+        for number in range(1, spec.list_items + 1):
+            marker = f"{number}." if ordered else "-"
+            lines.append("  " * depth + f"{marker} {make_paragraph(rng, spec, 8)}")
+            if depth + 1 < spec.list_depth and rng.random() < 0.3:
+                add_items(depth + 1)
+
+    add_items(0)
+    return "\n".join(lines)
+
+
+def make_code(rng: random.Random, spec: CorpusSpec) -> str:
+    body = "\n".join(
+        f"{rng.choice(WORDS)}_{line} = {rng.choice(WORDS)}(**kwargs)  # {rng.choice(WORDS)}"
+        for line in range(spec.code_lines)
+    )
+    return f"```\n{body}\n```"
+
+
+def make_page(rng: random.Random, spec: CorpusSpec, index: int) -> str:
+    blocks = [f"# Page {index}: {' '.join(rng.choice(WORDS) for _ in range(4))}"]
+    code_at = set(rng.sample(range(1, spec.blocks), min(spec.code_blocks, spec.blocks - 1))) if spec.blocks > 1 else set()
+    for position in range(1, spec.blocks):
+        if position in code_at:
+            blocks.append(make_code(rng, spec))
+            continue
+        roll = rng.random()
+        if roll < 0.1:
+            blocks.append(f"## {make_paragraph(rng, spec, 5)}")
+        elif roll < 0.2:
+            blocks.append(make_list(rng, spec))
+        elif roll < 0.25:
+            blocks.append("> " + make_paragraph(rng, spec, 20))
+        else:
+            blocks.append(make_paragraph(rng, spec))
+    return "\n\n".join(blocks) + "\n"
+
+
+def iter_pages(spec: CorpusSpec):
+    """Yield (relative path, markdown) for every page of the corpus."""
+    rng = random.Random(spec.seed)
+    for index in range(spec.pages):
+        section = f"section-{index % 10}"
+        yield f"{section}/page-{index}/index.md", make_page(rng, spec, index)
+
+
+def write_corpus(dest_dir, spec: CorpusSpec) -> list:
+    """Write the corpus under dest_dir and return the markdown paths."""
+    dest_dir = Path(dest_dir)
+    paths = []
+    for relative, markdown in iter_pages(spec):
+        path = dest_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(markdown, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    defaults = CorpusSpec()
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--blocks", type=int, default=defaults.blocks, help="blocks per page")
+    parser.add_argument("--words", type=int, default=defaults.words_per_paragraph, help="words per paragraph")
+    parser.add_argument("--link-density", type=float, default=defaults.link_density)
+    parser.add_argument("--emphasis-density", type=float, default=defaults.emphasis_density)
+    parser.add_argument("--list-depth", type=int, default=defaults.list_depth)
+    parser.add_argument("--code-blocks", type=int, default=defaults.code_blocks, help="code blocks per page")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args) -> CorpusSpec:
+    return CorpusSpec(
+        pages=args.pages,
+        blocks=args.blocks,
+        words_per_paragraph=args.words,
+        link_density=args.link_density,
+        emphasis_density=args.emphasis_density,
+        list_depth=args.list_depth,
+        code_blocks=args.code_blocks,
+        seed=args.seed,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dest", help="directory to write the corpus into")
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+    paths = write_corpus(args.dest, spec_from_args(args))
+    print(f"Wrote {len(paths)} pages to {args.dest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Scaling benchmark for inline tokenization.
+
+Times text_to_textnodes on link-heavy and emphasis-heavy paragraphs of
+doubling size and reports the cost per input character. Linear scaling shows
+up as a flat ns/char column; the run fails if the largest paragraph costs
+more than MAX_GROWTH times the smallest per character.
+
+    python3 -m benchmarks.inline [--sizes 1000 2000 4000 ...]
+"""
+import argparse
+import sys
+import time
+
+from inline_utils import text_to_textnodes
+
+
+MAX_GROWTH = 2.0
+
+
+def link_heavy(count: int) -> str:
+    return " ".join(
+        f"see [ref {i}](/reference/page-{i}) and ![fig {i}](/images/fig-{i}.png)"
+        for i in range(count)
+    )
+
+
+def emphasis_heavy(count: int) -> str:
+    return " ".join(f"**bold {i}** then _italic {i}_ then `code {i}`" for i in range(count))
+
+
+SHAPES = {
+    "links": link_heavy,
+    "emphasis": emphasis_heavy,
+}
+
+
+def time_call(func, arg, repeat: int) -> float:
+    """Return the best wall time of repeat calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat: int = 5) -> dict:
+    """
+    Returns:
+        dict: shape name -> list of (items, chars, seconds, ns per char)
+    """
+    results = {}
+    for name, make_text in SHAPES.items():
+        rows = []
+        for size in sizes:
+            text = make_text(size)
+            seconds = time_call(text_to_textnodes, text, repeat)
+            rows.append((size, len(text), seconds, seconds * 1e9 / len(text)))
+        results[name] = rows
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000, 8000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    ok = True
+    for name, rows in run(args.sizes, args.repeat).items():
+        print(f"{name}:")
+        print(f"  {'items':>8} {'chars':>10} {'ms':>10} {'ns/char':>9}")
+        for items, chars, seconds, per_char in rows:
+            print(f"  {items:>8} {chars:>10} {seconds * 1000:>10.2f} {per_char:>9.1f}")
+        growth = rows[-1][3] / rows[0][3]
+        print(f"  per-char growth {rows[0][0]} -> {rows[-1][0]} items: {growth:.2f}x")
+        if growth > MAX_GROWTH:
+            print(f"  FAIL: growth above {MAX_GROWTH}x suggests super-linear scaling")
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Memory and throughput benchmark for the node classes.
+
+Parses a synthetic document into TextNodes and an HTMLNode tree, then
+reports traced bytes per node and nodes built per second.
+
+    python3 -m benchmarks.nodes [--blocks 20000]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from htmlnode import ParentNode
+from inline_utils import text_to_textnodes
+from markdown_utils import markdown_to_blocks, markdown_to_html_node
+
+
+def make_document(blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        if i % 3 == 0:
+            parts.append(f"- item **{i}** with [a link](/l/{i})\n- second _item_ `{i}`")
+        else:
+            parts.append(f"Paragraph {i} has **bold**, _italic_, `code` and ![img](/i/{i}.png) text.")
+    return "\n\n".join(parts)
+
+
+def count_nodes(node) -> int:
+    if isinstance(node, ParentNode):
+        return 1 + sum(count_nodes(child) for child in node.children)
+    return 1
+
+
+def measure_text_nodes(paragraphs: list) -> tuple:
+    """Returns (node count, traced bytes, seconds) for tokenizing every paragraph."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = [text_to_textnodes(paragraph) for paragraph in paragraphs]
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The lists holding the nodes are counted too; they are part of the
+    # cost of a parsed paragraph.
+    return sum(len(nodes) for nodes in kept), current, seconds
+
+
+def measure_tree(markdown: str) -> tuple:
+    """Returns (node count, traced bytes, seconds) for building the HTML tree."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = markdown_to_html_node(markdown)
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count_nodes(tree), current, seconds
+
+
+def time_tree(markdown: str, repeat: int) -> float:
+    """Best untraced wall time of building the HTML tree, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        markdown_to_html_node(markdown)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    markdown = make_document(args.blocks)
+    paragraphs = [block.replace("\n", " ") for block in markdown_to_blocks(markdown)]
+
+    count, traced, _ = measure_text_nodes(paragraphs)
+    print(f"TextNode:  {count} nodes, {traced / count:.1f} bytes/node")
+
+    count, traced, _ = measure_tree(markdown)
+    seconds = time_tree(markdown, args.repeat)
+    print(f"HTML tree: {count} nodes, {traced / count:.1f} bytes/node, {count / seconds:,.0f} nodes/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
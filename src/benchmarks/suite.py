@@ -0,0 +1,170 @@
+"""
+Benchmark the hot paths of the build on a synthetic corpus.
+
+Times text_to_textnodes, markdown_to_blocks, markdown_to_html_node, to_html
+and a full generate_pages_recursive build, writes the results as JSON and
+compares them against a stored baseline.
+
+    python3 -m benchmarks.suite --out results.json
+    python3 -m benchmarks.suite --save-baseline
+    python3 -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.10
+
+Exits with status 1 when any benchmark is slower than the baseline by more
+than the threshold.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus import add_spec_arguments, iter_pages, spec_from_args, write_corpus
+from inline_utils import text_to_textnodes
+from markdown_utils import markdown_to_blocks, markdown_to_html_node
+from page_generator import generate_pages_recursive
+
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+RESULTS_VERSION = 1
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of repeat calls of func, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence build logging while timing a build."""
+    logging.disable(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def run_benchmarks(spec, repeat: int = 3) -> dict:
+    """
+    Returns:
+        dict: benchmark name -> {"seconds": best time, "items": units processed}
+    """
+    documents = [markdown for _, markdown in iter_pages(spec)]
+    blocks = [block for markdown in documents for block in markdown_to_blocks(markdown)]
+    paragraphs = [block.replace("\n", " ") for block in blocks if not block.startswith(("#", "```", ">", "-", "1."))]
+    trees = [markdown_to_html_node(markdown) for markdown in documents]
+
+    benchmarks = {
+        "text_to_textnodes": (lambda: [text_to_textnodes(text) for text in paragraphs], len(paragraphs)),
+        "markdown_to_blocks": (lambda: [markdown_to_blocks(markdown) for markdown in documents], len(documents)),
+        "markdown_to_html_node": (lambda: [markdown_to_html_node(markdown) for markdown in documents], len(documents)),
+        "to_html": (lambda: [tree.to_html() for tree in trees], len(trees)),
+    }
+    results = {}
+    for name, (func, items) in benchmarks.items():
+        results[name] = {"seconds": best_of(func, repeat), "items": items}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_corpus(root / "content", spec)
+        template = root / "template.html"
+        template.write_text(
+            '<html><head><title>{{ Title }}</title><link href="/index.css" /></head>'
+            "<body>{{ Content }}</body></html>",
+            encoding="utf-8",
+        )
+
+        def build():
+            with quiet():
+                generate_pages_recursive(root / "content", str(template), root / "docs", "/site/")
+
+        results["generate_pages_recursive"] = {"seconds": best_of(build, repeat), "items": spec.pages}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Returns:
+        list: (name, baseline seconds, current seconds, change) for every
+        benchmark slower than baseline by more than threshold
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous["items"] != current["items"]:
+            continue
+        change = current["seconds"] / previous["seconds"] - 1
+        if change > threshold:
+            regressions.append((name, previous["seconds"], current["seconds"], change))
+    return regressions
+
+
+def load_results(path) -> dict:
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_results(path, spec, results: dict):
+    document = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "spec": spec.to_dict(),
+        "results": results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2, sort_keys=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_spec_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    results = run_benchmarks(spec, args.repeat)
+
+    print(f"{'benchmark':<24} {'items':>7} {'total ms':>10} {'us/item':>10}")
+    for name, result in results.items():
+        per_item = result["seconds"] * 1e6 / result["items"] if result["items"] else 0.0
+        print(f"{name:<24} {result['items']:>7} {result['seconds'] * 1000:>10.2f} {per_item:>10.1f}")
+
+    if args.out:
+        save_results(args.out, spec, results)
+        print(f"Results written to {args.out}")
+    if args.save_baseline:
+        save_results(args.baseline, spec, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+    baseline = load_results(baseline_path)
+    if baseline.get("spec") != spec.to_dict():
+        print("Baseline was recorded with a different corpus; not comparing")
+        return 0
+    regressions = compare(results, baseline["results"], args.threshold)
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms (+{change:.0%})")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {baseline_path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+
+from file_utils import write_json_atomic
+from page_cache import parser_version
+
+
+BLOCK_CACHE_VERSION = 2
+DEFAULT_MAX_ENTRIES = 50_000
+
+logger = logging.getLogger(__name__)
+
+
+class BlockCache:
+    """
+    Bounded LRU of rendered blocks, keyed by a hash of the block text.
+
+    A page is put together from the cached fragments of its unchanged
+    blocks, so after a small edit to a long document only the edited
+    blocks are parsed and rendered again. An entry is whatever the render
+    function returns and must survive a JSON round trip;
+    markdown_utils.iter_blocks_html stores render_block's list of HTML,
+    word count, links and images.
+
+    Keys also cover the parser version, the salt and the context given
+    with each block, which between them should identify anything else that
+    shapes a block's HTML, such as the digest of the node transforms
+    applied to it. Entries made under another parser, salt or context are
+    simply never hit and age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, salt: str = ""):
+        self.max_entries = max_entries
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        self._prefix = f"{parser_version()}\0{salt}\0".encode("utf-8")
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, block: str, context: str = "") -> str:
+        return hashlib.sha256(self._prefix + f"{context}\0{block}".encode("utf-8")).hexdigest()
+
+    def render(self, block: str, render, context: str = ""):
+        """Return the cached rendering of block, or render(block) and remember it."""
+        key = self.key(block, context)
+        rendered = self._entries.get(key)
+        if rendered is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rendered
+        self.misses += 1
+        rendered = render(block)
+        self._entries[key] = rendered
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return rendered
+
+    @classmethod
+    def load(cls, path, max_entries: int = DEFAULT_MAX_ENTRIES, salt: str = ""):
+        """A cache holding the entries saved at path, or an empty one if there are none."""
+        cache = cls(max_entries, salt)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                document = json.load(file)
+        except (OSError, ValueError):
+            return cache
+        if document.get("version") != BLOCK_CACHE_VERSION:
+            return cache
+        # Saved least recently used first, so the order survives a round trip.
+        for key, rendered in document["entries"][-max_entries:]:
+            cache._entries[key] = rendered
+        return cache
+
+    def save(self, path):
+        """Write every entry to path, replacing any previous file atomically."""
+        try:
+            write_json_atomic(path, {"version": BLOCK_CACHE_VERSION, "entries": list(self._entries.items())})
+        except OSError as e:
+            logger.warning("Could not save block cache to %s: %s", path, e)
+            return
+        logger.info(
+            "Block cache: %d hits, %d misses, %d entries saved to %s",
+            self.hits, self.misses, len(self._entries), path,
+        )
+
+    def __repr__(self) -> str:
+        return f"BlockCache(entries={len(self._entries)}, max_entries={self.max_entries}, hits={self.hits}, misses={self.misses})"
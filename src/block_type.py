@@ -6,4 +6,6 @@ class BlockType(Enum):
     CODE = "code"
     QUOTE = "quote"
     unordered_list = "unordered_list"
-    ordered_list = "ordered_list"
\ No newline at end of file
+    ordered_list = "ordered_list"
+    TABLE = "table"
+    HORIZONTAL_RULE = "horizontal_rule"
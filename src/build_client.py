@@ -0,0 +1,77 @@
+"""
+Send one request to a build daemon started with main.py --daemon.
+
+Only the standard library is imported, so a request costs little more
+than starting the interpreter. The daemon's JSON response is printed;
+the exit status is 0 if the request succeeded, 1 if the daemon reported
+an error and 2 if no daemon could be reached.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+
+DEFAULT_SOCKET = "../.build-daemon.sock"
+
+
+def send_request(socket_path, request: dict, timeout: float = None) -> dict:
+    """Send request to the daemon listening on socket_path and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as stream:
+            return json.loads(stream.readline())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Send a request to a running build daemon.")
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"socket the daemon listens on (default: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="give up after this many seconds (default: wait for the build)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="apply source changes; only the given files or directories are checked, if any")
+    build.add_argument("paths", nargs="*", metavar="PATH")
+    render = commands.add_parser("render", help="parse one page from its markdown and write it")
+    render.add_argument("page", metavar="PAGE")
+    invalidate = commands.add_parser("invalidate", help="forget the given files or directories, or everything, so the next build redoes them")
+    invalidate.add_argument("paths", nargs="*", metavar="PATH")
+    commands.add_parser("status", help="report what the daemon holds in memory")
+    commands.add_parser("shutdown", help="stop the daemon")
+    return parser.parse_args(argv)
+
+
+def build_request(args) -> dict:
+    """The request for parsed arguments, with paths made absolute for the daemon."""
+    request = {"command": args.command}
+    if args.command == "render":
+        request["page"] = os.path.abspath(args.page)
+    elif args.command in ("build", "invalidate") and args.paths:
+        request["paths"] = [os.path.abspath(path) for path in args.paths]
+    return request
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        response = send_request(args.socket, build_request(args), args.timeout)
+    except (OSError, ValueError) as e:
+        print(f"No build daemon answered on {args.socket}: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(response))
+    return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import time
+
+from template_engine import TemplateError
+
+
+logger = logging.getLogger(__name__)
+
+# The longest request line the daemon reads, newline included.
+MAX_REQUEST_LINE = 1 << 20
+
+
+class BuildDaemon(socketserver.UnixStreamServer):
+    """
+    Serve build requests for one site over a Unix domain socket.
+
+    The daemon owns a SiteWatcher, so the compiled template, every parsed
+    page, the rendered blocks and the signatures of every source file stay
+    in memory between requests, and a build only does the work its
+    changes call for. Requests are handled one at a time, so builds never
+    overlap.
+
+    Each connection carries one request and one response, both a JSON
+    object on a single line:
+
+        {"command": "build", "paths": [...]}      apply changes to paths, or
+                                                  to every file if omitted
+        {"command": "render", "page": "..."}      parse and write one page
+        {"command": "invalidate", "paths": [...]} forget paths, or everything
+        {"command": "status"}
+        {"command": "shutdown"}
+
+    Paths are absolute or relative to the daemon's working directory. The
+    response has "ok" and either the result or an "error" message. A
+    request line may be at most MAX_REQUEST_LINE bytes, and a client that
+    does not send it within the handler's timeout is disconnected.
+    """
+
+    def __init__(self, socket_path, watcher):
+        self.socket_path = str(socket_path)
+        self.watcher = watcher
+        self.requests = 0
+        self.stopping = False
+        _remove_stale_socket(self.socket_path)
+        super().__init__(self.socket_path, _RequestHandler)
+
+    def run(self):
+        """Handle requests until a shutdown request or Ctrl-C."""
+        logger.info("Build daemon listening on %s", self.socket_path)
+        try:
+            while not self.stopping:
+                self.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            logger.info("Build daemon stopped after %d requests", self.requests)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def dispatch(self, request) -> dict:
+        """Carry out one request and return the response."""
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        self.requests += 1
+        command = request.get("command")
+        start = time.perf_counter()
+        try:
+            if command == "build":
+                result = self._build(request.get("paths"))
+            elif command == "render":
+                if not request.get("page"):
+                    return {"ok": False, "error": "render request needs a page"}
+                result = {"output": str(self.watcher.render_page(request["page"]))}
+            elif command == "invalidate":
+                result = {"invalidated": self.watcher.invalidate(request.get("paths"))}
+            elif command == "status":
+                result = {"pages": len(self.watcher.pages), "files": len(self.watcher.snapshot), "requests": self.requests}
+            elif command == "shutdown":
+                self.stopping = True
+                result = {}
+            else:
+                return {"ok": False, "error": f"unknown command: {command!r}"}
+        except (OSError, ValueError, TemplateError) as e:
+            return {"ok": False, "error": str(e)}
+        response = {"ok": True, "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+        response.update(result)
+        logger.info("%s request handled in %.1f ms", command, response["elapsed_ms"])
+        return response
+
+    def _build(self, paths) -> dict:
+        summary = {"pages": 0, "pages_removed": 0, "assets": 0, "assets_removed": 0}
+        summary.update(self.watcher.poll(paths))
+        return summary
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    # Requests are handled one at a time, so a client that stalls must not
+    # hold up everyone else for longer than this many seconds.
+    timeout = 10
+
+    def handle(self):
+        try:
+            line = self.rfile.readline(MAX_REQUEST_LINE)
+        except OSError as e:
+            logger.warning("Dropped a build request that was not read: %s", e)
+            return
+        if not line:
+            # A client that hung up without asking anything, e.g. a liveness probe.
+            return
+        if len(line) == MAX_REQUEST_LINE and not line.endswith(b"\n"):
+            response = {"ok": False, "error": f"request is longer than {MAX_REQUEST_LINE} bytes"}
+        else:
+            response = self._respond(line)
+        try:
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        except OSError as e:
+            logger.warning("Could not send a build response: %s", e)
+
+    def _respond(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"malformed request: {e}"}
+        try:
+            return self.server.dispatch(request)
+        except Exception as e:
+            # Keep serving: one bad request must not take the warm state down.
+            logger.exception("Build request failed")
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove a socket left by a daemon that is gone; refuse to take over a live one."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+        except OSError as e:
+            raise OSError(f"{socket_path} exists and is not a build daemon socket: {e}") from None
+    raise OSError(f"a build daemon is already listening on {socket_path}")
@@ -0,0 +1,186 @@
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import sys
+
+
+LOG_MODES = ("quiet", "summary", "structured")
+
+# Per-file records are logged at DEBUG, so in quiet and summary mode they
+# are dropped by the level check before a record is even created.
+_LEVELS = {
+    "quiet": logging.WARNING,
+    "summary": logging.INFO,
+    "structured": logging.DEBUG,
+}
+
+_state = {
+    "mode": None,
+    "handlers": [],
+    "listeners": [],
+    "worker_queue": None,
+    "queue_handler": None,
+}
+
+
+class BuildSummary:
+    """Counters for the end-of-build summary, kept in the main process."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pages_written = 0
+        self.bytes_written = 0
+        # Pages rendered to exactly the bytes already on disk, and not written.
+        self.pages_unchanged = 0
+        self.bytes_unchanged = 0
+        self.pages_removed = 0
+        self.assets_copied = 0
+        self.assets_unchanged = 0
+        self.assets_removed = 0
+        self.failures = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+summary = BuildSummary()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any event fields passed via extra."""
+
+    FIELDS = ("event", "path", "bytes", "error")
+
+    def format(self, record) -> str:
+        document = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                document[field] = value if isinstance(value, (int, float)) else str(value)
+        return json.dumps(document)
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records without formatting them on the calling thread.
+
+    Records on an in-process queue are formatted by the listener thread.
+    Records for another process still have to be flattened so they pickle.
+    """
+
+    def prepare(self, record):
+        if isinstance(self.queue, queue.SimpleQueue):
+            return record
+        return super().prepare(record)
+
+
+def configure_logging(mode: str = "summary", stream=None):
+    """
+    Route build logging through a queue drained by a background thread.
+
+    Args:
+        mode (str): "quiet" shows warnings and errors only, "summary" adds
+            one line per build phase and the final summary, "structured"
+            logs every file operation as a JSON line
+        stream: Where log lines go (default: sys.stderr)
+    """
+    if mode not in _LEVELS:
+        raise ValueError(f"unknown log mode: {mode}")
+    shutdown_logging()
+    summary.reset()
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    if mode == "structured":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s", "%Y-%m-%d %H:%M:%S"))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    listener.start()
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    queue_handler = _LazyQueueHandler(log_queue)
+    root.addHandler(queue_handler)
+    root.setLevel(_LEVELS[mode])
+
+    _state["mode"] = mode
+    _state["queue_handler"] = queue_handler
+    _state["handlers"] = [handler]
+    _state["listeners"] = [listener]
+
+
+def worker_log_queue():
+    """
+    A multiprocessing queue for worker processes, drained into the same
+    output as the main process. None when logging is not configured.
+    """
+    if _state["mode"] is None:
+        return None
+    if _state["worker_queue"] is None:
+        worker_queue = multiprocessing.Queue(-1)
+        listener = logging.handlers.QueueListener(worker_queue, *_state["handlers"], respect_handler_level=False)
+        listener.start()
+        _state["worker_queue"] = worker_queue
+        _state["listeners"].append(listener)
+    return _state["worker_queue"]
+
+
+def configure_worker_logging(worker_queue, mode: str):
+    """Process pool initializer: send a worker's records to the main process."""
+    if worker_queue is None:
+        return
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_LazyQueueHandler(worker_queue))
+    root.setLevel(_LEVELS[mode])
+
+
+def worker_initializer():
+    """(initializer, initargs) for a ProcessPoolExecutor that should log like this process."""
+    return configure_worker_logging, (worker_log_queue(), _state["mode"] or "summary")
+
+
+def log_summary():
+    """Log the aggregated counters of the build that just finished."""
+    logger = logging.getLogger("build")
+    logger.info(
+        "Build summary: %d pages written (%d bytes), %d pages unchanged (%d bytes not written), "
+        "%d pages removed, %d assets copied, %d unchanged, %d removed, %d failures",
+        summary.pages_written,
+        summary.bytes_written,
+        summary.pages_unchanged,
+        summary.bytes_unchanged,
+        summary.pages_removed,
+        summary.assets_copied,
+        summary.assets_unchanged,
+        summary.assets_removed,
+        summary.failures,
+        extra={"event": "summary"},
+    )
+
+
+def shutdown_logging():
+    """Flush and stop the background listeners."""
+    if _state["queue_handler"] is not None:
+        logging.getLogger().removeHandler(_state["queue_handler"])
+    for listener in _state["listeners"]:
+        listener.stop()
+    if _state["worker_queue"] is not None:
+        _state["worker_queue"].close()
+    _state["listeners"] = []
+    _state["worker_queue"] = None
+    _state["mode"] = None
+    _state["queue_handler"] = None
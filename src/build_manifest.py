@@ -0,0 +1,124 @@
+import json
+import logging
+from pathlib import Path
+
+from build_logging import summary
+from file_utils import hash_file, prune_empty_dirs, write_json_atomic
+
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def load_manifest(dest_dir) -> dict:
+    """
+    Load the build manifest stored in dest_dir.
+
+    Returns an empty manifest when none exists or it cannot be read, which
+    makes the next build a full one.
+    """
+    manifest_path = Path(dest_dir) / MANIFEST_NAME
+    try:
+        with manifest_path.open('r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(dest_dir, manifest: dict):
+    """Write the manifest into dest_dir, replacing any previous one atomically."""
+    write_json_atomic(Path(dest_dir) / MANIFEST_NAME, manifest, indent=1, sort_keys=True)
+
+
+def empty_manifest(template_hash: str = None, basepath: str = None) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "template": template_hash,
+        "basepath": basepath,
+        "pages": {},
+    }
+
+
+def source_entry(src_path, dest_rel: str, content_hash: str = None) -> dict:
+    """Build the manifest entry recorded for a successfully generated page."""
+    stat = Path(src_path).stat()
+    return {
+        "output": dest_rel,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": content_hash if content_hash is not None else hash_file(src_path),
+    }
+
+
+def plan_incremental_build(pages, content_dir, dest_dir, template_hash, basepath, force=False):
+    """
+    Work out which pages need rendering by comparing against the stored manifest.
+
+    A source whose size and mtime match its manifest entry is trusted without
+    being hashed; otherwise its hash decides. Every page is stale when the
+    template or basepath changed, or when force is set.
+
+    Args:
+        pages (list): (markdown path, html path) pairs from find_pages
+        content_dir: Root of the content tree
+        dest_dir: Root of the output tree, where the manifest lives
+        template_hash (str): Digest of the compiled template and its partials
+        basepath (str): URL prefix the site is built for
+        force (bool): Treat every page as stale but still report removed sources
+
+    Returns:
+        tuple: (stale pages, new manifest, output paths of removed sources).
+        The new manifest already carries entries for every up-to-date page.
+    """
+    content_dir = Path(content_dir)
+    dest_dir = Path(dest_dir)
+    old = load_manifest(dest_dir)
+    manifest = empty_manifest(template_hash, basepath)
+    inputs_changed = force or old["template"] != template_hash or old["basepath"] != basepath
+
+    stale = []
+    seen = set()
+    for src, dest in pages:
+        key = Path(src).relative_to(content_dir).as_posix()
+        seen.add(key)
+        entry = old["pages"].get(key)
+        if inputs_changed or entry is None or not Path(dest).exists():
+            stale.append((src, dest))
+            continue
+        stat = Path(src).stat()
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            manifest["pages"][key] = entry
+            continue
+        content_hash = hash_file(src)
+        if content_hash == entry["hash"]:
+            # Touched but not edited: refresh the stat fields so the next
+            # build can skip hashing it again.
+            manifest["pages"][key] = source_entry(src, entry["output"], content_hash)
+        else:
+            stale.append((src, dest))
+
+    removed = [
+        dest_dir / entry["output"]
+        for key, entry in old["pages"].items()
+        if key not in seen
+    ]
+    return stale, manifest, removed
+
+
+def remove_outputs(paths, dest_dir):
+    """
+    Delete generated files whose sources no longer exist, then prune any
+    directories left empty between them and dest_dir.
+    """
+    for path in paths:
+        path = Path(path)
+        if path.is_file():
+            path.unlink()
+            summary.pages_removed += 1
+            logger.debug("Removed stale page %s", path, extra={"event": "delete", "path": path})
+        prune_empty_dirs(path.parent, dest_dir)
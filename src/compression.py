@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import build_logging
+from file_utils import write_json_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESS_MANIFEST_NAME = ".compress-manifest.json"
+COMPRESS_MANIFEST_VERSION = 1
+
+# Text formats only: images and fonts are already compressed, and a .gz
+# next to them would cost disk space and build time for nothing.
+COMPRESSIBLE_SUFFIXES = frozenset((
+    ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map", ".ico",
+))
+
+logger = logging.getLogger(__name__)
+
+
+def compress_outputs(dest_dir, jobs: int = 1, use_brotli: bool = None) -> dict:
+    """
+    Write precompressed copies next to every compressible file in dest_dir.
+
+    Each file gets a .gz and, when the brotli module is available, a .br.
+    A compressed copy that would not be smaller than its source is not kept.
+    A file whose size and mtime match the previous run is skipped without
+    being read. A file whose mtime changed but whose content hash did not is
+    read and hashed, but not compressed again. Copies whose source is gone
+    are removed. What was compressed is recorded in COMPRESS_MANIFEST_NAME
+    inside dest_dir.
+
+    Args:
+        dest_dir: Root of the built site
+        jobs (int): Worker processes to compress on (default: 1)
+        use_brotli (bool): Write .br files; None means when brotli is installed
+
+    Returns:
+        dict: Counts of files "compressed", "unchanged" and "removed"
+    """
+    dest_dir = Path(dest_dir)
+    if use_brotli is None:
+        use_brotli = brotli is not None
+    elif use_brotli and brotli is None:
+        raise RuntimeError("brotli output requested but the brotli module is not installed")
+    formats = ("gz", "br") if use_brotli else ("gz",)
+
+    old = _load_manifest(dest_dir)
+    previous = old["files"]
+    # A different set of formats means every file has to be compressed again.
+    formats_changed = old["formats"] != list(formats)
+    manifest = {"version": COMPRESS_MANIFEST_VERSION, "formats": list(formats), "files": {}}
+    counts = {"compressed": 0, "unchanged": 0, "removed": 0}
+
+    tasks = []
+    for path in find_compressible(dest_dir):
+        key = path.relative_to(dest_dir).as_posix()
+        entry = previous.get(key)
+        stat = path.stat()
+        if (
+            entry is not None
+            and not formats_changed
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and all(_variant(path, fmt).exists() for fmt in entry["kept"])
+        ):
+            manifest["files"][key] = entry
+            counts["unchanged"] += 1
+            continue
+        previous_hash = entry["hash"] if entry and not formats_changed else None
+        tasks.append((str(path), previous_hash, entry["kept"] if entry else [], formats))
+
+    if jobs > 1 and len(tasks) > 1:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        initializer, initargs = build_logging.worker_initializer()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+            results = list(executor.map(_compress_file_task, tasks, chunksize=chunksize))
+    else:
+        results = [_compress_file_task(task) for task in tasks]
+
+    for task, (entry, compressed) in zip(tasks, results):
+        manifest["files"][Path(task[0]).relative_to(dest_dir).as_posix()] = entry
+        counts["compressed" if compressed else "unchanged"] += 1
+
+    for key in sorted(set(previous) - set(manifest["files"])):
+        for fmt in previous[key]["kept"]:
+            stale = _variant(dest_dir / key, fmt)
+            if stale.is_file():
+                stale.unlink()
+                logger.debug("Deleted file: %s", stale, extra={"event": "delete", "path": stale})
+        counts["removed"] += 1
+
+    _save_manifest(dest_dir, manifest)
+    logger.info(
+        "Precompressed %s (%s): %d compressed, %d unchanged, %d removed",
+        dest_dir, "+".join(formats), counts["compressed"], counts["unchanged"], counts["removed"],
+    )
+    return counts
+
+
+def remove_compressed_outputs(dest_dir) -> int:
+    """
+    Delete every compressed copy recorded in dest_dir's COMPRESS_MANIFEST_NAME,
+    and the manifest, so that a build without compression leaves none
+    behind to be served in place of pages it rewrote.
+
+    Returns:
+        int: Number of compressed files deleted
+    """
+    dest_dir = Path(dest_dir)
+    manifest_path = dest_dir / COMPRESS_MANIFEST_NAME
+    if not manifest_path.exists():
+        return 0
+    removed = 0
+    for key, entry in _load_manifest(dest_dir)["files"].items():
+        for fmt in entry["kept"]:
+            stale = _variant(dest_dir / key, fmt)
+            if stale.is_file():
+                stale.unlink()
+                removed += 1
+                logger.debug("Deleted file: %s", stale, extra={"event": "delete", "path": stale})
+    manifest_path.unlink()
+    logger.info("Removed %d precompressed files from %s", removed, dest_dir)
+    return removed
+
+
+def find_compressible(dest_dir) -> list:
+    """Every file under dest_dir that should get compressed copies, in a stable order."""
+    found = []
+    for root, dirs, files in os.walk(dest_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_SUFFIXES:
+                found.append(Path(root) / name)
+    return found
+
+
+def compress_bytes(data: bytes, fmt: str) -> bytes:
+    """
+    Compress data at the highest level. gzip output is deterministic: its
+    header carries no timestamp.
+    """
+    if fmt == "gz":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if fmt == "br":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"unknown compression format: {fmt}")
+
+
+def _compress_file_task(task):
+    """
+    Compress one file unless its content hash matches the previous run.
+
+    Returns:
+        tuple: (manifest entry, whether anything was compressed)
+    """
+    path, previous_hash, previous_kept, formats = task
+    path = Path(path)
+    data = path.read_bytes()
+    stat = path.stat()
+    content_hash = hashlib.sha256(data).hexdigest()
+    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash, "kept": previous_kept}
+    if content_hash == previous_hash and all(_variant(path, fmt).exists() for fmt in previous_kept):
+        return entry, False
+
+    kept = []
+    for fmt in formats:
+        variant = _variant(path, fmt)
+        compressed = compress_bytes(data, fmt)
+        if len(compressed) >= len(data):
+            variant.unlink(missing_ok=True)
+            continue
+        tmp_path = variant.with_name(variant.name + ".tmp")
+        tmp_path.write_bytes(compressed)
+        tmp_path.replace(variant)
+        kept.append(fmt)
+        logger.debug(
+            "Compressed %s (%d -> %d bytes)", variant, len(data), len(compressed),
+            extra={"event": "compress", "path": variant, "bytes": len(compressed)},
+        )
+    for fmt in previous_kept:
+        if fmt not in formats:
+            _variant(path, fmt).unlink(missing_ok=True)
+    entry["kept"] = kept
+    return entry, True
+
+
+def _variant(path: Path, fmt: str) -> Path:
+    return path.with_name(f"{path.name}.{fmt}")
+
+
+def _load_manifest(dest_dir: Path) -> dict:
+    try:
+        with (dest_dir / COMPRESS_MANIFEST_NAME).open('r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        manifest = None
+    if not manifest or manifest.get("version") != COMPRESS_MANIFEST_VERSION:
+        return {"version": COMPRESS_MANIFEST_VERSION, "formats": [], "files": {}}
+    return manifest
+
+
+def _save_manifest(dest_dir: Path, manifest: dict):
+    write_json_atomic(dest_dir / COMPRESS_MANIFEST_NAME, manifest, indent=1, sort_keys=True)
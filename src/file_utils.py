@@ -1,16 +1,18 @@
+import hashlib
+import json
 import os
 import shutil
 import logging
 from pathlib import Path
 
+from build_logging import summary
 
-def setup_logging():
-    """Setup logging configuration for file operations."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+
+STATIC_MANIFEST_NAME = ".static-manifest.json"
+
+# Handlers and levels are set up once per build by build_logging; per-file
+# records are DEBUG so they cost only a level check unless asked for.
+logger = logging.getLogger(__name__)
 
 
 def copy_directory_recursive(source_dir: str, dest_dir: str, log_operations: bool = True) -> bool:
@@ -25,10 +27,6 @@ def copy_directory_recursive(source_dir: str, dest_dir: str, log_operations: boo
     Returns:
         bool: True if successful, False otherwise
     """
-    if log_operations:
-        setup_logging()
-        logger = logging.getLogger(__name__)
-    
     try:
         # Convert to Path objects for easier handling
         source_path = Path(source_dir)
@@ -37,12 +35,12 @@ def copy_directory_recursive(source_dir: str, dest_dir: str, log_operations: boo
         # Validate source directory exists
         if not source_path.exists():
             if log_operations:
-                logger.error(f"Source directory does not exist: {source_path}")
+                logger.error("Source directory does not exist: %s", source_path)
             return False
         
         if not source_path.is_dir():
             if log_operations:
-                logger.error(f"Source path is not a directory: {source_path}")
+                logger.error("Source path is not a directory: %s", source_path)
             return False
         
         # Create destination directory if it doesn't exist
@@ -50,32 +48,32 @@ def copy_directory_recursive(source_dir: str, dest_dir: str, log_operations: boo
         
         # Delete all contents of destination directory first
         if log_operations:
-            logger.info(f"Cleaning destination directory: {dest_path}")
+            logger.debug("Cleaning destination directory: %s", dest_path)
         
         for item in dest_path.iterdir():
             if item.is_file():
                 item.unlink()
                 if log_operations:
-                    logger.info(f"Deleted file: {item}")
+                    logger.debug("Deleted file: %s", item)
             elif item.is_dir():
                 shutil.rmtree(item)
                 if log_operations:
-                    logger.info(f"Deleted directory: {item}")
+                    logger.debug("Deleted directory: %s", item)
         
         # Copy all contents recursively
         if log_operations:
-            logger.info(f"Starting recursive copy from {source_path} to {dest_path}")
+            logger.debug("Starting recursive copy from %s to %s", source_path, dest_path)
         
         _copy_recursive_helper(source_path, dest_path, log_operations)
         
         if log_operations:
-            logger.info(f"Successfully copied all contents from {source_path} to {dest_path}")
+            logger.info("Copied %s to %s", source_path, dest_path)
         
         return True
         
     except Exception as e:
         if log_operations:
-            logger.error(f"Error during directory copy: {str(e)}")
+            logger.error("Error during directory copy: %s", e)
         return False
 
 
@@ -88,9 +86,6 @@ def _copy_recursive_helper(source_path: Path, dest_path: Path, log_operations: b
         dest_path (Path): Destination path
         log_operations (bool): Whether to log operations
     """
-    if log_operations:
-        logger = logging.getLogger(__name__)
-    
     try:
         for item in source_path.iterdir():
             dest_item = dest_path / item.name
@@ -98,28 +93,184 @@ def _copy_recursive_helper(source_path: Path, dest_path: Path, log_operations: b
             if item.is_file():
                 # Copy file
                 shutil.copy2(item, dest_item)
+                summary.assets_copied += 1
                 if log_operations:
-                    logger.info(f"Copied file: {item} -> {dest_item}")
+                    logger.debug("Copied file: %s -> %s", item, dest_item, extra={"event": "copy", "path": dest_item})
             
             elif item.is_dir():
                 # Create directory and copy its contents recursively
                 dest_item.mkdir(exist_ok=True)
                 if log_operations:
-                    logger.info(f"Created directory: {dest_item}")
+                    logger.debug("Created directory: %s", dest_item)
                 
                 _copy_recursive_helper(item, dest_item, log_operations)
     
     except Exception as e:
         if log_operations:
-            logger.error(f"Error copying {source_path}: {str(e)}")
+            logger.error("Error copying %s: %s", source_path, e)
+        raise
+
+
+def sync_directory(source_dir: str, dest_dir: str, log_operations: bool = True, use_hash: bool = False) -> bool:
+    """
+    Make dest_dir hold an up-to-date copy of source_dir without wiping it.
+    
+    A file is copied only when it is new or its size or mtime differ from
+    the copy in dest_dir; with use_hash, a file whose mtime differs but whose
+    content hash matches is left alone too. Files are removed only if an
+    earlier sync copied them and their source is gone, so anything else in
+    dest_dir, such as generated pages, is never touched. The list of synced
+    files is kept in STATIC_MANIFEST_NAME inside dest_dir.
+    
+    Args:
+        source_dir (str): Path to the source directory
+        dest_dir (str): Path to the destination directory
+        log_operations (bool): Whether to log file operations (default: True)
+        use_hash (bool): Compare content hashes when mtimes differ (default: False)
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        source_path = Path(source_dir)
+        dest_path = Path(dest_dir)
+        
+        if not source_path.is_dir():
+            if log_operations:
+                logger.error("Source directory does not exist: %s", source_path)
+            return False
+        
+        dest_path.mkdir(parents=True, exist_ok=True)
+        previous = _load_static_manifest(dest_path)
+        current = []
+        copied = skipped = removed = 0
+        
+        for source_file in sorted(source_path.rglob("*")):
+            if not source_file.is_file():
+                continue
+            relative = source_file.relative_to(source_path).as_posix()
+            current.append(relative)
+            dest_file = dest_path / relative
+            if _is_up_to_date(source_file, dest_file, use_hash):
+                skipped += 1
+                continue
+            dest_file.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source_file, dest_file)
+            copied += 1
+            if log_operations:
+                logger.debug("Copied file: %s -> %s", source_file, dest_file, extra={"event": "copy", "path": dest_file})
+        
+        for relative in sorted(set(previous) - set(current)):
+            stale = dest_path / relative
+            if stale.is_file():
+                stale.unlink()
+                removed += 1
+                if log_operations:
+                    logger.debug("Deleted file: %s", stale, extra={"event": "delete", "path": stale})
+            prune_empty_dirs(stale.parent, dest_path)
+        
+        _save_static_manifest(dest_path, current)
+        summary.assets_copied += copied
+        summary.assets_unchanged += skipped
+        summary.assets_removed += removed
+        
+        if log_operations:
+            logger.info("Synced %s to %s: %d copied, %d unchanged, %d removed", source_path, dest_path, copied, skipped, removed)
+        
+        return True
+        
+    except Exception as e:
+        if log_operations:
+            logger.error("Error during directory sync: %s", e)
+        return False
+
+
+def _is_up_to_date(source_file: Path, dest_file: Path, use_hash: bool) -> bool:
+    """Whether dest_file already holds the same content as source_file."""
+    try:
+        dest_stat = dest_file.stat()
+    except FileNotFoundError:
+        return False
+    source_stat = source_file.stat()
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(source_file) == hash_file(dest_file):
+        # Same bytes, different mtime: align the mtime so the next sync
+        # can decide from the stat alone.
+        shutil.copystat(source_file, dest_file)
+        return True
+    return False
+
+
+def hash_file(path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_static_manifest(dest_path: Path) -> list:
+    try:
+        with (dest_path / STATIC_MANIFEST_NAME).open('r', encoding='utf-8') as file:
+            return json.load(file)["files"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def _save_static_manifest(dest_path: Path, files: list):
+    write_json_atomic(dest_path / STATIC_MANIFEST_NAME, {"files": files}, indent=1)
+
+
+def write_json_atomic(path, document, **options):
+    """
+    Write document to path as JSON, replacing any previous file atomically.
+
+    The JSON goes to a temporary file next to path, named after this
+    process so that pool workers sharing a directory never collide, which
+    is then renamed over path. Parent directories are created as needed;
+    options are passed on to json.dump.
+
+    Raises:
+        OSError: The file could not be written; path is intact
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open('w', encoding='utf-8') as file:
+            json.dump(document, file, **options)
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
         raise
 
 
-def copy_static_to_public():
+def prune_empty_dirs(directory, stop_at):
+    """Remove directory and its parents while they are empty, stopping at stop_at."""
+    stop_at = Path(stop_at).resolve()
+    directory = Path(directory).resolve()
+    while directory != stop_at and stop_at in directory.parents:
+        try:
+            directory.rmdir()
+        except OSError:
+            break
+        directory = directory.parent
+
+
+def copy_static_to_public(sync: bool = False, use_hash: bool = False):
     """
     Convenience function to copy static directory to public directory.
     This is the specific use case mentioned in the requirements.
+
+    With sync=True only changed assets are copied and generated pages are
+    left in place; see sync_directory.
     """
+    if sync:
+        return sync_directory("../static", "../docs", use_hash=use_hash)
     return copy_directory_recursive("../static", "../docs")
 
 
@@ -135,49 +286,125 @@ def write_html_to_file(html_content: str, dest_path: str, log_operations: bool =
     Returns:
         bool: True if successful, False otherwise
     """
-    if log_operations:
-        setup_logging()
-        logger = logging.getLogger(__name__)
+    if html_content is None:
+        if log_operations:
+            logger.error("HTML content cannot be None")
+        return False
+    return write_html_chunks_to_file((html_content,), dest_path, log_operations)
+
+
+def write_html_chunks_to_file(chunks, dest_path: str, log_operations: bool = True) -> bool:
+    """
+    Stream HTML chunks into a file, creating necessary directories if they don't exist.
+
+    The chunks are written as they are produced, so the whole document never
+    has to exist as one string. A file that already holds exactly this HTML
+    is left alone, mtime included; otherwise the new HTML replaces it
+    atomically, see write_if_changed. If producing a chunk raises, the
+    existing file is left as it was and the exception is re-raised.
+    
+    Args:
+        chunks: Iterable of HTML strings, e.g. from HTMLNode.iter_html()
+        dest_path (str): Path where the HTML file should be written
+        log_operations (bool): Whether to log file operations (default: True)
+    
+    Returns:
+        bool: True if successful, False if the file could not be written
+    """
+    # Convert to Path object for easier handling
+    dest_file_path = Path(dest_path)
     
     try:
-        # Convert to Path object for easier handling
-        dest_file_path = Path(dest_path)
-        
-        # Validate that we have content to write
-        if html_content is None:
-            if log_operations:
-                logger.error("HTML content cannot be None")
-            return False
-        
         # Create parent directories if they don't exist
         dest_file_path.parent.mkdir(parents=True, exist_ok=True)
-        if log_operations:
-            logger.info(f"Ensured directory exists: {dest_file_path.parent}")
         
-        # Write the HTML content to the file
-        with dest_file_path.open('w', encoding='utf-8') as file:
-            file.write(html_content)
+        written = write_if_changed((chunk.encode('utf-8') for chunk in chunks), dest_file_path)
         
-        if log_operations:
-            logger.info(f"Successfully wrote HTML file: {dest_file_path}")
-            logger.info(f"File size: {len(html_content)} characters")
+        if log_operations and logger.isEnabledFor(logging.DEBUG):
+            size = dest_file_path.stat().st_size
+            logger.debug(
+                "%s HTML file: %s (%d bytes)", "Wrote" if written else "Unchanged", dest_file_path, size,
+                extra={"event": "write" if written else "unchanged", "path": dest_file_path, "bytes": size},
+            )
         
         return True
         
     except PermissionError as e:
         if log_operations:
-            logger.error(f"Permission denied writing to {dest_path}: {str(e)}")
+            logger.error("Permission denied writing to %s: %s", dest_path, e)
         return False
     except OSError as e:
         if log_operations:
-            logger.error(f"OS error writing to {dest_path}: {str(e)}")
-        return False
-    except Exception as e:
-        if log_operations:
-            logger.error(f"Unexpected error writing HTML file {dest_path}: {str(e)}")
+            logger.error("OS error writing to %s: %s", dest_path, e)
         return False
 
 
+def write_if_changed(chunks, dest_path) -> bool:
+    """
+    Write byte chunks to dest_path unless it already holds exactly those bytes.
+
+    The chunks are compared with the existing file as they are produced, so
+    an unchanged file is only read, never written, and keeps its mtime; a
+    file of another size differs at the latest when its end is reached.
+    From the first differing chunk on, output goes to a temporary file next
+    to dest_path, seeded with the matching prefix, which is then renamed
+    over dest_path. Readers see the old file or the new one, never a
+    partial write, and a crash leaves at most a stray temporary file.
+
+    Returns:
+        bool: True if the file was written, False if it was already identical
+
+    Raises:
+        OSError: The file could not be read or written; dest_path is intact.
+            Anything raised while producing chunks propagates the same way.
+    """
+    dest_path = Path(dest_path)
+    try:
+        existing = dest_path.open('rb')
+    except FileNotFoundError:
+        existing = None
+    tmp_path = dest_path.with_name(f".{dest_path.name}.{os.getpid()}.tmp")
+    tmp_file = None
+    matched = 0
+    try:
+        for chunk in chunks:
+            if tmp_file is None:
+                if existing is not None and existing.read(len(chunk)) == chunk:
+                    matched += len(chunk)
+                    continue
+                tmp_file = _open_seeded(tmp_path, existing, matched)
+            tmp_file.write(chunk)
+        if tmp_file is None:
+            if existing is not None and existing.read(1) == b"":
+                return False
+            tmp_file = _open_seeded(tmp_path, existing, matched)
+        tmp_file.close()
+        os.replace(tmp_path, dest_path)
+        return True
+    except BaseException:
+        if tmp_file is not None:
+            tmp_file.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if existing is not None:
+            existing.close()
+
+
+def _open_seeded(tmp_path: Path, existing, length: int):
+    """Open tmp_path for writing, starting with the first length bytes of existing."""
+    tmp_file = tmp_path.open('wb')
+    if length:
+        existing.seek(0)
+        while length:
+            block = existing.read(min(length, 1 << 16))
+            if not block:
+                break
+            tmp_file.write(block)
+            length -= len(block)
+    return tmp_file
+
+
 if __name__ == "__main__":
     # Test the functions
     success = copy_static_to_public()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import shutil
+from pathlib import Path
+
+from build_logging import summary
+from file_utils import hash_file, prune_empty_dirs, write_json_atomic
+
+
+ASSET_MANIFEST_NAME = ".asset-manifest.json"
+ASSET_MANIFEST_VERSION = 1
+HASH_LENGTH = 10
+
+# Files whose URL other sites or the host rely on keep their names.
+KEEP_NAMES = frozenset(("CNAME", "robots.txt", "favicon.ico", ".nojekyll"))
+KEEP_SUFFIXES = frozenset((".html",))
+
+logger = logging.getLogger(__name__)
+
+
+class AssetMap(dict):
+    """
+    Root-relative asset URL to its fingerprinted URL, e.g.
+    "/index.css" -> "/index.0123456789.css".
+
+    digest identifies the whole mapping, so renders can be cached per map.
+    """
+
+    def __init__(self, urls: dict):
+        super().__init__(urls)
+        digest = hashlib.sha256()
+        for url in sorted(urls):
+            digest.update(f"{url}\0{urls[url]}\n".encode("utf-8"))
+        self.digest = digest.hexdigest()
+
+
+def fingerprinted_name(relative: str, content_hash: str) -> str:
+    """images/tolkien.png -> images/tolkien.<hash>.png"""
+    path = Path(relative)
+    if path.name in KEEP_NAMES or path.suffix in KEEP_SUFFIXES:
+        return relative
+    return path.with_name(f"{path.stem}.{content_hash[:HASH_LENGTH]}{path.suffix}").as_posix()
+
+
+def fingerprint_static(source_dir, dest_dir, log_operations: bool = True):
+    """
+    Publish static assets into dest_dir under content-hashed names.
+
+    A file is published as name.<hash>.ext, so its URL changes exactly when
+    its content does and it can be served with an immutable cache policy.
+    A fingerprinted output that already exists already has the right bytes,
+    so only new content is copied. Outputs of a previous run that are no
+    longer current are removed; nothing else in dest_dir is touched.
+
+    Hashes are kept in ASSET_MANIFEST_NAME inside dest_dir along with each
+    source's size and mtime, and a source whose stat is unchanged is not
+    hashed again.
+
+    Args:
+        source_dir (str): Path to the static directory
+        dest_dir (str): Path to the built site
+        log_operations (bool): Whether to log file operations (default: True)
+
+    Returns:
+        AssetMap: The URL mapping for rendering, or None if source_dir is
+        not a directory
+    """
+    source_path = Path(source_dir)
+    dest_path = Path(dest_dir)
+    if not source_path.is_dir():
+        if log_operations:
+            logger.error("Source directory does not exist: %s", source_path)
+        return None
+
+    dest_path.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest(dest_path)
+    files = {}
+    copied = hashed = 0
+
+    for source_file in sorted(source_path.rglob("*")):
+        if not source_file.is_file():
+            continue
+        relative = source_file.relative_to(source_path).as_posix()
+        stat = source_file.stat()
+        entry = previous.get(relative)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            content_hash = hash_file(source_file)
+            hashed += 1
+            entry = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": content_hash,
+                "output": fingerprinted_name(relative, content_hash),
+            }
+        files[relative] = entry
+
+        dest_file = dest_path / entry["output"]
+        if dest_file.exists() and (dest_file.name != source_file.name or _same_stat(source_file, dest_file)):
+            continue
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = dest_file.with_name(dest_file.name + ".tmp")
+        shutil.copy2(source_file, tmp_file)
+        tmp_file.replace(dest_file)
+        copied += 1
+        if log_operations:
+            logger.debug("Copied file: %s -> %s", source_file, dest_file, extra={"event": "copy", "path": dest_file})
+
+    current = {entry["output"] for entry in files.values()}
+    removed = 0
+    for entry in previous.values():
+        if entry["output"] in current:
+            continue
+        stale = dest_path / entry["output"]
+        if stale.is_file():
+            stale.unlink()
+            removed += 1
+            if log_operations:
+                logger.debug("Deleted file: %s", stale, extra={"event": "delete", "path": stale})
+        prune_empty_dirs(stale.parent, dest_path)
+
+    _save_manifest(dest_path, files)
+    summary.assets_copied += copied
+    summary.assets_unchanged += len(files) - copied
+    summary.assets_removed += removed
+    if log_operations:
+        logger.info(
+            "Fingerprinted %s into %s: %d copied, %d hashed, %d removed",
+            source_path, dest_path, copied, hashed, removed,
+        )
+    return _asset_map(files)
+
+
+def _asset_map(files: dict) -> AssetMap:
+    return AssetMap({"/" + relative: "/" + entry["output"] for relative, entry in files.items()})
+
+
+def _same_stat(source_file: Path, dest_file: Path) -> bool:
+    # Files that keep their name can change in place; compare like sync does.
+    source_stat = source_file.stat()
+    dest_stat = dest_file.stat()
+    return source_stat.st_size == dest_stat.st_size and source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def _load_manifest(dest_path: Path) -> dict:
+    try:
+        with (dest_path / ASSET_MANIFEST_NAME).open('r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != ASSET_MANIFEST_VERSION:
+        return {}
+    return manifest["files"]
+
+
+def _save_manifest(dest_path: Path, files: dict):
+    write_json_atomic(
+        dest_path / ASSET_MANIFEST_NAME,
+        {"version": ASSET_MANIFEST_VERSION, "files": files},
+        indent=1, sort_keys=True,
+    )
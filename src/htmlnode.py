@@ -1,7 +1,16 @@
 from textnode import TextType
 
 
+# Elements that have no content and no end tag in HTML.
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+))
+
 class HTMLNode:
+    # Parse trees of large pages hold millions of nodes, so no per-instance
+    # __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str = None, value: str = None, children: list = None, props: dict = None):
         self.tag = tag
         self.value = value
@@ -10,6 +19,18 @@ class HTMLNode:
     
     def to_html(self) -> str:
         raise NotImplementedError("to_html not implemented")
+
+    def iter_html(self):
+        """Yield the node's HTML in chunks; joining them gives to_html()."""
+        raise NotImplementedError("iter_html not implemented")
+
+    def write_html(self, file) -> int:
+        """Stream the node's HTML into a text file object and return the characters written."""
+        written = 0
+        for chunk in self.iter_html():
+            file.write(chunk)
+            written += len(chunk)
+        return written
     
     def props_to_html(self) -> str:
         if self.props is None:
@@ -20,51 +41,82 @@ class HTMLNode:
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value: str, props: dict = None):
-        super().__init__(tag, value, None, props)
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
     
     def to_html(self) -> str:
         if self.value is None:
             raise ValueError("LeafNode value cannot be None")
         if self.tag is None:
             return self.value
+        if self.tag in VOID_TAGS:
+            return f"<{self.tag}{self.props_to_html()}>"
         
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props: dict = None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
     
     def to_html(self) -> str:
         if self.tag is None:
             raise ValueError("ParentNode tag cannot be None")
         if self.children is None:
             raise ValueError("ParentNode children cannot be None")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
+        children_html = "".join([child.to_html() for child in self.children])
         return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
 
+    def iter_html(self):
+        """
+        Yield the opening tag, each child's HTML and the closing tag.
+
+        Only one child subtree is held as a string at a time, so streaming a
+        page-level node costs memory proportional to its largest block.
+        """
+        if self.tag is None:
+            raise ValueError("ParentNode tag cannot be None")
+        if self.children is None:
+            raise ValueError("ParentNode children cannot be None")
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield child.to_html()
+        yield f"</{self.tag}>"
+
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
 
+_PLAIN_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
 def text_node_to_html_node(text_node):
     """Convert a TextNode to an HTMLNode."""
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    elif text_node.text_type == TextType.LINK:
+    text_type = text_node.text_type
+    if text_type in _PLAIN_TAGS:
+        return LeafNode(_PLAIN_TAGS[text_type], text_node.text)
+    elif text_type == TextType.LINK:
         return LeafNode("a", text_node.text, {"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
+    elif text_type == TextType.IMAGE:
         return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
     else:
-        raise ValueError(f"Unknown text type: {text_node.text_type}")
\ No newline at end of file
+        raise ValueError(f"Unknown text type: {text_node.text_type}")
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+
+from file_utils import write_json_atomic
+
+
+IMAGE_INDEX_NAME = "image-index.json"
+IMAGE_INDEX_VERSION = 1
+IMAGE_SUFFIXES = frozenset((".png", ".jpg", ".jpeg", ".gif", ".webp"))
+
+# JPEG start-of-frame markers; the rest (DHT, DAC, JPG, ...) carry no size.
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+logger = logging.getLogger(__name__)
+
+
+def read_image_size(path):
+    """
+    Read the pixel dimensions of a PNG, JPEG, GIF or WebP file from its
+    header, without decoding the image.
+
+    Returns:
+        tuple: (width, height), or None if the format is not recognized or
+        the header is truncated
+    """
+    try:
+        with open(path, 'rb') as file:
+            head = file.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp_size(head)
+            if head[:2] == b"\xff\xd8":
+                file.seek(2)
+                return _jpeg_size(file)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def _webp_size(head: bytes):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(file):
+    """Walk JPEG segments, seeking past each one, until a start-of-frame."""
+    while True:
+        byte = file.read(1)
+        while byte == b"\xff":
+            byte = file.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        length_bytes = file.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        if marker == 0xDA or length < 2:
+            # Image data starts without a frame header: not a valid JPEG.
+            return None
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+class ImageIndex:
+    """
+    Dimensions of the images under a static directory, by URL.
+
+    The index is kept on disk with each image's size and mtime, so a
+    refresh reads the header of new and changed images only. Pages use it
+    read-only; it is refreshed once per build before rendering starts.
+    """
+
+    def __init__(self, entries: dict = None):
+        # relative path -> {"size", "mtime_ns", "width", "height"}
+        self.entries = entries if entries is not None else {}
+        self._update_lookup()
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save(); a missing or unreadable file gives an empty one."""
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                document = json.load(file)
+        except (OSError, ValueError):
+            return cls()
+        if document.get("version") != IMAGE_INDEX_VERSION:
+            return cls()
+        return cls(document["images"])
+
+    def save(self, path):
+        write_json_atomic(path, {"version": IMAGE_INDEX_VERSION, "images": self.entries}, indent=1, sort_keys=True)
+
+    def refresh(self, static_dir) -> int:
+        """
+        Bring the index in line with the images under static_dir.
+
+        Returns:
+            int: How many image headers had to be read
+        """
+        static_dir = Path(static_dir)
+        entries = {}
+        read = 0
+        for root, dirs, files in os.walk(static_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() not in IMAGE_SUFFIXES:
+                    continue
+                path = Path(root) / name
+                relative = path.relative_to(static_dir).as_posix()
+                stat = path.stat()
+                entry = self.entries.get(relative)
+                if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                    size = read_image_size(path)
+                    read += 1
+                    if size is None:
+                        logger.warning("Could not read image size of %s", path)
+                    entry = {
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "width": size[0] if size else None,
+                        "height": size[1] if size else None,
+                    }
+                entries[relative] = entry
+        self.entries = entries
+        self._update_lookup()
+        logger.info("Indexed %d images in %s: %d headers read", len(entries), static_dir, read)
+        return read
+
+    def size_of(self, url: str):
+        """(width, height) of the image a root-relative URL points at, or None."""
+        return self._lookup.get(url)
+
+    def annotate(self, node):
+        """
+        Add width, height, loading="lazy" and decoding="async" to every
+        <img> in an HTML tree, in place. Images the index does not know,
+        such as external ones, get only the loading hints.
+
+        Returns:
+            The same node, so it can be used as a block transform.
+        """
+        for img in _iter_images(node):
+            size = self._lookup.get(img.props.get("src"))
+            if size is not None:
+                img.props["width"] = str(size[0])
+                img.props["height"] = str(size[1])
+            img.props["loading"] = "lazy"
+            img.props["decoding"] = "async"
+        return node
+
+    def _update_lookup(self):
+        self._lookup = {
+            "/" + relative: (entry["width"], entry["height"])
+            for relative, entry in self.entries.items()
+            if entry["width"] is not None
+        }
+        digest = hashlib.sha256()
+        for url in sorted(self._lookup):
+            digest.update(f"{url}\0{self._lookup[url]}\n".encode("utf-8"))
+        # Covers what rendering sees, not mtimes, so touching an image
+        # does not invalidate the pages that show it.
+        self.digest = digest.hexdigest()
+
+
+def _iter_images(node):
+    if node.tag == "img":
+        if node.props is not None:
+            yield node
+        return
+    for child in node.children or ():
+        yield from _iter_images(child)
+
+
+def refresh_image_index(static_dir, cache_dir) -> ImageIndex:
+    """
+    Load the index kept in cache_dir, refresh it against static_dir and
+    save it back. cache_dir must outlive the output directory, which a
+    full build wipes.
+    """
+    index_path = Path(cache_dir) / IMAGE_INDEX_NAME
+    index = ImageIndex.load(index_path)
+    index.refresh(static_dir)
+    index.save(index_path)
+    return index
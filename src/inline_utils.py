@@ -31,26 +31,10 @@ def split_nodes_image(old_nodes):
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
+        if _IMAGE_RE.search(original_text) is None:
             new_nodes.append(old_node)
             continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    TextType.IMAGE,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        _append_pattern_nodes(new_nodes, original_text, 0, len(original_text), _IMAGE_RE, TextType.IMAGE)
     return new_nodes
 
 
@@ -61,39 +45,91 @@ def split_nodes_link(old_nodes):
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        if _LINK_RE.search(original_text) is None:
             new_nodes.append(old_node)
             continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        _append_pattern_nodes(new_nodes, original_text, 0, len(original_text), _LINK_RE, TextType.LINK)
     return new_nodes
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
+    matches = _IMAGE_RE.findall(text)
     return matches
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
+    matches = _LINK_RE.findall(text)
     return matches
 
+_IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_DELIMITER_RE = re.compile(r"\*\*|_|`")
+_DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+# Lower number wins: a delimiter is only live when nothing of equal or
+# higher precedence is open, mirroring the order of the old split passes.
+_DELIMITER_PRECEDENCE = {"**": 0, "_": 1, "`": 2}
+
+
+def _append_pattern_nodes(nodes, text, start, end, pattern, text_type):
+    """
+    Append nodes for text[start:end], turning every match of pattern into a
+    node of text_type. Matching works on positions, so each character is
+    looked at once no matter how many matches there are.
+    """
+    position = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+    if position < end:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
+
+
+def _append_plain_run(nodes, text, start, end):
+    """Append nodes for a run with no emphasis: images first, then links in the gaps."""
+    position = start
+    for match in _IMAGE_RE.finditer(text, start, end):
+        if match.start() > position:
+            _append_pattern_nodes(nodes, text, position, match.start(), _LINK_RE, TextType.LINK)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    if position < end:
+        _append_pattern_nodes(nodes, text, position, end, _LINK_RE, TextType.LINK)
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
\ No newline at end of file
+    """
+    Tokenize inline markdown into TextNodes in linear time.
+
+    One scan over the delimiters finds the bold, italic and code runs; each
+    remaining plain run is then scanned for images and links by position.
+    The result is the same node stream the split_nodes_* passes produce when
+    chained (bold, italic, code, image, link), including their precedence:
+    a delimiter inside a higher-precedence run is literal text, and an
+    unclosed run raises ValueError.
+    """
+    nodes = []
+    open_delimiter = None
+    run_start = 0
+    for match in _DELIMITER_RE.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            if match.start() > run_start:
+                _append_plain_run(nodes, text, run_start, match.start())
+            open_delimiter = delimiter
+            run_start = match.end()
+        elif delimiter == open_delimiter:
+            if match.start() > run_start:
+                nodes.append(TextNode(text[run_start:match.start()], _DELIMITER_TYPES[delimiter]))
+            open_delimiter = None
+            run_start = match.end()
+        elif _DELIMITER_PRECEDENCE[delimiter] < _DELIMITER_PRECEDENCE[open_delimiter]:
+            # e.g. "**" while "_" is open: the outer split would leave the
+            # inner run with an odd number of delimiters.
+            raise ValueError("invalid markdown, formatted section not closed")
+    if open_delimiter is not None:
+        raise ValueError("invalid markdown, formatted section not closed")
+    if run_start < len(text):
+        _append_plain_run(nodes, text, run_start, len(text))
+    return nodes
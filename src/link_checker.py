@@ -0,0 +1,174 @@
+import logging
+import posixpath
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+import build_logging
+from page_document import parse_document
+from template_engine import load_template
+from url_resolver import is_root_relative, split_url
+
+logger = logging.getLogger(__name__)
+
+BrokenLink = namedtuple("BrokenLink", ["source", "url", "kind"])
+
+# Attribute name to what a broken reference is reported as.
+_KINDS = {"href": "link", "src": "image"}
+_SCHEME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+_TEMPLATE_URL_RE = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+class SiteIndex:
+    """
+    Every URL path the built site serves: one or more per generated page
+    and one per static asset, all root-relative and without basepath.
+
+    A page is reachable with and without its .html suffix, and an
+    index.html also as its directory, with or without the trailing slash.
+    """
+
+    def __init__(self):
+        self.paths = set()
+
+    def add_page(self, html_path: str):
+        """Add a page by its output path relative to the site root, e.g. "blog/tom/index.html"."""
+        url = "/" + html_path
+        self.paths.add(url)
+        if url.endswith("/index.html"):
+            directory = url[:-len("index.html")]
+            self.paths.add(directory)
+            if directory != "/":
+                self.paths.add(directory[:-1])
+        else:
+            self.paths.add(url[:-len(".html")])
+
+    def add_asset(self, asset_path: str):
+        """Add a static asset by its path relative to the site root, e.g. "images/tom.png"."""
+        self.paths.add("/" + asset_path)
+
+    def __contains__(self, url: str) -> bool:
+        path = unquote(split_url(url)[0])
+        return path in self.paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def build(cls, dir_path_content, static_dir):
+        """Index the pages generated from dir_path_content and the assets in static_dir."""
+        index = cls()
+        content_root = Path(dir_path_content)
+        for markdown_path in content_root.rglob("*.md"):
+            index.add_page(page_output_path(markdown_path, content_root))
+        static_root = Path(static_dir)
+        for asset in static_root.rglob("*"):
+            if asset.is_file():
+                index.add_asset(asset.relative_to(static_root).as_posix())
+        return index
+
+    def __repr__(self) -> str:
+        return f"SiteIndex(paths={len(self.paths)})"
+
+
+def page_output_path(markdown_path, dir_path_content) -> str:
+    """The output path of a page relative to the site root, as find_pages lays it out."""
+    relative = Path(markdown_path).relative_to(dir_path_content)
+    return (relative.parent / (relative.stem + ".html")).as_posix()
+
+
+def check_links(dir_path_content, static_dir, template_path=None, jobs=1, references=None) -> list:
+    """
+    Report every internal link and image in the site that points nowhere.
+
+    Each page is parsed into its HTML tree, on a process pool when
+    jobs > 1, and the href and src props found there, relative ones
+    included, are looked up in a SiteIndex of the whole site. Code samples
+    are text in the tree, so URLs inside them are not mistaken for links.
+    Root-relative URLs written literally in the template are checked once.
+
+    references, as filled in by generate_pages_recursive, supplies the
+    links and images of the pages just built, keyed by source path relative
+    to the content root; only the pages missing from it are parsed.
+
+    Returns:
+        list: BrokenLink(source, url, kind) tuples, kind being "link" or
+        "image"; the template's first, then each page's in path order
+    """
+    index = SiteIndex.build(dir_path_content, static_dir)
+    content_root = Path(dir_path_content)
+    references = references if references is not None else {}
+    tasks = [
+        (str(path), "/" + page_output_path(path, content_root), path.relative_to(content_root).as_posix())
+        for path in sorted(content_root.rglob("*.md"))
+    ]
+    unparsed = [task for task in tasks if task[2] not in references]
+    if jobs > 1 and len(unparsed) > 1:
+        chunksize = max(1, len(unparsed) // (jobs * 4))
+        initializer, initargs = build_logging.worker_initializer()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+            parsed = list(executor.map(_page_urls, unparsed, chunksize=chunksize))
+    else:
+        parsed = [_page_urls(task) for task in unparsed]
+    parsed = dict(zip((task[2] for task in unparsed), parsed))
+
+    broken = []
+    if template_path is not None:
+        for attribute, url in _template_urls(template_path):
+            if is_root_relative(url) and url not in index:
+                broken.append(BrokenLink(str(template_path), url, _KINDS[attribute]))
+    for source, page_url, key in tasks:
+        urls = references[key] if key in references else parsed[key]
+        for attribute, url in urls:
+            target = resolve_internal_url(url, page_url)
+            if target is not None and target not in index:
+                broken.append(BrokenLink(source, url, _KINDS[attribute]))
+
+    for link in broken:
+        logger.warning(
+            "Broken %s in %s: %s", link.kind, link.source, link.url,
+            extra={"event": "broken_link", "path": link.source},
+        )
+    logger.info(
+        "Checked links of %d pages (%d parsed again) against %d site paths: %d broken",
+        len(tasks), len(unparsed), len(index), len(broken),
+    )
+    return broken
+
+
+def resolve_internal_url(url: str, page_url: str):
+    """
+    The root-relative path url points to from the page at page_url, or None
+    if it leaves the site or only names a fragment of the same page.
+    """
+    if not url or url.startswith("#") or url.startswith("//") or _SCHEME_RE.match(url):
+        return None
+    if is_root_relative(url):
+        return url
+    path, rest = split_url(url)
+    if not path:
+        return None
+    base = page_url if page_url.endswith("/") else posixpath.dirname(page_url)
+    resolved = posixpath.normpath(posixpath.join(base, path))
+    if path.endswith("/") and resolved != "/":
+        resolved += "/"
+    return resolved + rest
+
+
+def _page_urls(task) -> list:
+    """The (attribute, url) pairs of every link and image in one page."""
+    from_path = task[0]
+    try:
+        with open(from_path, 'r', encoding='utf-8') as markdown_file:
+            document = parse_document(markdown_file)
+    except (OSError, ValueError) as e:
+        logger.error("Could not check links in %s: %s", from_path, e)
+        return []
+    return document.references()
+
+
+def _template_urls(template_path) -> list:
+    template = load_template(template_path)
+    return [match.groups() for segment in template.segments for match in _TEMPLATE_URL_RE.finditer(segment)]
@@ -1,27 +1,325 @@
+from block_cache import BlockCache
+from build_client import DEFAULT_SOCKET
+from build_daemon import BuildDaemon
+from build_logging import LOG_MODES, configure_logging, log_summary, shutdown_logging
+from compression import compress_outputs, remove_compressed_outputs
 from file_utils import copy_static_to_public
+from fingerprint import fingerprint_static
+from image_info import refresh_image_index
+from link_checker import check_links
+from page_cache import PageCache
 from page_generator import generate_pages_recursive
+from pipeline import PipelineOptions
+from profiling import BuildProfile
+from search_index import SearchIndex
+from sharding import ShardMergeError, merge_shards, parse_shard, write_shard_manifest
+from watcher import SiteWatcher
+import argparse
+import contextlib
+import logging
+import os
 import sys
 
 
+logger = logging.getLogger("build")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into ../docs.")
+    parser.add_argument(
+        "basepath",
+        nargs="?",
+        default="/",
+        help="URL prefix the site is served under (default: /)",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages; 0 uses every core (default: 1)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, parsing and writing pages using reader and writer threads",
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=4,
+        help="with --pipeline, number of threads reading markdown (default: 4)",
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        default=4,
+        help="with --pipeline, number of threads writing HTML (default: 4)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=32,
+        help="with --pipeline, pages buffered between stages before a stage waits (default: 32)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard_argument,
+        metavar="I/N",
+        help="render only the pages that fall into shard I of N, by path hash, and record the outputs for --merge-shards",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        nargs="+",
+        metavar="DIR",
+        help="instead of building, assemble ../docs from the output directories of every --shard build, checking that they fit together",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep ../docs and re-render only pages whose inputs changed since the last build (implies --sync)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="copy only new or changed static assets instead of wiping ../docs",
+    )
+    parser.add_argument(
+        "--hash-assets",
+        action="store_true",
+        help="with --sync, compare content hashes of assets whose mtime changed",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish static assets under content-hashed names and rewrite references to them (implies --sync)",
+    )
+    parser.add_argument(
+        "--image-dimensions",
+        action="store_true",
+        help='give every <img> its width and height, read from the image header, plus loading="lazy" and decoding="async"; '
+        "image sizes are kept in ../.build-cache/image-index.json so only new and changed images are read",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const="../.build-cache",
+        metavar="DIR",
+        help="keep parsed page bodies in DIR and reuse them when the markdown and parser are unchanged (default: ../.build-cache)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        nargs="?",
+        const="../.build-cache/blocks.json",
+        metavar="FILE",
+        help="reuse the HTML of unchanged markdown blocks, kept in FILE between runs "
+        "(default: ../.build-cache/blocks.json); pages rendered by --jobs workers do not use it",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a full-text search index, sharded by term prefix, to ../docs/search (implies --sync); "
+        "pages are re-indexed only when their markdown changes. Cannot be combined with --watch or --daemon",
+    )
+    parser.add_argument(
+        "--search-prefix-length",
+        type=int,
+        default=1,
+        metavar="N",
+        help="with --search, shard the index by the first N characters of each term (default: 1)",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="after building, write .gz (and .br when brotli is installed) next to every text file in ../docs "
+        "(implies --sync); a build without it deletes them again. Cannot be combined with --watch or --daemon",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="after building, report internal links and images that point to no page or asset, and fail the build if any do",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="../build-profile.json",
+        metavar="REPORT",
+        help="time every build phase and every stage of every page, rendering pages one at a time, and write a JSON report "
+        "(default: ../build-profile.json); cannot be combined with --jobs or --pipeline",
+    )
+    parser.add_argument(
+        "--profile-page",
+        metavar="PAGE",
+        help="with --profile, also dump cProfile stats for the page whose path ends with PAGE, next to the report",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep watching content, static assets and the template and rebuild what changes",
+    )
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const=DEFAULT_SOCKET,
+        metavar="SOCKET",
+        help="after building, keep the template, parsed pages and file index in memory and serve build, render and "
+        f"invalidate requests from build_client.py on the Unix socket SOCKET (default: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--log-mode",
+        choices=LOG_MODES,
+        default="summary",
+        help="quiet: warnings and errors only; summary: one line per phase and a build summary; "
+        "structured: every file operation as a JSON line (default: summary)",
+    )
+    args = parser.parse_args(argv)
+    # Rebuilt pages are not recompressed or re-indexed, so .gz and .br
+    # files and search shards would go stale.
+    if args.watch and (args.fingerprint or args.compress or args.search):
+        parser.error("--watch cannot be combined with --fingerprint, --compress or --search")
+    if args.daemon and (args.watch or args.fingerprint or args.search or args.shard or args.compress):
+        parser.error("--daemon cannot be combined with --watch, --fingerprint, --search, --shard or --compress")
+    if args.profile and (args.jobs != 1 or args.pipeline):
+        parser.error("--profile times pages one at a time and cannot be combined with --jobs or --pipeline")
+    if args.pipeline and args.jobs != 1:
+        parser.error("--pipeline renders in one process and cannot be combined with --jobs")
+    if args.shard and (args.watch or args.search):
+        parser.error("--shard cannot be combined with --watch or --search")
+    if args.merge_shards and args.shard:
+        parser.error("--merge-shards cannot be combined with --shard")
+    if args.search_prefix_length < 1:
+        parser.error("--search-prefix-length must be at least 1")
+    if min(args.readers, args.writers, args.queue_size) < 1:
+        parser.error("--readers, --writers and --queue-size must be at least 1")
+    return args
+
+
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    print(f"Base path set to: {basepath}")
-
-    print("\nCopying static assets to public directory...")
-    # Test the functions
-    success = copy_static_to_public()
-    if success:
-        print("Successfully copied static directory to public directory")
+    args = parse_args()
+    basepath = args.basepath
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    configure_logging(args.log_mode)
+    try:
+        if args.merge_shards:
+            merge(args.merge_shards)
+        else:
+            build(args, basepath, jobs)
+    finally:
+        shutdown_logging()
+
+
+def _shard_argument(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def merge(shard_dirs):
+    try:
+        merge_shards(shard_dirs, "../docs")
+    except ShardMergeError as e:
+        for problem in e.problems:
+            logger.error("Cannot merge shards: %s", problem)
+        sys.exit(1)
+
+
+def build(args, basepath, jobs):
+    logger.info("Base path set to: %s", basepath)
+
+    profile = None
+    if args.profile:
+        profile = BuildProfile(
+            cprofile_page=args.profile_page,
+            cprofile_path=os.path.splitext(args.profile)[0] + ".prof",
+        )
+
+    logger.info("Copying static assets to public directory...")
+    assets = None
+    with profile.phase("static_copy") if profile else contextlib.nullcontext():
+        if args.fingerprint:
+            assets = fingerprint_static("../static", "../docs")
+            success = assets is not None
+        else:
+            success = copy_static_to_public(
+                sync=args.sync or args.incremental or args.compress or args.search,
+                use_hash=args.hash_assets,
+            )
+    if not success:
+        logger.error("Failed to copy static directory to public directory")
+
+    images = None
+    if args.image_dimensions:
+        images = refresh_image_index("../static", "../.build-cache")
+
+    search = None
+    if args.search:
+        search = SearchIndex.load("../docs", args.search_prefix_length)
+
+    references = {} if args.check_links else None
+
+    block_cache = None
+    if args.block_cache:
+        block_cache = BlockCache.load(args.block_cache)
+
+    with profile.phase("pages") if profile else contextlib.nullcontext():
+        failures = generate_pages_recursive(
+            dir_path_content="../content",
+            template_path="../template.html",
+            dest_path_dir="../docs",
+            basepath = basepath,
+            jobs = jobs,
+            incremental = args.incremental,
+            profile = profile,
+            assets = assets,
+            images = images,
+            cache = PageCache(args.cache) if args.cache else None,
+            block_cache = block_cache,
+            pipeline = PipelineOptions(args.readers, args.writers, args.queue_size) if args.pipeline else None,
+            search = search,
+            shard = args.shard,
+            references = references,
+        )
+    if block_cache is not None:
+        block_cache.save(args.block_cache)
+    if search is not None:
+        search.write("../docs", basepath)
+
+    if args.compress:
+        with profile.phase("compress") if profile else contextlib.nullcontext():
+            compress_outputs("../docs", jobs=jobs)
     else:
-        print("Failed to copy static directory to public directory")
+        remove_compressed_outputs("../docs")
+    if args.shard:
+        write_shard_manifest("../docs", args.shard)
 
-    generate_pages_recursive(
-        dir_path_content="../content",
-        template_path="../template.html",
-        dest_path_dir="../docs",
-        basepath = basepath
-    )
+    broken_links = []
+    if args.check_links:
+        with profile.phase("check_links") if profile else contextlib.nullcontext():
+            broken_links = check_links("../content", "../static", "../template.html", jobs=jobs, references=references)
+
+    log_summary()
+    if profile:
+        report = profile.write_report(args.profile)
+        profile.print_summary(report)
+        print(f"Profile report written to {args.profile}")
+    if args.watch or args.daemon:
+        watcher = SiteWatcher(
+            dir_path_content="../content",
+            static_dir="../static",
+            template_path="../template.html",
+            dest_path_dir="../docs",
+            basepath=basepath,
+            block_cache=block_cache,
+            images=images,
+        )
+        if args.watch:
+            watcher.run()
+        else:
+            watcher.prime()
+            BuildDaemon(args.daemon, watcher).run()
+    elif failures or broken_links:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
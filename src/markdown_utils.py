@@ -1,37 +1,186 @@
+import contextlib
+import hashlib
 import re
 
 from block_type import BlockType
-from htmlnode import ParentNode, text_node_to_html_node
+from htmlnode import LeafNode, ParentNode, text_node_to_html_node
 from inline_utils import text_to_textnodes
 from textnode import TextNode, TextType
 
 
+_INDENT_RE = re.compile(r'\n +')
+_HEADING_RE = re.compile(r'(#{1,6}) (.+)')
+# Backtick fences may not have backticks in their info string.
+_FENCE_RE = re.compile(r'( *)(?:(`{3,})([^`]*)|(~{3,})(.*))')
+_RULE_RE = re.compile(r' {0,3}([-*_])(?: *\1){2,} *')
+_LIST_ITEM_RE = re.compile(r'( *)(?:([-*+])|(\d{1,9})([.)]))(?: +(.*))?')
+_TABLE_DELIMITER_RE = re.compile(r' *\|? *:?-+:? *(?:\| *:?-+:? *)*\|? *')
+_TABLE_CELL_RE = re.compile(r'(?<!\\)\|')
+_LANGUAGE_RE = re.compile(r'[\w#+.-]+')
+_LIST_MARKERS = frozenset("-*+0123456789")
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return list(iter_blocks(markdown.split("\n")))
+
+def iter_blocks(lines):
+    """
+    Yield the blocks of a markdown document one at a time.
+
+    Args:
+        lines: Iterable of lines, with or without trailing newlines, such as
+            an open file. Only the lines of the current block are held.
+
+    Blocks are separated by blank lines, trimmed, and have leading spaces
+    removed from their continuation lines. Blocks with nothing but
+    whitespace are skipped. A few constructs are recognised on the way:
+
+    - a fenced code block runs to its closing fence, blank lines included,
+      and keeps its indentation relative to the opening fence
+    - a horizontal rule is a block of its own, even without blank lines
+      around it
+    - a list item starts a new block after a paragraph line, and list
+      blocks keep the indentation that nests their items
+    """
+    block_lines = []
+    in_list = False
+    fence = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if fence is not None:
+            if fence in line and _is_closing_fence(line, fence):
+                block_lines.append(line.strip())
+                yield "\n".join(block_lines)
+                block_lines = []
+                fence = None
+            else:
+                block_lines.append(_dedent(line, fence_indent) if fence_indent else line)
             continue
-        block = block.strip()
-        filtered_blocks.append(re.sub(r'\n +', '\n', block))
-    return filtered_blocks
+        stripped = line.lstrip()
+        if not stripped:
+            if block_lines:
+                block = _clean_block(block_lines, in_list)
+                block_lines = []
+                if block:
+                    yield block
+            continue
+
+        # Only try the patterns the first character allows.
+        first = stripped[0]
+        opening = _FENCE_RE.fullmatch(line.rstrip()) if first in "`~" else None
+        if opening is not None or (first in "-*_" and _RULE_RE.fullmatch(line)):
+            if block_lines:
+                block = _clean_block(block_lines, in_list)
+                block_lines = []
+                if block:
+                    yield block
+            if opening is None:
+                yield line.strip()
+            else:
+                fence = opening.group(2) or opening.group(4)
+                fence_indent = len(opening.group(1))
+                block_lines.append(line.strip())
+            continue
+
+        if not block_lines:
+            in_list = first in _LIST_MARKERS and _LIST_ITEM_RE.fullmatch(line) is not None
+        elif not in_list and first in _LIST_MARKERS and _interrupts_paragraph(line):
+            block = _clean_block(block_lines, in_list)
+            if block:
+                yield block
+            block_lines = []
+            in_list = True
+        block_lines.append(line)
+    if block_lines:
+        # An unclosed fence runs to the end of the document.
+        block = "\n".join(block_lines).rstrip() if fence is not None else _clean_block(block_lines, in_list)
+        if block:
+            yield block
+
+def _clean_block(block_lines, in_list=False):
+    if not in_list:
+        return _INDENT_RE.sub('\n', "\n".join(block_lines).strip())
+    # Keep the indentation that nests list items, relative to the first item.
+    indent = len(block_lines[0]) - len(block_lines[0].lstrip(" "))
+    return "\n".join(_dedent(line, indent) for line in block_lines).rstrip()
+
+def _dedent(line, indent):
+    """Remove indent spaces from the start of line, or all of them if it has fewer."""
+    return line[indent:] if not line[:indent].strip() else line.lstrip()
+
+def _is_closing_fence(line, fence):
+    line = line.strip()
+    return len(line) >= len(fence) and line.startswith(fence) and not line.strip(fence[0])
+
+def _interrupts_paragraph(line):
+    """Whether line starts a list even straight after a paragraph line: a bullet, or an item numbered 1."""
+    item = _LIST_ITEM_RE.fullmatch(line)
+    return (
+        item is not None
+        and len(item.group(1)) < 4
+        and bool(item.group(5))
+        and (item.group(2) is not None or item.group(3) == "1")
+    )
 
 def starts_with_headings(s):
-    return bool(re.match(r'^#{1,6} (.+)', s))
+    return _HEADING_RE.match(s) is not None
 
 def block_to_block_type(block):
-    if starts_with_headings(block):
-        return BlockType.HEADING
-    elif block.startswith("```") or block.endswith("~~~"):
-        return BlockType.CODE
-    elif block.startswith(">"):
-        return BlockType.QUOTE
-    elif block.startswith("- ") or block.startswith("* ") or block.startswith("+ "):
-        return BlockType.unordered_list
-    elif block[0].isdigit() and block[1] == ".":
-        return BlockType.ordered_list
-    else:
+    """
+    Classify a block, dispatching on its first character so that only the
+    patterns that could match are tried.
+    """
+    if not block:
         return BlockType.PARAGRAPH
+    classify = _BLOCK_CLASSIFIERS.get(block[0], _classify_text)
+    return classify(block)
+
+def _classify_heading(block):
+    return BlockType.HEADING if _HEADING_RE.match(block) else _classify_text(block)
+
+def _classify_fence(block):
+    return BlockType.CODE if _FENCE_RE.fullmatch(block.split("\n", 1)[0]) else _classify_text(block)
+
+def _classify_quote(block):
+    return BlockType.QUOTE
+
+def _classify_bullet(block):
+    if _RULE_RE.fullmatch(block):
+        return BlockType.HORIZONTAL_RULE
+    if _LIST_ITEM_RE.fullmatch(block.split("\n", 1)[0]):
+        return BlockType.unordered_list
+    return _classify_text(block)
+
+def _classify_rule(block):
+    return BlockType.HORIZONTAL_RULE if _RULE_RE.fullmatch(block) else _classify_text(block)
+
+def _classify_number(block):
+    return BlockType.ordered_list if _LIST_ITEM_RE.fullmatch(block.split("\n", 1)[0]) else _classify_text(block)
+
+def _classify_text(block):
+    return BlockType.TABLE if _is_table(block) else BlockType.PARAGRAPH
+
+def _is_table(block):
+    """A GFM table: a header row with pipes, then a delimiter row with as many cells."""
+    lines = block.split("\n", 2)
+    return (
+        len(lines) >= 2
+        and "|" in lines[0]
+        and _TABLE_DELIMITER_RE.fullmatch(lines[1]) is not None
+        and len(_split_table_row(lines[0])) == len(_split_table_row(lines[1]))
+    )
+
+_BLOCK_CLASSIFIERS = {
+    "#": _classify_heading,
+    "`": _classify_fence,
+    "~": _classify_fence,
+    ">": _classify_quote,
+    "-": _classify_bullet,
+    "*": _classify_bullet,
+    "+": _classify_bullet,
+    "_": _classify_rule,
+    **dict.fromkeys("0123456789", _classify_number),
+}
 
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
@@ -41,23 +190,147 @@ def markdown_to_html_node(markdown):
         children.append(html_node)
     return ParentNode("div", children, None)
 
-def block_to_html_node(block):
+def iter_markdown_html(lines):
+    """
+    Stream the HTML of markdown_to_html_node(...).to_html() from lines.
+
+    Each block is parsed, rendered and released before the next is read,
+    so memory is bounded by the largest block rather than the document.
+    """
+    return iter_blocks_html(iter_blocks(lines))
+
+def iter_blocks_html(blocks, transform=None, cache=None, document=None, profile=None):
+    """
+    Yield the page <div> around the rendered HTML of each block.
+
+    transform, if given, is called with each block's HTML node before it is
+    rendered and returns the node to render, e.g. ImageIndex.annotate.
+    cache, a BlockCache, supplies blocks rendered before. Its entries are
+    keyed on the digest of a NodeTransform; any other transform must be the
+    same for every page sharing the cache.
+    document, a page_document.PageDocument, is given the word count, links
+    and images of each block as it is yielded.
+    profile, a profiling.BuildProfile, is told the time spent building,
+    inline parsing and serializing each block.
+    """
+    yield "<div>"
+    if cache is None and document is None:
+        for block in blocks:
+            yield block_to_html(block, transform, profile)
+    elif cache is None:
+        for block in blocks:
+            html, word_count, links, images = render_block(block, transform, profile)
+            document.add_block(word_count, links, images)
+            yield html
+    else:
+        render = lambda block: render_block(block, transform, profile)
+        context = getattr(transform, "digest", "")
+        for block in blocks:
+            html, word_count, links, images = cache.render(block, render, context)
+            if document is not None:
+                document.add_block(word_count, links, images)
+            yield html
+    yield "</div>"
+
+class NodeTransform:
+    """
+    A chain of block transforms with a digest identifying them, so that
+    HTML cached under one set of transforms is never served for another.
+    """
+
+    def __init__(self, steps):
+        """
+        Args:
+            steps (list): (function, digest) pairs, applied in order; each
+                function takes a node and returns the node to render. A step
+                that only reads the tree has an empty digest.
+        """
+        self.steps = list(steps)
+        self.digest = hashlib.sha256(
+            "\0".join(digest for _, digest in self.steps if digest).encode("utf-8")
+        ).hexdigest()
+
+    def __call__(self, node):
+        for function, _ in self.steps:
+            node = function(node)
+        return node
+
+    def __repr__(self) -> str:
+        return f"NodeTransform(steps={len(self.steps)}, digest={self.digest[:12]})"
+
+def block_to_html(block, transform=None, profile=None):
+    with profile_phase(profile, "tree"):
+        node = block_to_html_node(block, profile)
+        if transform is not None:
+            node = transform(node)
+    with profile_phase(profile, "serialize"):
+        return node.to_html()
+
+def render_block(block, transform=None, profile=None) -> list:
+    """
+    Render a block and describe it.
+
+    Returns:
+        list: [HTML, word count, link hrefs, image srcs], URLs as written in
+        the markdown, i.e. before transform. Code blocks count no words.
+    """
+    with profile_phase(profile, "tree"):
+        node = block_to_html_node(block, profile)
+        links = []
+        images = []
+        word_count = 0 if node.tag == "pre" else _describe_children(node, links, images)
+        if transform is not None:
+            node = transform(node)
+    with profile_phase(profile, "serialize"):
+        html = node.to_html()
+    return [html, word_count, links, images]
+
+def profile_phase(profile, name):
+    """profile.phase(name) for a profiling.BuildProfile, or a no-op for None."""
+    return profile.phase(name) if profile is not None else contextlib.nullcontext()
+
+def _describe_children(node, links, images) -> int:
+    word_count = 0
+    for child in node.children:
+        if child.children is None:
+            tag = child.tag
+            if tag == "a":
+                links.append(child.props["href"])
+            elif tag == "img":
+                images.append(child.props["src"])
+            value = child.value
+            if value:
+                word_count += len(value.split())
+        elif child.tag != "pre":
+            word_count += _describe_children(child, links, images)
+    return word_count
+
+def block_to_html_node(block, profile=None):
+    """
+    Build the HTML tree of a block. profile, a profiling.BuildProfile, is
+    told the time spent parsing inline markdown apart from the rest.
+    """
     block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return paragraph_to_html_node(block, profile)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return heading_to_html_node(block, profile)
     if block_type == BlockType.CODE:
         return code_to_html_node(block)
-    if block_type == BlockType.ordered_list:
-        return olist_to_html_node(block)
-    if block_type == BlockType.unordered_list:
-        return ulist_to_html_node(block)
+    if block_type == BlockType.ordered_list or block_type == BlockType.unordered_list:
+        return list_to_html_node(block, profile)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(block, profile)
+    if block_type == BlockType.TABLE:
+        return table_to_html_node(block, profile)
+    if block_type == BlockType.HORIZONTAL_RULE:
+        return LeafNode("hr", "")
     raise ValueError("invalid block type")
 
-def text_to_children(text):
+def text_to_children(text, profile=None):
+    if profile is not None:
+        with profile.phase("inline"):
+            return text_to_children(text)
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -66,14 +339,14 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
+def paragraph_to_html_node(block, profile=None):
     lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, profile)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, profile=None):
     level = 0
     for char in block:
         if char == "#":
@@ -83,41 +356,118 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
+    children = text_to_children(text, profile)
     return ParentNode(f"h{level}", children)
 
 
 def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
+    lines = block.split("\n")
+    opening = _FENCE_RE.fullmatch(lines[0])
+    if opening is None:
         raise ValueError("invalid code block")
-    text = block[4:-3]
+    fence = opening.group(2) or opening.group(4)
+    info = (opening.group(3) or opening.group(5) or "").strip()
+    body = lines[1:]
+    if body and _is_closing_fence(body[-1], fence):
+        body.pop()
+    text = "".join(line + "\n" for line in body)
     raw_text_node = TextNode(text, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
+    # The first word of the info string names the language, as in GFM.
+    language = _LANGUAGE_RE.fullmatch(info.split()[0]) if info else None
+    code = ParentNode("code", [child], {"class": f"language-{language.group()}"} if language else None)
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ol", html_items)
+def list_to_html_node(block, profile=None):
+    """
+    Render a list block, ordered or not, nesting items by indentation.
+
+    An item indented past the item above it starts a list inside that item;
+    each nested list is ordered or not by its own first marker, and an
+    ordered list keeps the number it starts at. Lines that are not items
+    continue the item above them.
+    """
+    # Each level is (indent, list); a list is [ordered, start, items] and
+    # an item is [text lines, nested lists].
+    root = None
+    levels = []
+    item = None
+    for line in block.split("\n"):
+        match = _LIST_ITEM_RE.fullmatch(line)
+        if match is None:
+            if item is not None:
+                item[0].append(line.strip())
+            continue
+        indent = len(match.group(1))
+        while len(levels) > 1 and indent < levels[-1][0]:
+            levels.pop()
+        if not levels or indent > levels[-1][0]:
+            ordered = match.group(3) is not None
+            new_list = [ordered, int(match.group(3)) if ordered else 1, []]
+            if item is None:
+                root = new_list
+            else:
+                item[1].append(new_list)
+            levels.append((indent, new_list))
+        item = [[match.group(5) or ""], []]
+        levels[-1][1][2].append(item)
+    if root is None:
+        raise ValueError("invalid list block")
+    return _list_node(root, profile)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def _list_node(html_list, profile=None):
+    ordered, start, items = html_list
     html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
+    for lines, nested in items:
+        children = text_to_children(" ".join(line for line in lines if line), profile)
+        children.extend(_list_node(child, profile) for child in nested)
         html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
+    if not ordered:
+        return ParentNode("ul", html_items)
+    return ParentNode("ol", html_items, {"start": str(start)} if start != 1 else None)
+
+
+def table_to_html_node(block, profile=None):
+    """
+    Render a GFM table: a header row, a delimiter row whose colons give
+    each column's alignment, then body rows, cut or padded to the header.
+    """
+    lines = block.split("\n")
+    header = _split_table_row(lines[0])
+    alignments = [_cell_alignment(cell) for cell in _split_table_row(lines[1])]
+    children = [ParentNode("thead", [_table_row(header, alignments, "th", profile)])]
+    rows = [_table_row(_split_table_row(line), alignments, "td", profile) for line in lines[2:]]
+    if rows:
+        children.append(ParentNode("tbody", rows))
+    return ParentNode("table", children)
+
 
+def _split_table_row(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in _TABLE_CELL_RE.split(line)]
 
-def quote_to_html_node(block):
+
+def _cell_alignment(cell):
+    if cell.startswith(":"):
+        return "center" if cell.endswith(":") else "left"
+    return "right" if cell.endswith(":") else None
+
+
+def _table_row(cells, alignments, tag, profile=None):
+    html_cells = []
+    for index, alignment in enumerate(alignments):
+        text = cells[index] if index < len(cells) else ""
+        html_cells.append(ParentNode(tag, text_to_children(text, profile), {"align": alignment} if alignment else None))
+    return ParentNode("tr", html_cells)
+
+
+def quote_to_html_node(block, profile=None):
     lines = block.split("\n")
     new_lines = []
     for line in lines:
@@ -125,15 +475,19 @@ def quote_to_html_node(block):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, profile)
     return ParentNode("blockquote", children)
 
 def extract_title(markdown):
     """Extract the title from the markdown content."""
-    blocks = markdown_to_blocks(markdown)
-    if not blocks:
+    first_block = next(iter_blocks(markdown.split("\n")), None)
+    return title_from_block(first_block)
+
+def title_from_block(block):
+    """Return the title a page's first block provides, or None."""
+    if not block:
         return None
-    first_block = blocks[0].strip()
+    first_block = block.strip()
     if starts_with_headings(first_block):
         return first_block.split("\n")[0][2:].strip()  # Remove the heading marker
     return None
\ No newline at end of file
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import block_type
+import htmlnode
+import image_info
+import inline_utils
+import markdown_utils
+import page_document
+import textnode
+import url_resolver
+from file_utils import write_json_atomic
+from page_document import PageDocument
+
+
+PAGE_CACHE_VERSION = 2
+
+# Every module whose code decides what a page body looks like. Editing any
+# of them changes parser_version() and so invalidates every cached body.
+PARSER_MODULES = (block_type, htmlnode, image_info, inline_utils, markdown_utils, page_document, textnode, url_resolver)
+
+logger = logging.getLogger(__name__)
+
+_parser_version = None
+
+
+def parser_version() -> str:
+    """Digest of the source of PARSER_MODULES, computed once per process."""
+    global _parser_version
+    if _parser_version is None:
+        digest = hashlib.sha256(str(PAGE_CACHE_VERSION).encode("utf-8"))
+        for module in PARSER_MODULES:
+            digest.update(Path(module.__file__).read_bytes())
+        _parser_version = digest.hexdigest()
+    return _parser_version
+
+
+class PageCache:
+    """
+    Content-addressed store of parsed pages, as PageDocuments.
+
+    An entry is keyed by the hash of the markdown source, the parser version
+    and anything else that shapes the body, such as the image index and the
+    basepath and asset names its URLs are resolved against, but not by the
+    template, which is applied after the body is produced. A template-only
+    change therefore re-renders every page from the cache without parsing
+    any markdown.
+
+    Entries are written atomically, one file each, so pool workers can
+    share a cache directory. Nothing is ever evicted; delete the directory
+    to reclaim space.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def key(self, markdown: bytes, *extra: str) -> str:
+        digest = hashlib.sha256(markdown)
+        digest.update(parser_version().encode("utf-8"))
+        for part in extra:
+            digest.update(b"\0" + part.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns:
+            PageDocument: with the body as a string, or None on a miss
+        """
+        try:
+            with self._path(key).open('r', encoding='utf-8') as file:
+                entry = json.load(file)
+            return PageDocument.from_dict(entry)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key: str, document: PageDocument):
+        """Store an entry; failing to write one only costs a future parse."""
+        path = self._path(key)
+        try:
+            write_json_atomic(path, document.to_dict())
+        except OSError as e:
+            logger.warning("Could not write page cache entry %s: %s", path, e)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def __repr__(self) -> str:
+        return f"PageCache({str(self.directory)!r})"
@@ -0,0 +1,187 @@
+import datetime
+import re
+from itertools import chain
+
+from markdown_utils import iter_blocks, iter_blocks_html, profile_phase, title_from_block
+
+
+FRONT_MATTER_FENCE = "---"
+
+_KEY_RE = re.compile(r"([A-Za-z_][\w-]*)\s*:\s*(.*)")
+_LIST_ITEM_RE = re.compile(r"\s*-\s+(.*)")
+_BOOLEANS = {"true": True, "yes": True, "false": False, "no": False}
+
+
+class PageDocument:
+    """
+    Everything one parse of a page produces.
+
+    title comes from the first heading (or a "title" in the front matter),
+    metadata from YAML-style front matter, and word_count, links and images
+    from the HTML tree of every block, with URLs as written in the markdown.
+    body is the rendered HTML, either a string or, from open_document, an
+    iterator of chunks; in that case the counts are complete only once the
+    body has been consumed.
+    """
+
+    __slots__ = ("title", "metadata", "body", "word_count", "links", "images")
+
+    def __init__(self, title=None, metadata=None, body="", word_count=0, links=None, images=None):
+        self.title = title
+        self.metadata = metadata if metadata is not None else {}
+        self.body = body
+        self.word_count = word_count
+        self.links = links if links is not None else []
+        self.images = images if images is not None else []
+
+    def add_block(self, word_count: int, links: list, images: list):
+        self.word_count += word_count
+        self.links.extend(links)
+        self.images.extend(images)
+
+    @property
+    def date(self):
+        """The front matter date as a datetime.date, or None if absent or not ISO 8601."""
+        value = self.metadata.get("date")
+        if not isinstance(value, str):
+            return None
+        try:
+            return datetime.date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+
+    @property
+    def tags(self) -> list:
+        value = self.metadata.get("tags", [])
+        if isinstance(value, str):
+            value = [tag.strip() for tag in value.split(",")]
+        return [tag for tag in value if tag]
+
+    @property
+    def draft(self) -> bool:
+        return self.metadata.get("draft") is True
+
+    @property
+    def slug(self):
+        return self.metadata.get("slug") or None
+
+    def references(self) -> list:
+        """The (attribute, url) pair of every link and image, e.g. ("href", "/blog/")."""
+        return [("href", url) for url in self.links] + [("src", url) for url in self.images]
+
+    def to_dict(self) -> dict:
+        """A JSON-ready copy; body must be a string."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, entry: dict):
+        return cls(**{name: entry[name] for name in cls.__slots__})
+
+    def __repr__(self) -> str:
+        return f"PageDocument(title={self.title!r}, metadata={self.metadata}, word_count={self.word_count}, links={len(self.links)}, images={len(self.images)})"
+
+
+def open_document(lines, transform=None, block_cache=None, profile=None) -> PageDocument:
+    """
+    Start parsing a page from lines, such as an open file.
+
+    Front matter and the title block are read straight away; the rest of the
+    page is parsed and rendered as document.body is iterated, so memory is
+    bounded by the largest block.
+
+    Args:
+        lines: Iterable of lines, with or without trailing newlines
+        transform (NodeTransform): Applied to every block's HTML tree
+        block_cache (BlockCache): Reuse blocks rendered before
+        profile (profiling.BuildProfile): Told the time spent splitting the
+            page into front matter and blocks, and rendering them
+
+    Returns:
+        PageDocument: with body an iterator of HTML chunks
+    """
+    with profile_phase(profile, "blocks"):
+        metadata, lines = split_front_matter(lines)
+    blocks = iter_blocks(lines)
+    if profile is not None:
+        blocks = profile.timed("blocks", blocks)
+    first_block = next(blocks, None)
+    if first_block is not None:
+        blocks = chain((first_block,), blocks)
+    document = PageDocument(page_title(first_block, metadata), metadata)
+    document.body = iter_blocks_html(blocks, transform, block_cache, document, profile)
+    return document
+
+
+def parse_document(lines, transform=None, block_cache=None, profile=None) -> PageDocument:
+    """open_document, with the body rendered into a string."""
+    document = open_document(lines, transform, block_cache, profile)
+    document.body = "".join(document.body)
+    return document
+
+
+def page_title(first_block, metadata: dict):
+    """The title of a page: its first block's heading, else the front matter title, else None."""
+    title = title_from_block(first_block)
+    if title is None and isinstance(metadata.get("title"), str):
+        title = metadata["title"]
+    return title
+
+
+def split_front_matter(lines):
+    """
+    Read front matter from the start of lines.
+
+    Front matter is a block of "key: value" lines between two "---" lines
+    at the very top of the page. Values may be quoted strings, true/false,
+    [inline, lists] or "- item" lines under an empty key; anything else is
+    kept as a string. Lines that don't fit this shape mean there is no
+    front matter, and nothing is consumed.
+
+    Returns:
+        tuple: (metadata dict, iterator over the remaining lines)
+    """
+    lines = iter(lines)
+    first_line = next(lines, None)
+    if first_line is None:
+        return {}, iter(())
+    if first_line.rstrip() != FRONT_MATTER_FENCE:
+        return {}, chain((first_line,), lines)
+
+    consumed = [first_line]
+    metadata = {}
+    list_key = None
+    for line in lines:
+        consumed.append(line)
+        text = line.rstrip()
+        if text == FRONT_MATTER_FENCE:
+            return metadata, lines
+        if not text.strip() or text.lstrip().startswith("#"):
+            continue
+        item = _LIST_ITEM_RE.fullmatch(text)
+        if item is not None and list_key is not None:
+            metadata[list_key].append(_parse_scalar(item.group(1)))
+            continue
+        match = _KEY_RE.fullmatch(text)
+        if match is None:
+            break
+        key, value = match.groups()
+        if value:
+            metadata[key] = _parse_value(value)
+            list_key = None
+        else:
+            metadata[key] = []
+            list_key = key
+    return {}, chain(consumed, lines)
+
+
+def _parse_value(value: str):
+    if value.startswith("[") and value.endswith("]"):
+        return [_parse_scalar(item) for item in value[1:-1].split(",") if item.strip()]
+    return _parse_scalar(value)
+
+
+def _parse_scalar(value: str):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return _BOOLEANS.get(value.lower(), value)
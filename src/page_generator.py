@@ -1,54 +1,375 @@
+import hashlib
+import io
+import logging
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from markdown_utils import markdown_to_html_node, extract_title
-from file_utils import write_html_to_file
+import build_logging
+from build_manifest import (
+    plan_incremental_build,
+    remove_outputs,
+    save_manifest,
+    source_entry,
+)
+from markdown_utils import NodeTransform, profile_phase
+from file_utils import write_html_chunks_to_file, write_html_to_file
+from page_document import open_document, parse_document
+from pipeline import run_pipeline
+from search_index import TermCollector, page_url
+from sharding import shard_of
+from template_engine import load_template
+from url_resolver import UrlResolver
 
-def generate_pages_recursive(dir_path_content, template_path, dest_path_dir, basepath="/"):
+logger = logging.getLogger(__name__)
+
+# One page to render; the fields are generate_page's arguments, in order.
+PageTask = namedtuple(
+    "PageTask",
+    ["from_path", "template_path", "dest_path", "basepath", "assets", "images", "cache", "block_cache", "terms", "references"],
+    defaults=("/", None, None, None, None, None, None),
+)
+
+def generate_pages_recursive(dir_path_content, template_path, dest_path_dir, basepath="/", jobs=1, incremental=False, profile=None, assets=None, images=None, cache=None, block_cache=None, pipeline=None, search=None, shard=None, references=None):
+    """
+    Generate an HTML page for every markdown file under dir_path_content.
+
+    Pages are discovered up front and then rendered either one at a time or,
+    when jobs > 1, on a process pool. Passing a pipeline.PipelineOptions as
+    pipeline instead overlaps reading, parsing and writing pages in this
+    process, which pays off when file I/O is slow. A page that fails is
+    reported and the rest of the build carries on.
+
+    Every build records a manifest of its inputs in dest_path_dir. With
+    incremental=True that manifest is used to render only the pages whose
+    source, template or basepath changed, and to delete the outputs of
+    sources that were removed.
+
+    Passing a profiling.BuildProfile as profile renders pages one at a time,
+    in this process, with per-stage timings recorded into it; jobs and
+    pipeline are then ignored.
+
+    Root-relative href and src URLs in pages are resolved on the HTML tree
+    of each block, see url_resolver.py, and those in the template once per
+    build. Passing a fingerprint.AssetMap as assets rewrites every reference
+    to a static asset to its fingerprinted name.
+    Passing an image_info.ImageIndex as images gives every <img> its
+    dimensions and lazy-loading attributes.
+
+    Passing a page_cache.PageCache as cache reuses the PageDocument of
+    every page whose markdown was rendered before by the same parser, so
+    a template change re-renders pages without parsing them.
+    Passing a block_cache.BlockCache as block_cache reuses the HTML of
+    unchanged blocks of pages rendered in this process; pool workers do
+    not share it.
+
+    Passing a search_index.SearchIndex as search collects the search terms
+    of every page whose markdown changed since it was last indexed, while
+    the page is parsed. Those pages are parsed in full, bypassing both
+    caches, and are rendered even if an incremental build would skip them.
+
+    Passing shard=(I, N) renders only the pages that sharding.shard_of
+    assigns to shard I of N; the manifest then only covers those pages.
+
+    Passing a dict as references fills it with the links and images of
+    every page rendered, as PageDocument.references() keyed by source path
+    relative to the content root, so link_checker.check_links need not
+    parse those pages again.
+
+    Returns:
+        list: (markdown path, error message) pairs for every page that failed
+    """
+    all_pages = find_pages(dir_path_content, dest_path_dir)
+    if all_pages is None:
+        return []
+    content_root = Path(dir_path_content)
+    dest_root = Path(dest_path_dir)
+    if shard is not None:
+        index, count = shard
+        all_pages = [page for page in all_pages if shard_of(page[0].relative_to(content_root).as_posix(), count) == index]
+
+    # The digest covers the template and every partial and layout it uses.
+    template_hash = load_template(template_path).digest
+    extra_digests = [extra.digest for extra in (assets, images) if extra is not None]
+    if extra_digests:
+        # Renamed assets or new image sizes change the output of every page.
+        template_hash = hashlib.sha256(":".join([template_hash, *extra_digests]).encode("utf-8")).hexdigest()
+    pages, manifest, removed = plan_incremental_build(
+        all_pages, dir_path_content, dest_path_dir, template_hash, basepath, force=not incremental
+    )
+    # Outputs of deleted sources only survive when dest_path_dir was not
+    # wiped, e.g. when static assets are synced rather than copied.
+    remove_outputs(removed, dest_path_dir)
+    if search is not None:
+        search.retain(src.relative_to(content_root).as_posix() for src, _ in all_pages)
+        planned = set(pages)
+        pages += [
+            page for page in all_pages
+            if page not in planned and not search.is_current(page[0].relative_to(content_root).as_posix(), page[0])
+        ]
+    if incremental:
+        logger.info("Incremental build: %d changed, %d up to date, %d removed", len(pages), len(manifest["pages"]), len(removed))
+
+    parallel = profile is None and pipeline is None and jobs > 1 and len(pages) > 1
+    if parallel:
+        block_cache = None
+    tasks = []
+    for src, dest in pages:
+        terms = None
+        if search is not None and not search.is_current(src.relative_to(content_root).as_posix(), src):
+            terms = TermCollector()
+        page_references = [] if references is not None else None
+        if terms is None:
+            tasks.append(PageTask(str(src), template_path, str(dest), basepath, assets, images, cache, block_cache, None, page_references))
+        else:
+            # Terms come from parsing, so cached bodies and blocks won't do.
+            tasks.append(PageTask(str(src), template_path, str(dest), basepath, assets, images, None, None, terms, page_references))
+    # Outputs that render to the bytes already on disk are not rewritten;
+    # comparing stats afterwards tells them apart wherever they were written.
+    previous = [_output_signature(dest) for _, dest in pages]
+    if profile is not None:
+        # Stage timings are only meaningful for pages rendered serially.
+        results = [(profile.run_page(task), task.terms, task.references) for task in tasks]
+    elif pipeline is not None:
+        errors = run_pipeline(tasks, _read_page_source, _render_page_source, _write_page, pipeline)
+        results = [(None if error is None else (task.from_path, str(error)), task.terms, task.references) for task, error in zip(tasks, errors)]
+    elif parallel:
+        # Hand pages out in batches so tens of thousands of small pages
+        # don't pay one IPC round trip each.
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        initializer, initargs = build_logging.worker_initializer()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+            results = list(executor.map(_generate_page_task, tasks, chunksize=chunksize))
+    else:
+        results = [_generate_page_task(task) for task in tasks]
+
+    failures = [failure for failure, _, _ in results if failure is not None]
+    summary = build_logging.summary
+    for (src, dest), (failure, terms, page_references), signature in zip(pages, results, previous):
+        if failure is None:
+            key = src.relative_to(content_root).as_posix()
+            if page_references is not None:
+                references[key] = page_references
+            output = dest.relative_to(dest_root).as_posix()
+            entry = manifest["pages"][key] = source_entry(src, output)
+            if terms is not None:
+                search.update(key, src, page_url(output), terms.title or "Untitled Page", terms.counts, entry["hash"])
+            # Pages may have been written by workers, so the sizes are
+            # collected here rather than where the files are written.
+            stat = dest.stat()
+            if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == signature:
+                summary.pages_unchanged += 1
+                summary.bytes_unchanged += stat.st_size
+            else:
+                summary.pages_written += 1
+                summary.bytes_written += stat.st_size
+    save_manifest(dest_path_dir, manifest)
+
+    summary.failures += len(failures)
+    for from_path, error in failures:
+        logger.error("Failed to generate page %s: %s", from_path, error, extra={"event": "failure", "path": from_path, "error": error})
+    logger.info("Generated %d of %d pages", len(tasks) - len(failures), len(tasks))
+    return failures
+
+def find_pages(dir_path_content, dest_path_dir):
+    """
+    Walk the content tree and pair every markdown file with its output path.
+
+    Destination directories are created along the way so that the output tree
+    mirrors the content tree exactly, including directories without pages.
+
+    Returns:
+        list: (markdown path, html path) tuples in a stable order, or None if
+        dir_path_content is not a directory
+    """
     dir_path_content = Path(dir_path_content)
     dest_path_dir = Path(dest_path_dir)
 
     if not dir_path_content.is_dir():
-        print(f"Error: {dir_path_content} is not a valid directory.")
-        return
+        logger.error("%s is not a valid directory.", dir_path_content)
+        return None
 
     if not dest_path_dir.exists():
         dest_path_dir.mkdir(parents=True, exist_ok=True)
 
-    for item in dir_path_content.iterdir():
+    pages = []
+    for item in sorted(dir_path_content.iterdir()):
         if item.is_file() and item.suffix == '.md':
-            dest_file = dest_path_dir / (item.stem + '.html')
-            generate_page(item, template_path, dest_file, basepath)
+            pages.append((item, dest_path_dir / (item.stem + '.html')))
         elif item.is_dir():
-            new_dest_dir = dest_path_dir / item.name
-            generate_pages_recursive(item, template_path, new_dest_dir, basepath)
-
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    markdown_content = read_file(from_path)
-    template_content = read_file(template_path)
-    if markdown_content is None or template_content is None:
-        print("Error reading files, cannot generate page.")
-        return
-    html_markdown_content = markdown_to_html_node(markdown_content).to_html()
-    title = extract_title(markdown_content)
-
-    template_content = template_content.replace(
-        "{{ Content }}",
-        html_markdown_content
-    ).replace("{{ Title }}", title if title else "Untitled Page")
-
-    template_content = template_content.replace(
-        'href="/',
-        f'href="{basepath}'
-    ).replace('src="/', f'src="{basepath}')
-
-    write_html_to_file(template_content, dest_path, log_operations=True)
-
-def read_file(path):
-  """Read markdown file and return content or None if error."""
-  try:
-      with open(path, 'r', encoding='utf-8') as file:
-          return file.read()
-  except (FileNotFoundError, IOError) as e:
-      print(f"Error reading {path}: {e}")
-      return None
\ No newline at end of file
+            pages.extend(find_pages(item, dest_path_dir / item.name))
+    return pages
+
+def _output_signature(path):
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def _generate_page_task(task):
+    """
+    Render one page.
+
+    Returns:
+        tuple: (None on success or (path, error) on failure, the task's
+        TermCollector and references list, filled in, or None)
+    """
+    try:
+        if not generate_page(*task):
+            return (task.from_path, "page could not be written"), task.terms, task.references
+    except Exception as e:
+        return (task.from_path, str(e)), task.terms, task.references
+    return None, task.terms, task.references
+
+def _read_page_source(task) -> bytes:
+    with open(task.from_path, 'rb') as markdown_file:
+        return markdown_file.read()
+
+def _render_page_source(task, markdown: bytes) -> str:
+    template = load_template(task.template_path)
+    transform = body_transform(task.images, UrlResolver(task.basepath, task.assets), task.terms)
+    document = parse_markdown(markdown, transform, task.cache, task.block_cache)
+    if task.terms is not None:
+        task.terms.title = document.title
+    if task.references is not None:
+        task.references.extend(document.references())
+    return template.render(page_values(document), task.basepath, task.assets)
+
+def _write_page(task, html: str):
+    if not write_html_to_file(html, task.dest_path, log_operations=True):
+        raise OSError("page could not be written")
+
+def generate_page(from_path, template_path, dest_path, basepath="/", assets=None, images=None, cache=None, block_cache=None, terms=None, references=None, profile=None):
+    """
+    Render one markdown file into dest_path through the template.
+
+    A list given as references is extended with the page's
+    PageDocument.references() once the page is written. A
+    profiling.BuildProfile given as profile is told the time spent in each
+    of its STAGES.
+
+    Returns:
+        bool: Whether the page was written
+    """
+    logger.debug("Generating page from %s to %s using %s", from_path, dest_path, template_path)
+    try:
+        with profile_phase(profile, "template"):
+            template = load_template(template_path)
+    except OSError as e:
+        logger.error("Error reading %s, cannot generate page: %s", template_path, e)
+        return False
+
+    transform = body_transform(images, UrlResolver(basepath, assets), terms)
+    if cache is not None:
+        # A cached body is a whole string already, so there is nothing to stream.
+        try:
+            document = parse_page(from_path, transform, cache, block_cache, profile)
+        except OSError as e:
+            logger.error("Error reading %s, cannot generate page: %s", from_path, e)
+            return False
+        page_chunks = _fill_template(template, document, basepath, assets, profile)
+        with profile_phase(profile, "write"):
+            return _write_document(page_chunks, dest_path, document, references)
+
+    try:
+        with profile_phase(profile, "read"):
+            markdown_file = open(from_path, 'r', encoding='utf-8')
+    except OSError as e:
+        logger.error("Error reading %s, cannot generate page: %s", from_path, e)
+        return False
+
+    with markdown_file:
+        # Front matter and the title are read up front, since the template
+        # may need them before the body; the body is parsed as it is written.
+        lines = markdown_file if profile is None else profile.timed("read", markdown_file)
+        document = open_document(lines, transform, block_cache, profile)
+        if terms is not None:
+            terms.title = document.title
+        page_chunks = _fill_template(template, document, basepath, assets, profile)
+        with profile_phase(profile, "write"):
+            return _write_document(page_chunks, dest_path, document, references)
+
+def _fill_template(template, document, basepath, assets, profile):
+    page_chunks = template.iter_render(page_values(document), basepath, assets)
+    # Producing a chunk of a streamed body is timed by the body's own stages.
+    return page_chunks if profile is None else profile.timed("template", page_chunks)
+
+def _write_document(page_chunks, dest_path, document, references):
+    written = write_html_chunks_to_file(page_chunks, dest_path, log_operations=True)
+    # The links and images of a streamed body are known once it is consumed.
+    if written and references is not None:
+        references.extend(document.references())
+    return written
+
+def page_values(document):
+    """Template values for a PageDocument: its body HTML (string or chunks) and title."""
+    return {
+        "Content": document.body,
+        "Title": document.title if document.title else "Untitled Page",
+    }
+
+def body_transform(images=None, resolver=None, terms=None):
+    """
+    The NodeTransform applied to every block of a page body, or None.
+
+    Images are annotated before URLs are resolved, since the image index
+    is keyed on the root-relative URLs written in the markdown. A
+    search_index.TermCollector given as terms reads every block.
+    """
+    steps = []
+    if terms is not None:
+        steps.append((terms.collect, ""))
+    if images is not None:
+        steps.append((images.annotate, f"images:{images.digest}"))
+    if resolver is not None:
+        steps.append((resolver.rewrite, f"urls:{resolver.digest}"))
+    return NodeTransform(steps) if steps else None
+
+def parse_page(from_path, transform=None, cache=None, block_cache=None, profile=None):
+    """
+    Parse a markdown file into a PageDocument with its body as a string.
+
+    Used where the body is kept in memory for re-use, e.g. by watch mode
+    when only the template changes, or by the page cache.
+
+    Args:
+        from_path: Markdown file
+        transform (NodeTransform): Applied to every block, see body_transform
+        cache (PageCache): Return the cached document for this markdown if
+            there is one, and store it otherwise
+        block_cache (BlockCache): Reuse blocks rendered before
+        profile (profiling.BuildProfile): Told the time spent in each stage
+
+    Returns:
+        PageDocument
+    """
+    if cache is None:
+        with open(from_path, 'r', encoding='utf-8') as markdown_file:
+            lines = markdown_file if profile is None else profile.timed("read", markdown_file)
+            return parse_document(lines, transform, block_cache, profile)
+
+    with profile_phase(profile, "read"):
+        with open(from_path, 'rb') as markdown_file:
+            markdown = markdown_file.read()
+    return parse_markdown(markdown, transform, cache, block_cache, profile)
+
+def parse_markdown(markdown: bytes, transform=None, cache=None, block_cache=None, profile=None):
+    """parse_page for markdown already read into memory as bytes."""
+    key = None
+    if cache is not None:
+        key = cache.key(markdown, transform.digest if transform is not None else "")
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    # Same newline handling as reading the file in text mode.
+    lines = io.TextIOWrapper(io.BytesIO(markdown), encoding='utf-8')
+    document = parse_document(lines, transform, block_cache, profile)
+    if cache is not None:
+        cache.put(key, document)
+    return document
+
+def output_path_for(from_path, dir_path_content, dest_path_dir):
+    """The HTML path find_pages pairs with a markdown file."""
+    relative = Path(from_path).relative_to(dir_path_content)
+    return Path(dest_path_dir) / relative.parent / (relative.stem + '.html')
@@ -0,0 +1,96 @@
+import queue
+import threading
+
+
+_DONE = object()
+
+
+class PipelineOptions:
+    """Concurrency limits of a pipelined build."""
+
+    def __init__(self, readers: int = 4, writers: int = 4, queue_size: int = 32):
+        if readers < 1 or writers < 1 or queue_size < 1:
+            raise ValueError("readers, writers and queue_size must be at least 1")
+        self.readers = readers
+        self.writers = writers
+        # Items waiting between two stages; a full queue stalls the stage
+        # feeding it, so memory stays bounded however fast the disk is.
+        self.queue_size = queue_size
+
+    def __repr__(self) -> str:
+        return f"PipelineOptions(readers={self.readers}, writers={self.writers}, queue_size={self.queue_size})"
+
+
+def run_pipeline(items, read, process, write, options: PipelineOptions = None) -> list:
+    """
+    Run every item through read -> process -> write, overlapping the stages.
+
+    Reads happen on options.readers threads and writes on options.writers
+    threads, so file I/O waits overlap each other and the processing stage.
+    Processing runs on the calling thread, one item at a time, in whatever
+    order reads complete. Bounded queues between the stages apply
+    backpressure.
+
+    Args:
+        items (list): Work items, passed to every stage
+        read: read(item) -> data
+        process: process(item, data) -> output
+        write: write(item, output)
+        options (PipelineOptions): Concurrency limits (default: PipelineOptions())
+
+    Returns:
+        list: For each item, in order, None on success or the exception the
+        first failing stage raised
+    """
+    options = options or PipelineOptions()
+    errors = [None] * len(items)
+    pending = queue.SimpleQueue()
+    for index in range(len(items)):
+        pending.put(index)
+    read_queue = queue.Queue(options.queue_size)
+    write_queue = queue.Queue(options.queue_size)
+
+    def reader():
+        while True:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                read_queue.put((index, read(items[index]), None))
+            except Exception as e:
+                read_queue.put((index, None, e))
+
+    def writer():
+        while True:
+            job = write_queue.get()
+            if job is _DONE:
+                return
+            index, output = job
+            try:
+                write(items[index], output)
+            except Exception as e:
+                errors[index] = e
+
+    readers = [threading.Thread(target=reader, daemon=True) for _ in range(min(options.readers, len(items)) or 1)]
+    writers = [threading.Thread(target=writer, daemon=True) for _ in range(options.writers)]
+    for thread in readers + writers:
+        thread.start()
+    try:
+        for _ in range(len(items)):
+            index, data, error = read_queue.get()
+            if error is None:
+                try:
+                    write_queue.put((index, process(items[index], data)))
+                    continue
+                except Exception as e:
+                    error = e
+            errors[index] = error
+    finally:
+        for _ in writers:
+            write_queue.put(_DONE)
+        for thread in writers:
+            thread.join()
+    for thread in readers:
+        thread.join()
+    return errors
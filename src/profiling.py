@@ -0,0 +1,139 @@
+import contextlib
+import cProfile
+import json
+import time
+from pathlib import Path
+
+from page_generator import generate_page
+
+
+# The stages a page is timed in, in the order they first run. Time spent
+# in a stage nested inside another, e.g. reading lines while splitting
+# blocks, counts for the inner one only.
+STAGES = (
+    "read",       # opening the markdown file and reading its lines
+    "blocks",     # splitting front matter and blocks, iter_blocks
+    "inline",     # parsing inline markdown, text_to_children
+    "tree",       # building each block's HTML tree and transforming it
+    "serialize",  # turning each tree into HTML, to_html
+    "template",   # loading the template and filling it, iter_render
+    "write",      # writing the page, whatever the stages above leave
+)
+
+
+_END = object()
+
+
+class BuildProfile:
+    """
+    Per-stage timings for every page of a build.
+
+    Pages are rendered by the build's own generate_page, which reports its
+    STAGES through phase() and timed() where each one happens. A streamed
+    body is parsed while the page is written, so every stage runs nested
+    inside "write", and "write" is left with the file output itself.
+    """
+
+    def __init__(self, cprofile_page: str = None, cprofile_path: str = None):
+        self.pages = {}
+        self.phases = {}
+        self.cprofile_page = cprofile_page
+        self.cprofile_path = cprofile_path
+        self.cprofile_written = None
+        # Timings of the page being rendered, if any, and the time spent in
+        # phases nested inside each open phase.
+        self._page = None
+        self._nested = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Time a build phase, such as copying static assets, or while a page
+        is rendered by run_page, one of its stages. Time spent in a phase
+        nested inside another counts for the inner one only.
+        """
+        timings = self.phases if self._page is None else self._page
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            timings[name] = timings.get(name, 0.0) + elapsed - nested
+
+    def timed(self, name: str, iterable):
+        """Iterate over iterable, timing the work of producing each item as phase name."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def run_page(self, task):
+        """
+        Render a page_generator.PageTask with timings; same contract as the build's page task.
+
+        Returns:
+            None on success, or (markdown path, error message) on failure
+        """
+        from_path = task.from_path
+        profiler = None
+        if self.cprofile_page and Path(from_path).as_posix().endswith(self.cprofile_page):
+            profiler = cProfile.Profile()
+            profiler.enable()
+        timings = self._page = dict.fromkeys(STAGES, 0.0)
+        # Stage times of a page are not subtracted from the enclosing build phase.
+        outer, self._nested = self._nested, []
+        try:
+            written = generate_page(*task, profile=self)
+        except Exception as e:
+            return (from_path, str(e))
+        finally:
+            self._page = None
+            self._nested = outer
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self.cprofile_path)
+                self.cprofile_written = self.cprofile_path
+        timings["total"] = sum(timings[stage] for stage in STAGES)
+        self.pages[str(from_path)] = timings
+        if not written:
+            return (from_path, "page could not be written")
+        return None
+
+    def report(self, slowest: int = 20) -> dict:
+        totals = {stage: 0.0 for stage in STAGES}
+        for timings in self.pages.values():
+            for stage in STAGES:
+                totals[stage] += timings[stage]
+        ranked = sorted(self.pages.items(), key=lambda item: item[1]["total"], reverse=True)
+        return {
+            "pages": len(self.pages),
+            "phases": self.phases,
+            "stage_totals": totals,
+            "page_total": sum(totals.values()),
+            "slowest_pages": [
+                {"page": page, **timings} for page, timings in ranked[:slowest]
+            ],
+            "cprofile": self.cprofile_written,
+        }
+
+    def write_report(self, path, slowest: int = 20) -> dict:
+        report = self.report(slowest)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        return report
+
+    def print_summary(self, report: dict):
+        print(f"\nProfiled {report['pages']} pages")
+        for name, seconds in report["phases"].items():
+            print(f"  {name:<14} {seconds * 1000:>10.1f} ms")
+        for stage, seconds in report["stage_totals"].items():
+            print(f"  {stage:<14} {seconds * 1000:>10.1f} ms")
+        for entry in report["slowest_pages"][:5]:
+            print(f"  slowest: {entry['page']} {entry['total'] * 1000:.1f} ms")
@@ -0,0 +1,227 @@
+import heapq
+import json
+import logging
+import re
+from collections import Counter
+from pathlib import Path
+
+from build_manifest import hash_file
+from file_utils import write_if_changed, write_json_atomic
+
+
+SEARCH_DIR = "search"
+STATE_NAME = ".search-index.json"
+SEARCH_INDEX_VERSION = 1
+MAX_TERM_LENGTH = 32
+STOP_WORDS = frozenset(
+    "an and are as at be but by for from has have in into is it its of on or "
+    "that the their this to was were will with".split()
+)
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_SHARD_CHAR_RE = re.compile(r"[^a-z0-9]")
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str):
+    """Yield the search terms of text: case-folded words, minus stop words and single letters."""
+    for match in _WORD_RE.finditer(text.casefold()):
+        term = match.group()
+        if 2 <= len(term) <= MAX_TERM_LENGTH and term not in STOP_WORDS:
+            yield term
+
+
+def shard_name(term: str, prefix_length: int) -> str:
+    """The shard a term is stored in, named after its prefix, e.g. "wizard" -> "wi"."""
+    return _SHARD_CHAR_RE.sub("_", term[:prefix_length])
+
+
+class TermCollector:
+    """
+    Count the search terms of one page while its blocks are rendered.
+
+    collect is a NodeTransform step: it reads the text of each block's HTML
+    tree, which holds the TextNodes the inline parser produced, and leaves
+    the tree unchanged. Code blocks are not indexed.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.title = None
+
+    def collect(self, node):
+        if node.tag == "pre":
+            return node
+        if node.children is None:
+            if node.value:
+                self.counts.update(tokenize(node.value))
+            alt = node.props.get("alt") if node.props else None
+            if alt:
+                self.counts.update(tokenize(alt))
+        else:
+            for child in node.children:
+                self.collect(child)
+        return node
+
+    def __repr__(self) -> str:
+        return f"TermCollector(title={self.title!r}, terms={len(self.counts)})"
+
+
+class SearchIndex:
+    """
+    Inverted index of every page, kept up to date incrementally and
+    published as JSON shards for a client-side search.
+
+    The index lives in dest_dir/search:
+
+        meta.json       {"version", "prefix_length", "documents", "shards"}
+        docs.json       [[url, title], ...] by document id, null for free ids
+        <prefix>.json   {term: [doc id, count, doc id, count, ...]}
+
+    A browser loads meta.json and docs.json once and then only the shards
+    named after the prefixes of the terms searched for. Document ids are
+    stable across builds, so editing one page only rewrites docs.json and
+    the shards of the terms it gained or lost.
+
+    Per-page terms are kept in dest_dir/.search-index.json together with
+    the size, mtime and hash of the source, so pages whose markdown did not
+    change are not indexed again.
+    """
+
+    def __init__(self, pages: dict = None, prefix_length: int = 1):
+        if prefix_length < 1:
+            raise ValueError("prefix_length must be at least 1")
+        # source path relative to the content root -> entry
+        self.pages = pages if pages is not None else {}
+        self.prefix_length = prefix_length
+        # New pages take the lowest free id: one freed by retain, else the next unused.
+        used = {entry["id"] for entry in self.pages.values()}
+        self._next_id = max(used, default=-1) + 1
+        self._free_ids = [candidate for candidate in range(self._next_id) if candidate not in used]
+
+    @classmethod
+    def load(cls, dest_dir, prefix_length: int = 1):
+        """The index saved in dest_dir, or an empty one."""
+        try:
+            with open(Path(dest_dir) / STATE_NAME, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return cls(prefix_length=prefix_length)
+        if state.get("version") != SEARCH_INDEX_VERSION:
+            return cls(prefix_length=prefix_length)
+        return cls(state["pages"], prefix_length)
+
+    def is_current(self, key: str, src) -> bool:
+        """Whether the terms held for key were collected from src as it is now."""
+        entry = self.pages.get(key)
+        if entry is None:
+            return False
+        stat = Path(src).stat()
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if hash_file(src) != entry["hash"]:
+            return False
+        entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+        return True
+
+    def update(self, key: str, src, url: str, title: str, terms: dict, digest: str = None):
+        """
+        Record the terms of the page generated from src and served at the
+        root-relative url. digest is the SHA-256 of src, if the caller has
+        it already; otherwise src is read to compute it.
+        """
+        stat = Path(src).stat()
+        old = self.pages.get(key)
+        self.pages[key] = {
+            "id": old["id"] if old is not None else self._take_id(),
+            "url": url,
+            "title": title,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest if digest is not None else hash_file(src),
+            "terms": dict(terms),
+        }
+
+    def retain(self, keys):
+        """Forget every page not in keys, i.e. whose source was removed."""
+        keys = set(keys)
+        for key in [key for key in self.pages if key not in keys]:
+            heapq.heappush(self._free_ids, self.pages.pop(key)["id"])
+
+    def _take_id(self) -> int:
+        if self._free_ids:
+            return heapq.heappop(self._free_ids)
+        self._next_id += 1
+        return self._next_id - 1
+
+    def shards(self) -> dict:
+        """Shard name -> {term: [doc id, count, ...]}, terms and postings sorted."""
+        postings = {}
+        for entry in sorted(self.pages.values(), key=lambda entry: entry["id"]):
+            for term, count in entry["terms"].items():
+                postings.setdefault(term, []).extend((entry["id"], count))
+        shards = {}
+        for term in sorted(postings):
+            shards.setdefault(shard_name(term, self.prefix_length), {})[term] = postings[term]
+        return shards
+
+    def write(self, dest_dir, basepath: str = "/") -> int:
+        """
+        Publish the index under dest_dir/search and save its state.
+
+        Returns:
+            int: Number of files written; files whose content is unchanged
+            are left alone, and shards no longer needed are removed
+        """
+        dest_dir = Path(dest_dir)
+        search_dir = dest_dir / SEARCH_DIR
+        search_dir.mkdir(parents=True, exist_ok=True)
+
+        documents = [None] * (max((entry["id"] for entry in self.pages.values()), default=-1) + 1)
+        for entry in self.pages.values():
+            documents[entry["id"]] = [basepath + entry["url"][1:], entry["title"]]
+        shards = self.shards()
+        meta = {
+            "version": SEARCH_INDEX_VERSION,
+            "prefix_length": self.prefix_length,
+            "documents": len(self.pages),
+            "shards": sorted(shards),
+        }
+
+        files = {"meta.json": meta, "docs.json": documents}
+        files.update((f"{name}.json", shard) for name, shard in shards.items())
+        written = 0
+        for name, document in files.items():
+            if _write_json_if_changed(search_dir / name, document):
+                written += 1
+        for path in search_dir.glob("*.json"):
+            if path.name not in files:
+                path.unlink()
+
+        write_json_atomic(
+            dest_dir / STATE_NAME,
+            {"version": SEARCH_INDEX_VERSION, "pages": self.pages},
+            separators=(",", ":"),
+        )
+
+        logger.info(
+            "Search index: %d pages, %d terms in %d shards, %d files written",
+            len(self.pages), sum(len(shard) for shard in shards.values()), len(shards), written,
+        )
+        return written
+
+    def __repr__(self) -> str:
+        return f"SearchIndex(pages={len(self.pages)}, prefix_length={self.prefix_length})"
+
+
+def page_url(html_path: str) -> str:
+    """The root-relative URL a page is served at, e.g. "blog/tom/index.html" -> "/blog/tom/"."""
+    if html_path == "index.html" or html_path.endswith("/index.html"):
+        html_path = html_path[:-len("index.html")]
+    return "/" + html_path
+
+
+def _write_json_if_changed(path: Path, document) -> bool:
+    data = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return write_if_changed((data,), path)
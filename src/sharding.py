@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from build_manifest import MANIFEST_NAME, empty_manifest, load_manifest, save_manifest
+from compression import COMPRESS_MANIFEST_NAME
+from file_utils import STATIC_MANIFEST_NAME, hash_file, prune_empty_dirs, write_if_changed, write_json_atomic
+from fingerprint import ASSET_MANIFEST_NAME
+from search_index import STATE_NAME as SEARCH_STATE_NAME
+
+
+SHARD_MANIFEST_NAME = ".shard-manifest.json"
+SHARD_MANIFEST_VERSION = 1
+
+# Bookkeeping of a single build, not site content; never merged.
+STATE_FILES = frozenset({
+    MANIFEST_NAME,
+    SHARD_MANIFEST_NAME,
+    STATIC_MANIFEST_NAME,
+    COMPRESS_MANIFEST_NAME,
+    ASSET_MANIFEST_NAME,
+    SEARCH_STATE_NAME,
+})
+
+logger = logging.getLogger(__name__)
+
+
+class ShardMergeError(ValueError):
+    """Raised when shard outputs cannot be combined into one site."""
+
+    def __init__(self, problems: list):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def parse_shard(text: str) -> tuple:
+    """
+    Parse "I/N" into (I, N), where 1 <= I <= N.
+
+    Raises:
+        ValueError: text is not of that form
+    """
+    index, separator, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"shard must look like I/N, got {text!r}") from None
+    if not separator or not 1 <= index <= count:
+        raise ValueError(f"shard must look like I/N with 1 <= I <= N, got {text!r}")
+    return index, count
+
+
+def shard_of(key: str, count: int) -> int:
+    """
+    The shard, from 1 to count, that renders the page whose source path
+    relative to the content root is key.
+
+    Hashing the path spreads pages evenly and gives every machine the same
+    answer without any coordination.
+    """
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def write_shard_manifest(dest_dir, shard: tuple) -> dict:
+    """
+    Record every file a shard build produced in dest_dir, with its hash.
+
+    The template digest and basepath are taken from the build manifest,
+    so shards built from different inputs are caught when merging.
+
+    Returns:
+        dict: The manifest written
+    """
+    dest_dir = Path(dest_dir)
+    build = load_manifest(dest_dir)
+    manifest = {
+        "version": SHARD_MANIFEST_VERSION,
+        "index": shard[0],
+        "count": shard[1],
+        "template": build["template"],
+        "basepath": build["basepath"],
+        "pages": build["pages"],
+        "files": {relative: hash_file(dest_dir / relative) for relative in _site_files(dest_dir)},
+    }
+    path = dest_dir / SHARD_MANIFEST_NAME
+    write_json_atomic(path, manifest, indent=1, sort_keys=True)
+    logger.info("Shard %d/%d: %d pages, %d files recorded in %s", shard[0], shard[1], len(build["pages"]), len(manifest["files"]), path)
+    return manifest
+
+
+def merge_shards(shard_dirs, dest_dir) -> dict:
+    """
+    Assemble the site in dest_dir from the outputs of every shard.
+
+    Nothing is written unless all checks pass: every shard from 1 to N is
+    present exactly once and was built from the same template and
+    basepath, every file matches the hash its shard recorded, and files
+    produced by more than one shard, such as static assets, are identical.
+    dest_dir then holds exactly the union of the shards' files, plus a
+    build manifest covering every page. Files already identical in
+    dest_dir are not rewritten.
+
+    Returns:
+        dict: Counts of files "written", "unchanged" and "removed"
+
+    Raises:
+        ShardMergeError: with every problem found
+    """
+    dest_dir = Path(dest_dir)
+    manifests = []
+    problems = []
+    for shard_dir in map(Path, shard_dirs):
+        try:
+            with (shard_dir / SHARD_MANIFEST_NAME).open('r', encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError) as e:
+            problems.append(f"{shard_dir}: no readable shard manifest ({e})")
+            continue
+        if manifest.get("version") != SHARD_MANIFEST_VERSION:
+            problems.append(f"{shard_dir}: unsupported shard manifest version {manifest.get('version')}")
+            continue
+        manifests.append((shard_dir, manifest))
+    if problems:
+        raise ShardMergeError(problems)
+    if not manifests:
+        raise ShardMergeError(["no shards given"])
+
+    _check_shard_set(manifests, problems)
+    sources = {}
+    for shard_dir, manifest in manifests:
+        for relative, digest in manifest["files"].items():
+            if hash_file(shard_dir / relative) != digest:
+                problems.append(f"{shard_dir / relative}: does not match its shard manifest")
+            if relative in sources:
+                other_dir, other_digest = sources[relative]
+                if other_digest != digest:
+                    problems.append(f"{relative}: differs between {other_dir} and {shard_dir}")
+                continue
+            sources[relative] = (shard_dir, digest)
+    if problems:
+        raise ShardMergeError(problems)
+
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    for relative in _site_files(dest_dir, include_state=True):
+        if relative not in sources and relative != MANIFEST_NAME:
+            path = dest_dir / relative
+            path.unlink()
+            prune_empty_dirs(path.parent, dest_dir)
+            counts["removed"] += 1
+    for relative, (shard_dir, _) in sorted(sources.items()):
+        path = dest_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with (shard_dir / relative).open('rb') as source:
+            written = write_if_changed(iter(lambda: source.read(1 << 16), b""), path)
+        counts["written" if written else "unchanged"] += 1
+
+    first = manifests[0][1]
+    build = empty_manifest(first["template"], first["basepath"])
+    for _, manifest in manifests:
+        build["pages"].update(manifest["pages"])
+    save_manifest(dest_dir, build)
+    logger.info(
+        "Merged %d shards into %s: %d files written, %d unchanged, %d removed",
+        len(manifests), dest_dir, counts["written"], counts["unchanged"], counts["removed"],
+    )
+    return counts
+
+
+def _check_shard_set(manifests: list, problems: list):
+    counts = {manifest["count"] for _, manifest in manifests}
+    if len(counts) > 1:
+        problems.append(f"shards disagree on the shard count: {sorted(counts)}")
+        return
+    count = counts.pop()
+    seen = {}
+    for shard_dir, manifest in manifests:
+        index = manifest["index"]
+        if index in seen:
+            problems.append(f"shard {index}/{count} given twice: {seen[index]} and {shard_dir}")
+        seen[index] = shard_dir
+    missing = [str(index) for index in range(1, count + 1) if index not in seen]
+    if missing:
+        problems.append(f"missing shards {', '.join(missing)} of {count}")
+    for key in ("template", "basepath"):
+        values = {manifest[key] for _, manifest in manifests}
+        if len(values) > 1:
+            problems.append(f"shards were built with different {key} values: {sorted(map(str, values))}")
+
+
+def _site_files(directory: Path, include_state: bool = False) -> list:
+    """Paths of the files under directory relative to it, leaving out build state files at the top."""
+    files = []
+    for root, _, names in os.walk(directory):
+        root = Path(root)
+        for name in names:
+            relative = (root / name).relative_to(directory).as_posix()
+            if include_state or relative not in STATE_FILES:
+                files.append(relative)
+    return sorted(files)
@@ -0,0 +1,275 @@
+import hashlib
+import re
+from pathlib import Path
+
+
+# {{ Name }} is a placeholder, {{> file.html }} pulls in a partial, and
+# {% extends "base.html" %} / {% block name %}...{% endblock %} give layout
+# inheritance.
+_TOKEN_RE = re.compile(
+    r"\{\{\s*(?P<partial>>)?\s*(?P<name>[\w./-]+)\s*\}\}"
+    r"|\{%\s*(?P<tag>extends|block|endblock)(?:\s+\"?(?P<arg>[\w./-]+)\"?)?\s*%\}"
+)
+_MAX_DEPTH = 32
+_ROOT_URL_RE = re.compile(r'(href|src)="/([^"]*)"')
+
+_cache = {}
+
+
+class TemplateError(ValueError):
+    """Raised when a template cannot be compiled."""
+
+
+class CompiledTemplate:
+    """
+    A template parsed into literal segments and placeholder slots.
+
+    Rendering copies the segment list, drops each value into its slot and
+    joins once, so the cost per page is one pass over the output.
+    """
+
+    def __init__(self, segments: list, slots: list, digest: str, dependencies: list):
+        self.segments = segments
+        self.slots = slots
+        self.digest = digest
+        self.dependencies = dependencies
+        self._bound = {}
+
+    def render(self, values: dict, basepath: str = "/", assets=None) -> str:
+        """
+        Fill the template, whose own root-relative href/src URLs point at
+        basepath.
+
+        Values are inserted as they are: URLs in page bodies are resolved
+        on the HTML tree, see url_resolver.UrlResolver.
+
+        Args:
+            values (dict): Placeholder name to text, e.g. {"Title": ..., "Content": ...}
+            basepath (str): URL prefix the site is served under
+            assets (AssetMap): Fingerprinted names of static assets, see
+                fingerprint.py; the template's references to them are
+                renamed too
+
+        Returns:
+            str: The rendered document
+        """
+        parts = list(self.bind(basepath, assets))
+        for index, name in self.slots:
+            if name in values:
+                parts[index] = values[name]
+        return "".join(parts)
+
+    def iter_render(self, values: dict, basepath: str = "/", assets=None):
+        """
+        Like render(), but yield the document in chunks.
+
+        A value may be a string or an iterable of string chunks, such as
+        HTMLNode.iter_html(), which is consumed lazily.
+        """
+        slots = dict(self.slots)
+        for index, segment in enumerate(self.bind(basepath, assets)):
+            name = slots.get(index)
+            if name is None or name not in values:
+                yield segment
+                continue
+            value = values[name]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def bind(self, basepath: str, assets=None) -> list:
+        """
+        Return the literal segments with URLs rewritten for basepath and
+        assets, computed once per basepath and asset map digest.
+        """
+        key = (basepath, assets.digest if assets else None)
+        bound = self._bound.get(key)
+        if bound is None:
+            bound = [rewrite_root_urls(segment, basepath, assets) for segment in self.segments]
+            self._bound[key] = bound
+        return bound
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate(segments={len(self.segments)}, slots={[name for _, name in self.slots]}, digest={self.digest[:12]})"
+
+
+def rewrite_root_urls(text: str, basepath: str, assets=None) -> str:
+    """
+    Point every href="/..." and src="/..." in text at basepath, first
+    swapping any URL found in assets for its fingerprinted name.
+    """
+    if assets:
+        def replace(match):
+            url = "/" + match.group(2)
+            return f'{match.group(1)}="{basepath}{assets.get(url, url)[1:]}"'
+        return _ROOT_URL_RE.sub(replace, text)
+    if basepath == "/":
+        return text
+    return text.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
+
+
+def load_template(template_path) -> CompiledTemplate:
+    """
+    Return the compiled template for template_path, compiling it only when
+    the template or one of its partials or layouts changed on disk.
+
+    Compiled templates are cached per process. A cached entry is reused
+    while the size and mtime of every file it was built from are unchanged;
+    its digest covers the contents of all of those files.
+    """
+    template_path = Path(template_path)
+    key = str(template_path.resolve())
+    cached = _cache.get(key)
+    if cached is not None:
+        signature, compiled = cached
+        if signature == _stat_signature(compiled.dependencies):
+            return compiled
+
+    compiled = compile_template(template_path)
+    _cache[key] = (_stat_signature(compiled.dependencies), compiled)
+    return compiled
+
+
+def compile_template(template_path) -> CompiledTemplate:
+    """Compile a template file, resolving partials and layouts relative to its directory."""
+    template_path = Path(template_path)
+    sources = {}
+    tokens = _expand(template_path, sources, {}, 0)
+
+    segments = []
+    slots = []
+    literal = []
+    for kind, text in tokens:
+        if kind == "text":
+            literal.append(text)
+            continue
+        segments.append("".join(literal))
+        literal = []
+        slots.append((len(segments), text))
+        segments.append("{{ " + text + " }}")
+    segments.append("".join(literal))
+
+    digest = hashlib.sha256()
+    for path in sorted(sources):
+        digest.update(path.encode("utf-8"))
+        digest.update(hashlib.sha256(sources[path].encode("utf-8")).digest())
+    return CompiledTemplate(segments, slots, digest.hexdigest(), sorted(sources))
+
+
+def _expand(path: Path, sources: dict, overrides: dict, depth: int) -> list:
+    """
+    Turn a template file into a flat list of ("text", literal) and
+    ("slot", name) tokens, inlining partials and applying layout blocks.
+    """
+    if depth > _MAX_DEPTH:
+        raise TemplateError(f"templates nested too deeply at {path}")
+    source = path.read_text(encoding="utf-8")
+    sources[str(path.resolve())] = source
+    tokens = _tokenize(source, path)
+
+    first = 0
+    while first < len(tokens) and tokens[first][0] == "text" and not tokens[first][1].strip():
+        first += 1
+    if first < len(tokens) and tokens[first][0] == "extends":
+        # Everything in a child outside its blocks is ignored; its blocks
+        # win over any block of the same name further up the chain.
+        blocks = _collect_blocks(tokens[first + 1:], path)
+        blocks.update(overrides)
+        return _expand(path.parent / tokens[first][1], sources, blocks, depth + 1)
+    return _emit(tokens, path, sources, overrides, depth)
+
+
+def _emit(tokens: list, path: Path, sources: dict, overrides: dict, depth: int) -> list:
+    """Flatten a token list, replacing overridden blocks and inlining partials."""
+    expanded = []
+    skipping = 0
+    for kind, value in tokens:
+        if skipping:
+            if kind == "block":
+                skipping += 1
+            elif kind == "endblock":
+                skipping -= 1
+            continue
+        if kind == "extends":
+            raise TemplateError(f"{{% extends %}} must come first in {path}")
+        if kind == "block":
+            if value in overrides:
+                override = overrides[value]
+                # Inner blocks of the override may themselves be overridden.
+                inner = {name: body for name, body in overrides.items() if name != value}
+                expanded.extend(_emit(override, path, sources, inner, depth))
+                skipping = 1
+        elif kind == "partial":
+            expanded.extend(_expand(path.parent / value, sources, {}, depth + 1))
+        elif kind != "endblock":
+            expanded.append((kind, value))
+    return expanded
+
+
+def _collect_blocks(tokens: list, path: Path) -> dict:
+    blocks = {}
+    current = []
+    depth = 0
+    for kind, value in tokens:
+        if kind == "block":
+            if depth == 0:
+                name = value
+                current = []
+            else:
+                current.append((kind, value))
+            depth += 1
+        elif kind == "endblock":
+            depth -= 1
+            if depth < 0:
+                raise TemplateError(f"unmatched {{% endblock %}} in {path}")
+            if depth == 0:
+                blocks[name] = current
+            else:
+                current.append((kind, value))
+        elif depth > 0:
+            current.append((kind, value))
+    if depth != 0:
+        raise TemplateError(f"unclosed {{% block %}} in {path}")
+    return blocks
+
+
+def _tokenize(source: str, path: Path) -> list:
+    tokens = []
+    position = 0
+    open_blocks = 0
+    for match in _TOKEN_RE.finditer(source):
+        if match.start() > position:
+            tokens.append(("text", source[position:match.start()]))
+        position = match.end()
+        tag = match.group("tag")
+        if tag is None:
+            kind = "partial" if match.group("partial") else "slot"
+            tokens.append((kind, match.group("name")))
+            continue
+        arg = match.group("arg")
+        if tag != "endblock" and arg is None:
+            raise TemplateError(f"{{% {tag} %}} needs a name in {path}")
+        if tag == "block":
+            open_blocks += 1
+        elif tag == "endblock":
+            open_blocks -= 1
+            if open_blocks < 0:
+                raise TemplateError(f"unmatched {{% endblock %}} in {path}")
+        tokens.append((tag, arg))
+    if open_blocks:
+        raise TemplateError(f"unclosed {{% block %}} in {path}")
+    if position < len(source):
+        tokens.append(("text", source[position:]))
+    return tokens
+
+
+def _stat_signature(paths: list) -> tuple:
+    signature = []
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return None
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
@@ -0,0 +1,37 @@
+import unittest
+
+from benchmarks.corpus import CorpusSpec, iter_pages
+from benchmarks.suite import compare
+from markdown_utils import markdown_to_html_node
+
+
+class TestBenchmarkCorpus(unittest.TestCase):
+
+    def test_corpus_is_deterministic(self):
+        spec = CorpusSpec(pages=5, blocks=10, seed=7)
+        self.assertEqual(list(iter_pages(spec)), list(iter_pages(spec)))
+        self.assertNotEqual(list(iter_pages(spec)), list(iter_pages(CorpusSpec(pages=5, blocks=10, seed=8))))
+
+    def test_corpus_pages_render(self):
+        spec = CorpusSpec(pages=10, blocks=20, link_density=0.3, code_blocks=3, list_depth=3)
+        pages = list(iter_pages(spec))
+        self.assertEqual(len(pages), 10)
+        for path, markdown in pages:
+            self.assertTrue(path.endswith("/index.md"))
+            html = markdown_to_html_node(markdown).to_html()
+            self.assertIn("<h1>", html)
+            self.assertIn("<pre><code>", html)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"a": {"seconds": 1.0, "items": 10}, "b": {"seconds": 1.0, "items": 10}}
+        results = {"a": {"seconds": 1.05, "items": 10}, "b": {"seconds": 1.5, "items": 10}}
+        self.assertEqual([name for name, *_ in compare(results, baseline, 0.10)], ["b"])
+
+    def test_compare_skips_different_workloads(self):
+        baseline = {"a": {"seconds": 1.0, "items": 10}}
+        results = {"a": {"seconds": 5.0, "items": 20}}
+        self.assertEqual(compare(results, baseline, 0.10), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
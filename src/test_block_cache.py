@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import block_cache
+from block_cache import BlockCache
+from markdown_utils import iter_blocks_html, markdown_to_blocks
+
+
+DOCUMENT = "\n\n".join(
+    ["# Guide"]
+    + [f"Paragraph {n} with **bold** and a [link](/p/{n})." for n in range(20)]
+    + ["- one\n- two", "```\ncode\n```"]
+)
+
+
+class TestBlockCache(unittest.TestCase):
+
+    def render_counting(self, cache, markdown):
+        rendered = []
+
+        def render(block):
+            rendered.append(block)
+            return f"<p>{block}</p>"
+
+        html = [cache.render(block, render) for block in markdown_to_blocks(markdown)]
+        return html, rendered
+
+    def test_cached_html_matches_uncached(self):
+        cache = BlockCache()
+        blocks = markdown_to_blocks(DOCUMENT)
+        expected = "".join(iter_blocks_html(blocks))
+        self.assertEqual("".join(iter_blocks_html(blocks, cache=cache)), expected)
+        self.assertEqual("".join(iter_blocks_html(blocks, cache=cache)), expected)
+        self.assertEqual((cache.misses, cache.hits), (len(blocks), len(blocks)))
+
+    def test_only_edited_blocks_are_rendered_again(self):
+        cache = BlockCache()
+        self.render_counting(cache, DOCUMENT)
+        edited = DOCUMENT.replace("Paragraph 7 ", "Paragraph seven ")
+        _, rendered = self.render_counting(cache, edited)
+        self.assertEqual(rendered, ["Paragraph seven with **bold** and a [link](/p/7)."])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = BlockCache(max_entries=2)
+        render = lambda block: block.upper()
+        cache.render("a", render)
+        cache.render("b", render)
+        cache.render("a", render)
+        cache.render("c", render)
+        self.assertEqual(len(cache), 2)
+        _, rendered = self.render_counting(cache, "a\n\nb")
+        self.assertEqual(rendered, ["b"])
+
+    def test_salt_and_parser_version_change_keys(self):
+        self.assertNotEqual(BlockCache(salt="x").key("a"), BlockCache().key("a"))
+        with mock.patch.object(block_cache, "parser_version", return_value="other"):
+            other = BlockCache()
+        self.assertNotEqual(other.key("a"), BlockCache().key("a"))
+
+    def test_save_and_load_keep_entries_and_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache" / "blocks.json"
+            cache = BlockCache()
+            self.render_counting(cache, DOCUMENT)
+            cache.save(path)
+
+            loaded = BlockCache.load(path, max_entries=3)
+            self.assertEqual(len(loaded), 3)
+            _, rendered = self.render_counting(loaded, "```\ncode\n```\n\n- one\n- two")
+            self.assertEqual(rendered, [])
+
+            self.assertEqual(len(BlockCache.load(path, salt="images")), len(DOCUMENT.split("\n\n")))
+            self.assertEqual(len(BlockCache.load(Path(tmp) / "missing.json")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from build_client import build_request, main as client_main, parse_args, send_request
+from build_daemon import MAX_REQUEST_LINE, BuildDaemon, _RequestHandler
+from watcher import SiteWatcher
+
+
+class TestBuildDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.content.mkdir()
+        (root / "static").mkdir()
+        (self.content / "index.md").write_text("# Home\n\nWelcome.", encoding="utf-8")
+        template = root / "template.html"
+        template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        self.docs = root / "docs"
+        watcher = SiteWatcher(self.content, root / "static", template, self.docs)
+        watcher.prime()
+        self.socket_path = str(root / "daemon.sock")
+        self.daemon = BuildDaemon(self.socket_path, watcher)
+        self.thread = threading.Thread(target=self.daemon.run)
+        self.thread.start()
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            send_request(self.socket_path, {"command": "shutdown"}, timeout=5)
+        self.thread.join(5)
+        self.tmp.cleanup()
+
+    def request(self, **request):
+        return send_request(self.socket_path, request, timeout=5)
+
+    def test_requests_use_the_warm_state(self):
+        self.assertEqual(self.request(command="status")["pages"], 1)
+        page = self.content / "about.md"
+        page.write_text("# About\n\nUs.", encoding="utf-8")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            response = self.request(command="build", paths=[str(page)])
+        self.assertEqual(output.getvalue(), "", "builds are logged, not printed")
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["pages"], 1)
+        self.assertIn("<p>Us.</p>", (self.docs / "about.html").read_text(encoding="utf-8"))
+        response = self.request(command="render", page=str(self.content / "index.md"))
+        self.assertEqual(response["output"], str(self.docs / "index.html"))
+        self.assertEqual(self.request(command="invalidate")["invalidated"], 3)
+        self.assertEqual(self.request(command="build")["pages"], 2)
+
+    def test_bad_requests_keep_the_daemon_running(self):
+        self.assertEqual(self.request(command="render")["error"], "render request needs a page")
+        self.assertIn("not a page", self.request(command="render", page="/elsewhere.md")["error"])
+        self.assertIn("unknown command", self.request(command="deploy")["error"])
+        self.assertTrue(self.request(command="status")["ok"])
+
+    def test_a_stalled_client_is_dropped(self):
+        self.assertGreater(_RequestHandler.timeout, 0)
+        with mock.patch.object(_RequestHandler, "timeout", 0.2):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+                stalled.settimeout(5)
+                stalled.connect(self.socket_path)
+                stalled.sendall(b'{"command": ')
+                with self.assertLogs("build_daemon", "WARNING"):
+                    self.assertTrue(self.request(command="status")["ok"])
+                self.assertEqual(stalled.recv(1), b"")
+
+    def test_an_overlong_request_is_refused(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(5)
+            client.connect(self.socket_path)
+            client.sendall(b"x" * MAX_REQUEST_LINE + b"\n")
+            response = json.loads(client.makefile("rb").readline())
+        self.assertEqual(response["error"], f"request is longer than {MAX_REQUEST_LINE} bytes")
+        self.assertTrue(self.request(command="status")["ok"])
+
+    def test_a_live_socket_is_not_taken_over(self):
+        with self.assertRaisesRegex(OSError, "already listening"):
+            BuildDaemon(self.socket_path, self.daemon.watcher)
+
+    def test_client(self):
+        args = parse_args(["--socket", self.socket_path, "build", "content"])
+        self.assertEqual(build_request(args), {"command": "build", "paths": [str(Path("content").resolve())]})
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(client_main(["--socket", self.socket_path, "status"]), 0)
+            self.assertEqual(client_main(["--socket", self.socket_path, "render", "missing.md"]), 1)
+            self.assertEqual(client_main(["--socket", self.socket_path, "shutdown"]), 0)
+        self.assertTrue(json.loads(output.getvalue().splitlines()[0])["ok"])
+        self.thread.join(5)
+        self.assertFalse(Path(self.socket_path).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
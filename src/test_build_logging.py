@@ -0,0 +1,75 @@
+import io
+import json
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+import build_logging
+from page_generator import generate_pages_recursive
+
+
+class TestBuildLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.addCleanup(build_logging.shutdown_logging)
+
+    def lines(self):
+        build_logging.shutdown_logging()
+        return self.stream.getvalue().splitlines()
+
+    def test_structured_records_are_json(self):
+        build_logging.configure_logging("structured", self.stream)
+        logging.getLogger("file_utils").debug("Wrote %s", "a.html", extra={"event": "write", "path": "a.html", "bytes": 3})
+        record = json.loads(self.lines()[0])
+        self.assertEqual(record["message"], "Wrote a.html")
+        self.assertEqual(record["level"], "DEBUG")
+        self.assertEqual((record["event"], record["path"], record["bytes"]), ("write", "a.html", 3))
+
+    def test_summary_drops_per_file_records(self):
+        build_logging.configure_logging("summary", self.stream)
+        logging.getLogger("file_utils").debug("Copied file: %s", "a.css")
+        logging.getLogger("build").info("Generated %d pages", 2)
+        lines = self.lines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn("Generated 2 pages", lines[0])
+
+    def test_quiet_keeps_errors_only(self):
+        build_logging.configure_logging("quiet", self.stream)
+        logging.getLogger("build").info("Generated %d pages", 2)
+        logging.getLogger("build").error("Failed to generate page %s", "x.md")
+        lines = self.lines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn("ERROR - Failed to generate page x.md", lines[0])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            build_logging.configure_logging("verbose", self.stream)
+
+    def test_build_summary_counts_pages_and_failures(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            content = root / "content"
+            content.mkdir()
+            (content / "index.md").write_text("# Home\n\nHello", encoding="utf-8")
+            (content / "broken.md").write_text("# Broken\n\nan **unclosed run", encoding="utf-8")
+            template = root / "template.html"
+            template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+
+            build_logging.configure_logging("summary", self.stream)
+            failures = generate_pages_recursive(content, str(template), root / "docs")
+            build_logging.log_summary()
+            written = (root / "docs" / "index.html").stat().st_size
+
+        self.assertEqual(len(failures), 1)
+        summary = build_logging.summary
+        self.assertEqual((summary.pages_written, summary.bytes_written, summary.failures), (1, written, 1))
+        lines = self.lines()
+        self.assertTrue(any("Failed to generate page" in line and "broken.md" in line for line in lines))
+        self.assertIn(f"1 pages written ({written} bytes)", lines[-1])
+        self.assertIn("1 failures", lines[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
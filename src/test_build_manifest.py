@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_manifest import MANIFEST_NAME, load_manifest
+from page_generator import generate_pages_recursive
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome.", encoding="utf-8")
+        (self.content / "blog" / "index.md").write_text("# Blog\n\nPosts.", encoding="utf-8")
+        self.template = root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        self.dest = root / "docs"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, basepath="/"):
+        return generate_pages_recursive(self.content, str(self.template), self.dest, basepath, incremental=True)
+
+    def mtimes(self):
+        return {path.relative_to(self.dest).as_posix(): path.stat().st_mtime_ns for path in self.dest.rglob("*.html")}
+
+    def test_first_build_writes_manifest(self):
+        self.build()
+        manifest = load_manifest(self.dest)
+        self.assertTrue((self.dest / MANIFEST_NAME).exists())
+        self.assertEqual(sorted(manifest["pages"]), ["blog/index.md", "index.md"])
+        self.assertEqual(manifest["pages"]["blog/index.md"]["output"], "blog/index.html")
+        self.assertEqual(manifest["basepath"], "/")
+
+    def test_only_changed_page_is_rendered(self):
+        self.build()
+        for html in self.dest.rglob("*.html"):
+            os.utime(html, ns=(1, 1))
+        index_md = self.content / "index.md"
+        index_md.write_text("# Home\n\nWelcome back.", encoding="utf-8")
+        self.build()
+        mtimes = self.mtimes()
+        self.assertEqual(mtimes["blog/index.html"], 1)
+        self.assertNotEqual(mtimes["index.html"], 1)
+        self.assertIn("Welcome back.", (self.dest / "index.html").read_text(encoding="utf-8"))
+
+    def test_touched_but_unchanged_page_is_skipped(self):
+        self.build()
+        index_html = self.dest / "index.html"
+        os.utime(index_html, ns=(1, 1))
+        os.utime(self.content / "index.md", ns=(5_000_000_000, 5_000_000_000))
+        self.build()
+        self.assertEqual(index_html.stat().st_mtime_ns, 1)
+        self.assertEqual(load_manifest(self.dest)["pages"]["index.md"]["mtime_ns"], 5_000_000_000)
+
+    def test_basepath_change_rebuilds_everything(self):
+        # Pages whose bytes don't change are never rewritten, so give every
+        # page a URL that depends on the basepath.
+        self.template.write_text('<link href="/index.css" />{{ Content }}', encoding="utf-8")
+        self.build()
+        for path in self.dest.rglob("*.html"):
+            os.utime(path, ns=(1, 1))
+        self.build("/site/")
+        for path in self.dest.rglob("*.html"):
+            self.assertNotEqual(path.stat().st_mtime_ns, 1)
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        (self.content / "blog" / "index.md").unlink()
+        self.build()
+        self.assertFalse((self.dest / "blog").exists())
+        self.assertEqual(sorted(load_manifest(self.dest)["pages"]), ["index.md"])
+
+    def test_failed_page_is_retried(self):
+        broken = self.content / "broken.md"
+        broken.write_text("# Broken\n\nThis **never closes", encoding="utf-8")
+        with self.assertLogs("page_generator", "ERROR"):
+            failures = self.build()
+        self.assertEqual(len(failures), 1)
+        self.assertNotIn("broken.md", load_manifest(self.dest)["pages"])
+        broken.write_text("# Fixed\n\nAll **good**", encoding="utf-8")
+        self.assertEqual(self.build(), [])
+        self.assertTrue((self.dest / "broken.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import compression
+from compression import COMPRESS_MANIFEST_NAME, compress_outputs, remove_compressed_outputs
+
+
+PAGE = "<html><body>" + "<p>Hello, Middle-earth!</p>" * 50 + "</body></html>"
+
+
+class TestCompressOutputs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = Path(self.tmp.name)
+        (self.docs / "blog").mkdir()
+        (self.docs / "index.html").write_text(PAGE, encoding="utf-8")
+        (self.docs / "blog" / "index.html").write_text(PAGE.replace("Hello", "Hi"), encoding="utf-8")
+        (self.docs / "index.css").write_text("body { color: red; }\n" * 20, encoding="utf-8")
+        (self.docs / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 4)
+        (self.docs / "tiny.txt").write_text("x", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def compress(self, jobs=1):
+        return compress_outputs(self.docs, jobs=jobs, use_brotli=False)
+
+    def test_writes_gzip_next_to_text_files(self):
+        counts = self.compress()
+        self.assertEqual(counts, {"compressed": 4, "unchanged": 0, "removed": 0})
+        self.assertEqual(gzip.decompress((self.docs / "index.html.gz").read_bytes()).decode("utf-8"), PAGE)
+        self.assertTrue((self.docs / "blog" / "index.html.gz").exists())
+        self.assertTrue((self.docs / "index.css.gz").exists())
+        # Images are left alone, and so is anything gzip would only grow.
+        self.assertFalse((self.docs / "logo.png.gz").exists())
+        self.assertFalse((self.docs / "tiny.txt.gz").exists())
+
+    def test_gzip_output_is_deterministic(self):
+        self.compress()
+        first = (self.docs / "index.html.gz").read_bytes()
+        (self.docs / COMPRESS_MANIFEST_NAME).unlink()
+        self.compress()
+        self.assertEqual((self.docs / "index.html.gz").read_bytes(), first)
+
+    def test_unchanged_files_are_skipped(self):
+        self.compress()
+        self.assertEqual(self.compress(), {"compressed": 0, "unchanged": 4, "removed": 0})
+
+    def test_same_content_with_new_mtime_is_not_recompressed(self):
+        self.compress()
+        gz = self.docs / "index.html.gz"
+        os.utime(gz, ns=(0, 0))
+        (self.docs / "index.html").write_text(PAGE, encoding="utf-8")
+        self.assertEqual(self.compress()["compressed"], 0)
+        self.assertEqual(gz.stat().st_mtime_ns, 0)
+
+    def test_changed_and_removed_files(self):
+        self.compress()
+        (self.docs / "index.html").write_text(PAGE + "<p>more</p>", encoding="utf-8")
+        (self.docs / "blog" / "index.html").unlink()
+        counts = self.compress()
+        self.assertEqual(counts, {"compressed": 1, "unchanged": 2, "removed": 1})
+        self.assertIn(b"more", gzip.decompress((self.docs / "index.html.gz").read_bytes()))
+        self.assertFalse((self.docs / "blog" / "index.html.gz").exists())
+
+    def test_missing_output_is_rewritten(self):
+        self.compress()
+        (self.docs / "index.css.gz").unlink()
+        self.assertEqual(self.compress()["compressed"], 1)
+        self.assertTrue((self.docs / "index.css.gz").exists())
+
+    def test_pool_matches_serial(self):
+        self.compress(jobs=2)
+        manifest = json.loads((self.docs / COMPRESS_MANIFEST_NAME).read_text(encoding="utf-8"))
+        self.assertEqual(sorted(manifest["files"]), ["blog/index.html", "index.css", "index.html", "tiny.txt"])
+        self.assertEqual(manifest["files"]["tiny.txt"]["kept"], [])
+        self.assertEqual(manifest["files"]["index.html"]["kept"], ["gz"])
+
+    def test_remove_compressed_outputs(self):
+        self.compress()
+        (self.docs / "notes.txt.gz").write_bytes(b"not ours")
+        self.assertEqual(remove_compressed_outputs(self.docs), 3)
+        self.assertEqual(sorted(path.name for path in self.docs.rglob("*.gz")), ["notes.txt.gz"])
+        self.assertFalse((self.docs / COMPRESS_MANIFEST_NAME).exists())
+        self.assertEqual(remove_compressed_outputs(self.docs), 0)
+
+    def test_brotli_requested_without_module(self):
+        if compression.brotli is not None:
+            self.skipTest("brotli is installed")
+        with self.assertRaises(RuntimeError):
+            compress_outputs(self.docs, use_brotli=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from file_utils import STATIC_MANIFEST_NAME, sync_directory, write_html_chunks_to_file, write_if_changed, write_json_atomic
+
+
+class TestSyncDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.static = root / "static"
+        self.docs = root / "docs"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}", encoding="utf-8")
+        (self.static / "images" / "a.png").write_bytes(b"png-a")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, use_hash=False):
+        self.assertTrue(sync_directory(self.static, self.docs, log_operations=False, use_hash=use_hash))
+
+    def test_copies_new_files(self):
+        self.sync()
+        self.assertEqual((self.docs / "index.css").read_text(encoding="utf-8"), "body {}")
+        self.assertEqual((self.docs / "images" / "a.png").read_bytes(), b"png-a")
+        self.assertTrue((self.docs / STATIC_MANIFEST_NAME).exists())
+
+    def test_unchanged_files_are_not_copied(self):
+        self.sync()
+        os.utime(self.docs / "index.css", ns=(1, 1))
+        os.utime(self.static / "index.css", ns=(1, 1))
+        self.sync()
+        self.assertEqual((self.docs / "index.css").stat().st_mtime_ns, 1)
+
+    def test_changed_files_are_copied(self):
+        self.sync()
+        (self.static / "index.css").write_text("body { color: red }", encoding="utf-8")
+        self.sync()
+        self.assertEqual((self.docs / "index.css").read_text(encoding="utf-8"), "body { color: red }")
+
+    def test_hash_skips_touched_but_identical_files(self):
+        self.sync()
+        dest_css = self.docs / "index.css"
+        dest_css.write_text("body {}", encoding="utf-8")
+        os.utime(dest_css, ns=(7, 7))
+        with mock.patch("file_utils.shutil.copy2") as copy2:
+            self.sync(use_hash=True)
+        copy2.assert_not_called()
+        self.assertEqual(dest_css.stat().st_mtime_ns, (self.static / "index.css").stat().st_mtime_ns)
+
+    def test_stale_files_removed_and_generated_pages_kept(self):
+        self.sync()
+        page = self.docs / "blog" / "index.html"
+        page.parent.mkdir(parents=True)
+        page.write_text("<html></html>", encoding="utf-8")
+        (self.static / "images" / "a.png").unlink()
+        self.sync()
+        self.assertFalse((self.docs / "images").exists())
+        self.assertTrue(page.exists())
+        self.assertTrue((self.docs / "index.css").exists())
+
+    def test_missing_source_fails(self):
+        self.assertFalse(sync_directory(self.static / "missing", self.docs, log_operations=False))
+
+
+class TestWriteIfChanged(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "page.html"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, *chunks):
+        return write_if_changed(chunks, self.path)
+
+    def test_identical_bytes_are_not_written(self):
+        self.assertTrue(self.write(b"<p>", b"hello", b"</p>"))
+        os.utime(self.path, ns=(1, 1))
+        inode = self.path.stat().st_ino
+        # The same bytes in different chunks.
+        self.assertFalse(self.write(b"<p>hel", b"lo</p>"))
+        self.assertEqual((self.path.stat().st_mtime_ns, self.path.stat().st_ino), (1, inode))
+
+    def test_changes_are_written(self):
+        self.write(b"<p>hello</p>")
+        for chunks in ((b"<p>hello</p>", b"!"), (b"<p>hel",), (b"<p>jello</p>",), (b"<p>hel", b"p</p>"), ()):
+            self.assertTrue(self.write(*chunks))
+            self.assertEqual(self.path.read_bytes(), b"".join(chunks))
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_failure_while_producing_keeps_old_file(self):
+        self.write(b"<p>old</p>")
+
+        def chunks():
+            yield b"<p>new"
+            raise ValueError("render failed")
+
+        with self.assertRaises(ValueError):
+            write_if_changed(chunks(), self.path)
+        self.assertEqual(self.path.read_bytes(), b"<p>old</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_html_writer_skips_unchanged_pages(self):
+        self.assertTrue(write_html_chunks_to_file(iter(["<p>", "é</p>"]), self.path, log_operations=False))
+        os.utime(self.path, ns=(1, 1))
+        self.assertTrue(write_html_chunks_to_file(iter(["<p>é", "</p>"]), self.path, log_operations=False))
+        self.assertEqual(self.path.stat().st_mtime_ns, 1)
+
+
+class TestWriteJsonAtomic(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "state" / "index.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replaces_the_file(self):
+        write_json_atomic(self.path, {"b": 1, "a": [2]}, sort_keys=True)
+        self.assertEqual(self.path.read_text(encoding="utf-8"), '{"a": [2], "b": 1}')
+        write_json_atomic(self.path, {"b": 3})
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"b": 3})
+        self.assertEqual(os.listdir(self.path.parent), ["index.json"])
+
+    def test_failure_keeps_old_file(self):
+        write_json_atomic(self.path, {"old": True})
+        with self.assertRaises(TypeError):
+            write_json_atomic(self.path, {"new": object()})
+        self.assertEqual(json.loads(self.path.read_text(encoding="utf-8")), {"old": True})
+        self.assertEqual(os.listdir(self.path.parent), ["index.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import fingerprint
+from fingerprint import AssetMap, fingerprint_static, fingerprinted_name
+from page_generator import generate_pages_recursive
+
+
+def short_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:fingerprint.HASH_LENGTH]
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.static = root / "static"
+        self.docs = root / "docs"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_bytes(b"body { color: red; }")
+        (self.static / "images" / "a.png").write_bytes(b"png-a")
+        (self.static / "CNAME").write_bytes(b"example.com")
+        self.root = root
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("images/a.png", "0123456789abcdef"), "images/a.0123456789.png")
+        self.assertEqual(fingerprinted_name("CNAME", "0123456789abcdef"), "CNAME")
+        self.assertEqual(fingerprinted_name("about.html", "0123456789abcdef"), "about.html")
+
+    def test_publishes_hashed_copies(self):
+        assets = fingerprint_static(self.static, self.docs, log_operations=False)
+        css = f"/index.{short_hash(b'body { color: red; }')}.css"
+        png = f"/images/a.{short_hash(b'png-a')}.png"
+        self.assertEqual(assets, {"/index.css": css, "/images/a.png": png, "/CNAME": "/CNAME"})
+        self.assertEqual((self.docs / css[1:]).read_bytes(), b"body { color: red; }")
+        self.assertTrue((self.docs / png[1:]).exists())
+        self.assertFalse((self.docs / "index.css").exists())
+        self.assertEqual((self.docs / "CNAME").read_bytes(), b"example.com")
+
+    def test_digest_tracks_mapping(self):
+        self.assertEqual(AssetMap({"/a": "/b"}).digest, AssetMap({"/a": "/b"}).digest)
+        self.assertNotEqual(AssetMap({"/a": "/b"}).digest, AssetMap({"/a": "/c"}).digest)
+
+    def test_unchanged_sources_are_not_hashed_again(self):
+        first = fingerprint_static(self.static, self.docs, log_operations=False)
+        with mock.patch.object(fingerprint, "hash_file", side_effect=AssertionError("hashed")):
+            self.assertEqual(fingerprint_static(self.static, self.docs, log_operations=False), first)
+
+    def test_changed_asset_replaces_old_output(self):
+        first = fingerprint_static(self.static, self.docs, log_operations=False)
+        (self.static / "images" / "a.png").write_bytes(b"png-a-2")
+        (self.static / "index.css").unlink()
+        second = fingerprint_static(self.static, self.docs, log_operations=False)
+        self.assertNotEqual(first["/images/a.png"], second["/images/a.png"])
+        self.assertNotIn("/index.css", second)
+        self.assertFalse((self.docs / first["/images/a.png"][1:]).exists())
+        self.assertFalse((self.docs / first["/index.css"][1:]).exists())
+        self.assertEqual((self.docs / second["/images/a.png"][1:]).read_bytes(), b"png-a-2")
+
+    def test_touched_but_identical_asset_keeps_its_name(self):
+        first = fingerprint_static(self.static, self.docs, log_operations=False)
+        os.utime(self.static / "index.css", ns=(0, 0))
+        self.assertEqual(fingerprint_static(self.static, self.docs, log_operations=False), first)
+
+    def test_pages_reference_fingerprinted_assets(self):
+        content = self.root / "content"
+        content.mkdir()
+        (content / "index.md").write_text("# Home\n\n![a](/images/a.png) [css](/index.css)", encoding="utf-8")
+        template = self.root / "template.html"
+        template.write_text('<link href="/index.css" />{{ Content }}', encoding="utf-8")
+
+        assets = fingerprint_static(self.static, self.docs, log_operations=False)
+        generate_pages_recursive(content, str(template), self.docs, "/site/", assets=assets)
+        html = (self.docs / "index.html").read_text(encoding="utf-8")
+        self.assertIn(f'<link href="/site{assets["/index.css"]}" />', html)
+        self.assertIn(f'src="/site{assets["/images/a.png"]}"', html)
+        self.assertIn(f'href="/site{assets["/index.css"]}">css</a>', html)
+
+        # A renamed asset re-renders pages even in an incremental build.
+        (self.static / "index.css").write_bytes(b"body { color: blue; }")
+        assets = fingerprint_static(self.static, self.docs, log_operations=False)
+        generate_pages_recursive(content, str(template), self.docs, "/site/", incremental=True, assets=assets)
+        self.assertIn(assets["/index.css"], (self.docs / "index.html").read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
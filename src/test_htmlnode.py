@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
 from textnode import TextNode, TextType
@@ -91,6 +92,10 @@ class TestHTMLNode(unittest.TestCase):
         node = LeafNode("p", "Hello, world!")
         self.assertEqual(node.to_html(), "<p>Hello, world!</p>")
 
+    def test_leaf_to_html_void_elements(self):
+        self.assertEqual(LeafNode("hr", "").to_html(), "<hr>")
+        self.assertEqual(LeafNode("img", "", {"src": "/a.png", "alt": "a"}).to_html(), '<img src="/a.png" alt="a">')
+
     def test_to_html_with_children(self):
         child_node = LeafNode("span", "child")
         parent_node = ParentNode("div", [child_node])
@@ -105,6 +110,41 @@ class TestHTMLNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "a "), LeafNode("b", "bold")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+            {"class": "page"},
+        )
+        chunks = list(node.iter_html())
+        self.assertEqual(chunks[0], '<div class="page">')
+        self.assertEqual(chunks[-1], "</div>")
+        self.assertEqual("".join(chunks), node.to_html())
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")])])
+        buffer = io.StringIO()
+        written = node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<ul><li>one</li></ul>")
+        self.assertEqual(written, len(buffer.getvalue()))
+
+    def test_iter_html_requires_children(self):
+        with self.assertRaises(ValueError):
+            list(ParentNode("div", None).iter_html())
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in (
+            HTMLNode("p", "x"),
+            LeafNode("b", "x"),
+            ParentNode("div", []),
+            TextNode("x", TextType.TEXT),
+        ):
+            self.assertFalse(hasattr(node, "__dict__"), type(node).__name__)
+        self.assertIsNone(LeafNode("b", "x").children)
+
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = text_node_to_html_node(node)
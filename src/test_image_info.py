@@ -0,0 +1,157 @@
+import os
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import image_info
+from htmlnode import LeafNode, ParentNode
+from image_info import ImageIndex, read_image_size, refresh_image_index
+from markdown_utils import block_to_html_node
+from page_generator import generate_pages_recursive
+
+
+def png(width, height):
+    ihdr = struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\x00" * 4 + b"IDAT" * 100
+
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 20
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc2" + struct.pack(">HBHHB", 11, 8, height, width, 3) + b"\x00" * 3
+    return b"\xff\xd8" + app0 + sof + b"\xff\xda" + b"\x00" * 50
+
+
+def webp(chunk, payload):
+    body = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestReadImageSize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data, name="image"):
+        path = self.dir / name
+        path.write_bytes(data)
+        return read_image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of(png(1026, 388)), (1026, 388))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(gif(320, 200)), (320, 200))
+
+    def test_jpeg_skips_segments_before_frame(self):
+        self.assertEqual(self.size_of(jpeg(1920, 1080)), (1920, 1080))
+
+    def test_webp_variants(self):
+        lossy = b"\x00\x00\x00" + b"\x9d\x01\x2a" + struct.pack("<HH", 640, 480)
+        lossless = b"\x2f" + ((299) | (149 << 14)).to_bytes(4, "little")
+        extended = b"\x00" * 4 + (1023).to_bytes(3, "little") + (767).to_bytes(3, "little")
+        self.assertEqual(self.size_of(webp(b"VP8 ", lossy)), (640, 480))
+        self.assertEqual(self.size_of(webp(b"VP8L", lossless)), (300, 150))
+        self.assertEqual(self.size_of(webp(b"VP8X", extended)), (1024, 768))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.size_of(b"not an image"))
+        self.assertIsNone(self.size_of(jpeg(10, 10)[:20]))
+        self.assertIsNone(read_image_size(self.dir / "missing.png"))
+
+    def test_reads_headers_only(self):
+        path = self.dir / "big.jpg"
+        path.write_bytes(jpeg(800, 600) + b"\x00" * (1 << 20))
+        real_open = open
+        reads = []
+
+        def tracking_open(*args, **kwargs):
+            file = real_open(*args, **kwargs)
+            original_read = file.read
+            file.read = lambda size=-1: reads.append(size) or original_read(size)
+            return file
+
+        with mock.patch("builtins.open", tracking_open):
+            self.assertEqual(read_image_size(path), (800, 600))
+        self.assertTrue(reads and all(0 <= size <= 32 for size in reads))
+
+
+class TestImageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.static = root / "static"
+        self.docs = root / "docs"
+        self.cache = root / ".build-cache"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "images" / "a.png").write_bytes(png(100, 50))
+        (self.static / "images" / "b.gif").write_bytes(gif(20, 10))
+        (self.static / "index.css").write_text("body {}", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_refresh_reads_new_and_changed_images_only(self):
+        index = refresh_image_index(self.static, self.cache)
+        self.assertEqual(index.size_of("/images/a.png"), (100, 50))
+        self.assertEqual(index.size_of("/images/b.gif"), (20, 10))
+        self.assertIsNone(index.size_of("/index.css"))
+
+        with mock.patch.object(image_info, "read_image_size", side_effect=AssertionError("read")):
+            unchanged = refresh_image_index(self.static, self.cache)
+        self.assertEqual(unchanged.digest, index.digest)
+
+        (self.static / "images" / "a.png").write_bytes(png(200, 100))
+        (self.static / "images" / "b.gif").unlink()
+        reloaded = ImageIndex.load(self.cache / image_info.IMAGE_INDEX_NAME)
+        self.assertEqual(reloaded.refresh(self.static), 1)
+        self.assertEqual(reloaded.size_of("/images/a.png"), (200, 100))
+        self.assertIsNone(reloaded.size_of("/images/b.gif"))
+        self.assertNotEqual(reloaded.digest, index.digest)
+
+    def test_touching_an_image_keeps_the_digest(self):
+        index = refresh_image_index(self.static, self.cache)
+        os.utime(self.static / "images" / "a.png", ns=(0, 0))
+        self.assertEqual(refresh_image_index(self.static, self.cache).digest, index.digest)
+
+    def test_annotate(self):
+        index = refresh_image_index(self.static, self.cache)
+        node = block_to_html_node("![a](/images/a.png) and ![far](https://example.com/x.png)")
+        self.assertEqual(
+            index.annotate(node).to_html(),
+            '<p><img src="/images/a.png" alt="a" width="100" height="50" loading="lazy" decoding="async">'
+            ' and <img src="https://example.com/x.png" alt="far" loading="lazy" decoding="async"></p>',
+        )
+
+    def test_pages_get_image_attributes(self):
+        content = self.docs.parent / "content"
+        content.mkdir()
+        (content / "index.md").write_text("# Home\n\n![a](/images/a.png)", encoding="utf-8")
+        (content / "other.md").write_text("# Other\n\n![b](/images/b.gif)", encoding="utf-8")
+        template = self.docs.parent / "template.html"
+        template.write_text("{{ Content }}", encoding="utf-8")
+        index = refresh_image_index(self.static, self.cache)
+        generate_pages_recursive(content, str(template), self.docs, "/site/", jobs=2, images=index)
+        self.assertIn(
+            '<img src="/site/images/a.png" alt="a" width="100" height="50" loading="lazy" decoding="async">',
+            (self.docs / "index.html").read_text(encoding="utf-8"),
+        )
+        self.assertIn('width="20" height="10"', (self.docs / "other.html").read_text(encoding="utf-8"))
+
+    def test_annotate_leaves_other_nodes(self):
+        node = ParentNode("p", [LeafNode("a", "x", {"href": "/images/a.png"}), LeafNode(None, "y")])
+        self.assertEqual(ImageIndex().annotate(node).to_html(), '<p><a href="/images/a.png">x</a>y</p>')
+
+
+if __name__ == "__main__":
+    unittest.main()
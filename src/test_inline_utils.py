@@ -1,5 +1,5 @@
 import unittest
-from inline_utils import extract_markdown_images, extract_markdown_links, split_nodes_link, split_nodes_image
+from inline_utils import extract_markdown_images, extract_markdown_links, split_nodes_link, split_nodes_image, text_to_textnodes
 from textnode import TextNode, TextType
 
 
@@ -79,6 +79,65 @@ class TestExtractMarkdownImages(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected)
 
+    def test_split_nodes_link_skips_image_with_same_text(self):
+        node = TextNode("![a](b) and [a](b)", TextType.TEXT)
+        self.assertEqual(
+            split_nodes_link([node]),
+            [
+                TextNode("![a](b) and ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+        )
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_inline_types(self):
+        text = "**b** _i_ `c` ![img](/i.png) [link](/l)"
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("b", TextType.BOLD),
+                TextNode(" ", TextType.TEXT),
+                TextNode("i", TextType.ITALIC),
+                TextNode(" ", TextType.TEXT),
+                TextNode("c", TextType.CODE),
+                TextNode(" ", TextType.TEXT),
+                TextNode("img", TextType.IMAGE, "/i.png"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "/l"),
+            ],
+        )
+
+    def test_delimiters_inside_higher_precedence_run_are_literal(self):
+        self.assertEqual(
+            text_to_textnodes("**a_b`c** and _d`e_"),
+            [
+                TextNode("a_b`c", TextType.BOLD),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("d`e", TextType.ITALIC),
+            ],
+        )
+
+    def test_links_are_not_parsed_inside_emphasis(self):
+        self.assertEqual(
+            text_to_textnodes("**[a](b)**"),
+            [TextNode("[a](b)", TextType.BOLD)],
+        )
+
+    def test_empty_text(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_unclosed_delimiter_raises(self):
+        for text in ("**open", "_open", "`open", "_a**b**c_", "`a_b_c`"):
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](/u{i})" for i in range(500))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 999)
+        self.assertEqual(nodes[-1], TextNode("l499", TextType.LINK, "/u499"))
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,103 @@
+import io
+import logging
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from link_checker import BrokenLink, SiteIndex, check_links, resolve_internal_url
+from page_generator import generate_pages_recursive
+from test_page_generator import SiteFixture
+
+
+class TestSiteIndex(unittest.TestCase):
+
+    def test_pages_are_reachable_by_every_form(self):
+        index = SiteIndex()
+        index.add_page("index.html")
+        index.add_page("blog/tom/index.html")
+        index.add_page("about.html")
+        index.add_asset("images/tom.png")
+        for url in ("/", "/index.html", "/blog/tom", "/blog/tom/", "/blog/tom/index.html",
+                    "/about", "/about.html", "/images/tom.png", "/blog/tom/#comments", "/images/tom%2Epng"):
+            self.assertIn(url, index)
+        for url in ("/blog", "/blog/", "/images/", "/about/"):
+            self.assertNotIn(url, index)
+
+
+class TestResolveInternalUrl(unittest.TestCase):
+
+    def test_external_and_fragment_urls_are_skipped(self):
+        for url in ("https://example.com/", "mailto:a@example.com", "//cdn.example.com/a.js", "#top", ""):
+            self.assertIsNone(resolve_internal_url(url, "/blog/tom/index.html"))
+
+    def test_relative_urls_resolve_against_the_page(self):
+        self.assertEqual(resolve_internal_url("/contact", "/blog/tom/index.html"), "/contact")
+        self.assertEqual(resolve_internal_url("../majesty/", "/blog/tom/index.html"), "/blog/majesty/")
+        self.assertEqual(resolve_internal_url("tom.png?x=1", "/images/index.html"), "/images/tom.png?x=1")
+        self.assertEqual(resolve_internal_url("../../..", "/blog/tom/index.html"), "/")
+
+
+class TestCheckLinks(SiteFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.make_site(
+            {
+                "index.md": (
+                    "# Home\n\n"
+                    "Read [Tom](/blog/tom) or [nobody](/blog/nobody).\n\n"
+                    "```\n<a href=\"/in/a/code/sample\">\n```\n\n"
+                    "- [external](https://example.com/missing)\n- [relative](blog/tom/)"
+                ),
+                "blog/tom/index.md": "# Tom\n\n![Tom](/images/tom.png) ![Gone](/images/gone.png) [home](../../)",
+            },
+            '<link href="/index.css" /><a href="/">{{ Content }}</a>',
+        )
+        self.static = self.root / "static"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "images" / "tom.png").write_bytes(b"png")
+
+    def test_reports_broken_links_and_images(self):
+        home = str(self.content / "index.md")
+        tom = str(self.content / "blog" / "tom" / "index.md")
+        with self.assertLogs("link_checker", "WARNING"):
+            broken = check_links(self.content, self.static, self.template)
+        self.assertEqual(broken, [
+            BrokenLink(str(self.template), "/index.css", "link"),
+            BrokenLink(tom, "/images/gone.png", "image"),
+            BrokenLink(home, "/blog/nobody", "link"),
+        ])
+
+    def test_parallel_matches_serial(self):
+        with self.assertLogs("link_checker", "WARNING"):
+            serial = check_links(self.content, self.static)
+        with self.assertLogs("link_checker", "WARNING"):
+            parallel = check_links(self.content, self.static, jobs=2)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(len(serial), 2)
+
+    def test_pages_built_are_not_parsed_again(self):
+        references = {}
+        logging.disable(logging.CRITICAL)
+        try:
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, self.root / "public", references=references)
+        finally:
+            logging.disable(logging.NOTSET)
+        self.assertEqual(set(references), {"index.md", "blog/tom/index.md"})
+        self.assertIn(("src", "/images/gone.png"), references["blog/tom/index.md"])
+        with self.assertLogs("link_checker", "WARNING"):
+            serial = check_links(self.content, self.static)
+        with mock.patch("link_checker.parse_document") as parse_document:
+            with self.assertLogs("link_checker", "WARNING"):
+                reused = check_links(self.content, self.static, references=references)
+        parse_document.assert_not_called()
+        self.assertEqual(reused, serial)
+
+    def test_pages_missing_from_references_are_parsed(self):
+        with self.assertLogs("link_checker", "WARNING"):
+            broken = check_links(self.content, self.static, references={"blog/tom/index.md": []})
+        self.assertEqual(broken, [BrokenLink(str(self.content / "index.md"), "/blog/nobody", "link")])
+
+
+if __name__ == "__main__":
+    unittest.main()
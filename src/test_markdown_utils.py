@@ -1,5 +1,6 @@
+import io
 import unittest
-from markdown_utils import markdown_to_blocks, markdown_to_html_node, block_to_block_type, extract_title
+from markdown_utils import markdown_to_blocks, markdown_to_html_node, block_to_block_type, extract_title, iter_blocks, iter_markdown_html
 from block_type import BlockType
 
 
@@ -188,6 +189,102 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_block_to_block_type_short_blocks(self):
+        """One-character blocks are classified without indexing past their end"""
+        self.assertEqual(block_to_block_type("1"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("#"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type(">"), BlockType.QUOTE)
+        self.assertEqual(block_to_block_type("-"), BlockType.unordered_list)
+        self.assertEqual(block_to_block_type(""), BlockType.PARAGRAPH)
+
+    def test_block_to_block_type_extended(self):
+        self.assertEqual(block_to_block_type("```python\nx = 1\n```"), BlockType.CODE)
+        self.assertEqual(block_to_block_type("~~~\nx\n~~~"), BlockType.CODE)
+        self.assertEqual(block_to_block_type("```inline``` code"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("12) Twelfth"), BlockType.ordered_list)
+        self.assertEqual(block_to_block_type("2024 was a year"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("*emphasis* first"), BlockType.PARAGRAPH)
+        for rule in ("---", "***", "___", "- - -"):
+            self.assertEqual(block_to_block_type(rule), BlockType.HORIZONTAL_RULE)
+        self.assertEqual(block_to_block_type("a | b\n--|:-:"), BlockType.TABLE)
+        self.assertEqual(block_to_block_type("| a | b |\n| --- |"), BlockType.PARAGRAPH)
+
+    def test_nested_lists(self):
+        md = """
+Steps:
+- one
+  continued
+  1. first
+  2. second
+     - deep
+- two
+
+3. three
+4. four
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><p>Steps:</p><ul><li>one continued<ol><li>first</li><li>second<ul><li>deep</li></ul></li></ol></li>"
+            "<li>two</li></ul><ol start=\"3\"><li>three</li><li>four</li></ol></div>",
+        )
+
+    def test_fenced_code_with_info_string(self):
+        md = """
+Before
+~~~~ python  title="x"
+def f():
+
+    return "```"
+~~~~
+After
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><p>Before</p><pre><code class=\"language-python\">def f():\n\n    return \"```\"\n</code></pre><p>After</p></div>",
+        )
+
+    def test_unclosed_fence_runs_to_the_end(self):
+        self.assertEqual(markdown_to_blocks("```\na\n\nb\n\n"), ["```\na\n\nb"])
+
+    def test_horizontal_rule_splits_blocks(self):
+        self.assertEqual(markdown_to_blocks("one\n***\ntwo"), ["one", "***", "two"])
+        self.assertEqual(markdown_to_html_node("one\n\n---").to_html(), "<div><p>one</p><hr></div>")
+
+    def test_table(self):
+        md = """
+| Name | Note | Score |
+|:-----|:----:|------:|
+| a \\| b | **bold** | 1 |
+| c |
+"""
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><table><thead><tr><th align=\"left\">Name</th><th align=\"center\">Note</th><th align=\"right\">Score</th></tr></thead>"
+            "<tbody><tr><td align=\"left\">a | b</td><td align=\"center\"><b>bold</b></td><td align=\"right\">1</td></tr>"
+            "<tr><td align=\"left\">c</td><td align=\"center\"></td><td align=\"right\"></td></tr></tbody></table></div>",
+        )
+
+    def test_iter_blocks_from_file(self):
+        md = "# Title\n\n\n\nFirst line\n   continued\n\n  \n\n- a\n- b\n"
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(md))),
+            ["# Title", "First line\ncontinued", "- a\n- b"],
+        )
+
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        md = "\n\n a\n\n\nb\n  c\n\n\n\n\n d \n"
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), markdown_to_blocks(md))
+
+    def test_iter_markdown_html_matches_tree(self):
+        md = "# Head\n\nSome **bold** [link](/x)\n\n> quote\n\n1. one\n2. two\n\n```\ncode\n```\n"
+        self.assertEqual(
+            "".join(iter_markdown_html(io.StringIO(md))),
+            markdown_to_html_node(md).to_html(),
+        )
+
+    def test_extract_title_skips_blank_first_block(self):
+        self.assertEqual(extract_title("   \n\n# Title\n\nBody"), "Title")
+
     def test_extract_title_valid_h1(self):
         """Test extracting title from markdown with valid H1 heading"""
         markdown = "# My Title\n\nSome content here."
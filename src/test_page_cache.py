@@ -0,0 +1,98 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import markdown_utils
+import page_cache
+import url_resolver
+from page_cache import PageCache, parser_version
+from page_document import PageDocument
+from page_generator import generate_pages_recursive, parse_page
+from test_page_generator import SiteFixture
+
+
+class TestPageCache(SiteFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.make_site(
+            {"index.md": "# Home\n\nSome **bold** text.", "blog/post.md": "# Post\n\n- one\n- two"},
+            "<title>{{ Title }}</title>{{ Content }}",
+        )
+        self.cache = PageCache(self.root / "cache")
+
+    def count_parses(self):
+        return mock.patch.object(markdown_utils, "block_to_html_node", wraps=markdown_utils.block_to_html_node)
+
+    def build(self, dest, **kwargs):
+        return generate_pages_recursive(self.content, str(self.template), self.root / dest, **kwargs)
+
+    def test_round_trip(self):
+        key = self.cache.key(b"# Hi")
+        self.assertIsNone(self.cache.get(key))
+        document = PageDocument("Hi", {"tags": ["a"]}, "<div></div>", 3, ["/x"], ["/y.png"])
+        self.cache.put(key, document)
+        self.assertEqual(self.cache.get(key).to_dict(), document.to_dict())
+        self.assertNotEqual(self.cache.key(b"# Hi", "images"), key)
+
+    def test_template_change_skips_parsing(self):
+        self.build("first", cache=self.cache)
+        self.template.write_text("<h1>{{ Title }}</h1><main>{{ Content }}</main>", encoding="utf-8")
+        with self.count_parses() as parse:
+            self.build("cached", cache=self.cache)
+        parse.assert_not_called()
+
+        self.build("uncached")
+        for page in ("index.html", "blog/post.html"):
+            self.assertEqual(
+                (self.root / "cached" / page).read_bytes(),
+                (self.root / "uncached" / page).read_bytes(),
+            )
+
+    def test_basepath_change_is_parsed_again(self):
+        # Bodies hold resolved URLs, so they are cached per basepath.
+        self.build("first", cache=self.cache)
+        with self.count_parses() as parse:
+            self.build("site", basepath="/site/", cache=self.cache)
+        self.assertEqual(parse.call_count, 4)
+
+    def test_changed_markdown_is_parsed_again(self):
+        self.build("out", cache=self.cache)
+        (self.content / "index.md").write_text("# Home\n\nNew text.", encoding="utf-8")
+        with self.count_parses() as parse:
+            self.build("out", cache=self.cache)
+        # Both blocks of index.md, nothing of blog/post.md.
+        self.assertEqual(parse.call_count, 2)
+        self.assertIn("New text.", (self.root / "out" / "index.html").read_text(encoding="utf-8"))
+
+    def test_parser_change_invalidates_entries(self):
+        self.build("out", cache=self.cache)
+        with mock.patch.object(page_cache, "_parser_version", "edited-parser"):
+            with self.count_parses() as parse:
+                self.build("out", cache=self.cache)
+        # Every block of both pages.
+        self.assertEqual(parse.call_count, 4)
+
+    def test_parser_version_covers_parser_sources(self):
+        with mock.patch.object(page_cache, "_parser_version", None):
+            with mock.patch.object(page_cache, "PARSER_MODULES", page_cache.PARSER_MODULES[:-1]):
+                shorter = parser_version()
+        self.assertNotEqual(shorter, parser_version())
+
+    def test_resolver_change_changes_parser_version(self):
+        edited = self.root / "url_resolver.py"
+        edited.write_bytes(Path(url_resolver.__file__).read_bytes() + b"\n# edited\n")
+        with mock.patch.object(page_cache, "_parser_version", None):
+            with mock.patch.object(url_resolver, "__file__", str(edited)):
+                changed = parser_version()
+        self.assertNotEqual(changed, parser_version())
+
+    def test_cached_body_matches_crlf_source(self):
+        path = self.content / "crlf.md"
+        path.write_bytes(b"# Title\r\n\r\nLine one\r\nline two\r\n")
+        expected = parse_page(path).to_dict()
+        self.assertEqual(parse_page(path, cache=self.cache).to_dict(), expected)
+        self.assertEqual(parse_page(path, cache=self.cache).to_dict(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
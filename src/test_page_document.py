@@ -0,0 +1,95 @@
+import datetime
+import unittest
+
+from block_cache import BlockCache
+from page_document import PageDocument, open_document, parse_document, split_front_matter
+
+
+PAGE = """---
+title: Ignored, the heading wins
+date: 2024-03-05
+tags: [lore, "elves"]
+draft: false
+slug: glorfindel
+authors:
+  - Tom
+  - 'Goldberry'
+---
+# Glorfindel
+
+He returned from [Mandos](/blog/mandos) and **rode** to [war](https://example.com/war).
+
+![Glorfindel](/images/glorfindel.png)
+
+```
+code words do not count
+```
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    def test_parses_values(self):
+        metadata, lines = split_front_matter(PAGE.splitlines())
+        self.assertEqual(metadata, {
+            "title": "Ignored, the heading wins",
+            "date": "2024-03-05",
+            "tags": ["lore", "elves"],
+            "draft": False,
+            "slug": "glorfindel",
+            "authors": ["Tom", "Goldberry"],
+        })
+        self.assertEqual(next(lines), "# Glorfindel")
+
+    def test_pages_without_front_matter_keep_every_line(self):
+        for markdown in ("# Title\n\nBody", "---\n\nA rule, then text", "---\nnot: closed", ""):
+            metadata, lines = split_front_matter(markdown.split("\n"))
+            self.assertEqual(metadata, {})
+            self.assertEqual("\n".join(lines), markdown)
+
+
+class TestPageDocument(unittest.TestCase):
+
+    def test_one_parse_gives_everything(self):
+        document = parse_document(PAGE.splitlines(keepends=True))
+        self.assertEqual(document.title, "Glorfindel")
+        self.assertEqual(document.date, datetime.date(2024, 3, 5))
+        self.assertEqual(document.tags, ["lore", "elves"])
+        self.assertFalse(document.draft)
+        self.assertEqual(document.slug, "glorfindel")
+        self.assertEqual(document.links, ["/blog/mandos", "https://example.com/war"])
+        self.assertEqual(document.images, ["/images/glorfindel.png"])
+        # "Glorfindel", then "He returned ... war." is 9 words.
+        self.assertEqual(document.word_count, 10)
+        self.assertTrue(document.body.startswith("<div><h1>Glorfindel</h1><p>He returned"))
+        self.assertNotIn("slug", document.body)
+
+    def test_streamed_body_fills_counts_as_it_is_consumed(self):
+        document = open_document(PAGE.splitlines())
+        self.assertEqual(document.title, "Glorfindel")
+        self.assertEqual(document.word_count, 0)
+        body = "".join(document.body)
+        self.assertEqual(body, parse_document(PAGE.splitlines()).body)
+        self.assertEqual(document.word_count, 10)
+
+    def test_block_cache_hits_keep_counts(self):
+        cache = BlockCache()
+        first = parse_document(PAGE.splitlines(), block_cache=cache)
+        second = parse_document(PAGE.splitlines(), block_cache=cache)
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(second.to_dict(), first.to_dict())
+
+    def test_front_matter_title_is_a_fallback(self):
+        document = parse_document(["---", "title: From metadata", "tags: a, b", "draft: yes", "---", "Just text."])
+        self.assertEqual(document.title, "From metadata")
+        self.assertEqual(document.tags, ["a", "b"])
+        self.assertTrue(document.draft)
+        self.assertIsNone(document.date)
+
+    def test_dict_round_trip(self):
+        document = parse_document(PAGE.splitlines())
+        self.assertEqual(PageDocument.from_dict(document.to_dict()).to_dict(), document.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from page_generator import find_pages, generate_pages_recursive
+from pipeline import PipelineOptions
+
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css" /><body>{{ Content }}</body></html>'
+
+
+class SiteFixture:
+    """TestCase mixin that builds a site to render in a temporary directory."""
+
+    def make_site(self, pages, template=TEMPLATE):
+        """
+        Write pages, a dict of markdown by path relative to the content root,
+        and template under a fresh temporary directory.
+
+        Sets self.tmp, self.root, self.content and self.template; the
+        directory is removed when the test finishes.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        for name, markdown in pages.items():
+            page = self.content / name
+            page.parent.mkdir(parents=True, exist_ok=True)
+            page.write_text(markdown, encoding="utf-8")
+        self.template = self.root / "template.html"
+        self.template.write_text(template, encoding="utf-8")
+
+
+class TestPageGenerator(SiteFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.make_site({
+            "index.md": "# Home\n\nSee [the post](/blog/post).",
+            "blog/post/index.md": "# Post\n\nSome **bold** text.",
+        })
+
+    def read_tree(self, dest):
+        return {
+            str(path.relative_to(dest)): path.read_bytes()
+            for path in sorted(Path(dest).rglob("*"))
+            if path.is_file()
+        }
+
+    def test_basepath_leaves_code_samples_alone(self):
+        (self.content / "index.md").write_text(
+            '# Home\n\n```\n<a href="/x">\n```\n\nSee `src="/y"` and [the post](/blog/post).',
+            encoding="utf-8",
+        )
+        generate_pages_recursive(self.content, str(self.template), self.root / "out", basepath="/site/")
+        html = (self.root / "out" / "index.html").read_text(encoding="utf-8")
+        self.assertIn('<a href="/site/blog/post">the post</a>', html)
+        self.assertIn('<link href="/site/index.css" />', html)
+        self.assertIn('<code><a href="/x">', html)
+        self.assertIn('<code>src="/y"</code>', html)
+
+    def test_find_pages(self):
+        dest = self.root / "out"
+        pages = find_pages(self.content, dest)
+        self.assertEqual(
+            pages,
+            [
+                (self.content / "blog" / "post" / "index.md", dest / "blog" / "post" / "index.html"),
+                (self.content / "index.md", dest / "index.html"),
+            ],
+        )
+
+    def test_parallel_matches_serial(self):
+        serial = self.root / "serial"
+        parallel = self.root / "parallel"
+        self.assertEqual(generate_pages_recursive(self.content, str(self.template), serial, "/site/"), [])
+        self.assertEqual(generate_pages_recursive(self.content, str(self.template), parallel, "/site/", jobs=2), [])
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+        self.assertIn(b'<a href="/site/blog/post">', (serial / "index.html").read_bytes())
+
+    def test_pipeline_matches_serial(self):
+        (self.content / "bad.md").write_text("# Bad\n\nThis **never closes", encoding="utf-8")
+        serial = self.root / "serial"
+        piped = self.root / "piped"
+        with self.assertLogs("page_generator", "ERROR"):
+            expected = generate_pages_recursive(self.content, str(self.template), serial, "/site/")
+        with self.assertLogs("page_generator", "ERROR"):
+            failures = generate_pages_recursive(
+                self.content, str(self.template), piped, "/site/",
+                pipeline=PipelineOptions(readers=2, writers=2, queue_size=1),
+            )
+        self.assertEqual(failures, expected)
+        self.assertEqual(self.read_tree(serial), self.read_tree(piped))
+
+    def test_failing_page_does_not_stop_build(self):
+        bad = self.content / "bad.md"
+        bad.write_text("# Bad\n\nThis **never closes", encoding="utf-8")
+        dest = self.root / "out"
+        with self.assertLogs("page_generator", "ERROR"):
+            failures = generate_pages_recursive(self.content, str(self.template), dest, jobs=2)
+        self.assertEqual([path for path, _ in failures], [str(bad)])
+        self.assertTrue((dest / "index.html").exists())
+        self.assertTrue((dest / "blog" / "post" / "index.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
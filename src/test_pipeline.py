@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+
+from pipeline import PipelineOptions, run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+
+    def test_stages_run_for_every_item(self):
+        written = {}
+        errors = run_pipeline(
+            list(range(10)),
+            read=lambda item: item * 2,
+            process=lambda item, data: data + 1,
+            write=lambda item, output: written.__setitem__(item, output),
+            options=PipelineOptions(readers=3, writers=2, queue_size=2),
+        )
+        self.assertEqual(errors, [None] * 10)
+        self.assertEqual(written, {item: item * 2 + 1 for item in range(10)})
+
+    def test_errors_are_reported_per_item(self):
+        def read(item):
+            if item == 1:
+                raise OSError("unreadable")
+            return item
+
+        def process(item, data):
+            if item == 2:
+                raise ValueError("unparsable")
+            return data
+
+        def write(item, output):
+            if item == 3:
+                raise OSError("disk full")
+
+        errors = run_pipeline([0, 1, 2, 3, 4], read, process, write)
+        self.assertEqual([type(error).__name__ if error else None for error in errors],
+                         [None, "OSError", "ValueError", "OSError", None])
+        self.assertEqual(str(errors[3]), "disk full")
+
+    def test_slow_reads_and_writes_overlap(self):
+        lock = threading.Lock()
+        active = {"read": 0, "write": 0}
+        peak = {"read": 0, "write": 0, "both": 0}
+
+        def stage(name):
+            def run(item, *args):
+                with lock:
+                    active[name] += 1
+                    peak[name] = max(peak[name], active[name])
+                    peak["both"] = max(peak["both"], min(active.values()))
+                time.sleep(0.02)
+                with lock:
+                    active[name] -= 1
+            return run
+
+        run_pipeline(
+            list(range(8)),
+            read=stage("read"),
+            process=lambda item, data: None,
+            write=stage("write"),
+            options=PipelineOptions(readers=4, writers=4),
+        )
+        self.assertGreater(peak["read"], 1)
+        self.assertGreater(peak["write"], 1)
+        # Later reads still run while the first pages are written.
+        self.assertGreater(peak["both"], 0)
+
+    def test_queues_bound_items_in_flight(self):
+        lock = threading.Lock()
+        in_flight = {"now": 0, "peak": 0}
+
+        def read(item):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+
+        def write(item, output):
+            time.sleep(0.001)
+            with lock:
+                in_flight["now"] -= 1
+
+        options = PipelineOptions(readers=2, writers=1, queue_size=2)
+        run_pipeline(list(range(100)), read, lambda item, data: None, write, options)
+        # Two full queues, plus one item held by each thread and the processor.
+        bound = 2 * options.queue_size + options.readers + options.writers + 1
+        self.assertLessEqual(in_flight["peak"], bound)
+
+    def test_no_items(self):
+        self.assertEqual(run_pipeline([], read=None, process=None, write=None), [])
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            PipelineOptions(readers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
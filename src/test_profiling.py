@@ -0,0 +1,91 @@
+import io
+import logging
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from page_cache import PageCache
+from page_generator import PageTask, generate_page
+from profiling import STAGES, BuildProfile
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.page = root / "page.md"
+        self.page.write_text("# Title\n\nSome **bold** and [a link](/x).\n\n- one\n- two", encoding="utf-8")
+        self.template = root / "template.html"
+        self.template.write_text('<title>{{ Title }}</title><link href="/i.css" />{{ Content }}', encoding="utf-8")
+        self.root = root
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.tmp.cleanup()
+
+    def test_run_page_renders_like_generate_page(self):
+        with redirect_stdout(io.StringIO()):
+            generate_page(self.page, self.template, self.root / "plain.html", "/b/")
+        profile = BuildProfile()
+        self.assertIsNone(profile.run_page(PageTask(str(self.page), str(self.template), str(self.root / "profiled.html"), "/b/")))
+        self.assertEqual(
+            (self.root / "profiled.html").read_bytes(),
+            (self.root / "plain.html").read_bytes(),
+        )
+        timings = profile.pages[str(self.page)]
+        for stage in STAGES:
+            self.assertGreater(timings[stage], 0.0)
+        self.assertAlmostEqual(timings["total"], sum(timings[stage] for stage in STAGES))
+
+    def test_cached_pages_are_timed_by_stage(self):
+        profile = BuildProfile()
+        cache = PageCache(self.root / "cache")
+        task = PageTask(str(self.page), str(self.template), str(self.root / "out.html"), cache=cache)
+        self.assertIsNone(profile.run_page(task))
+        missed = profile.pages[str(self.page)]
+        self.assertGreater(missed["read"], 0.0)
+        self.assertGreater(missed["inline"], 0.0)
+        self.assertIsNone(profile.run_page(task))
+        self.assertEqual(profile.pages[str(self.page)]["inline"], 0.0)
+
+    def test_nested_phases_count_for_the_inner_one(self):
+        profile = BuildProfile()
+        # Outer starts at 0 and ends at 3.5; inner runs from 1 to 3.
+        with mock.patch("profiling.time.perf_counter", side_effect=[0.0, 1.0, 3.0, 3.5]):
+            with profile.phase("outer"):
+                with profile.phase("inner"):
+                    pass
+        self.assertEqual(profile.phases, {"outer": 1.5, "inner": 2.0})
+
+    def test_page_stages_stay_in_the_enclosing_phase(self):
+        profile = BuildProfile()
+        with profile.phase("pages"):
+            profile.run_page(PageTask(str(self.page), str(self.template), str(self.root / "out.html"), "/"))
+        self.assertEqual(set(profile.phases), {"pages"})
+        self.assertGreaterEqual(profile.phases["pages"], profile.pages[str(self.page)]["total"])
+
+    def test_report_and_cprofile_dump(self):
+        prof_path = self.root / "page.prof"
+        profile = BuildProfile(cprofile_page="page.md", cprofile_path=str(prof_path))
+        with profile.phase("static_copy"):
+            pass
+        self.assertIsNone(profile.run_page(PageTask(str(self.page), str(self.template), str(self.root / "out.html"), "/")))
+        broken = self.root / "broken.md"
+        broken.write_text("**never closed", encoding="utf-8")
+        self.assertEqual(profile.run_page(PageTask(str(broken), str(self.template), str(self.root / "b.html"), "/"))[0], str(broken))
+
+        report = profile.write_report(self.root / "report.json")
+        self.assertEqual(report["pages"], 1)
+        self.assertIn("static_copy", report["phases"])
+        self.assertEqual(set(report["stage_totals"]), set(STAGES))
+        self.assertEqual(report["slowest_pages"][0]["page"], str(self.page))
+        self.assertTrue(prof_path.exists())
+        self.assertEqual(report["cprofile"], str(prof_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
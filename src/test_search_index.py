@@ -0,0 +1,127 @@
+import json
+import unittest
+from unittest import mock
+
+from build_manifest import hash_file as hash_file_digest
+from markdown_utils import markdown_to_html_node
+from page_generator import generate_pages_recursive
+from search_index import SearchIndex, TermCollector, page_url, shard_name, tokenize
+from test_page_generator import SiteFixture
+
+
+class TestTokenize(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(
+            list(tokenize("The Hobbit's ÉLVES and a wizard_hat, 3 rings in 1954!")),
+            ["hobbit", "élves", "wizard", "hat", "rings", "1954"],
+        )
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("wizard", 1), "w")
+        self.assertEqual(shard_name("wizard", 2), "wi")
+        self.assertEqual(shard_name("élves", 1), "_")
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("blog/tom/index.html"), "/blog/tom/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+
+class TestTermCollector(unittest.TestCase):
+
+    def test_collects_text_and_alt_but_not_code_blocks(self):
+        terms = TermCollector()
+        node = markdown_to_html_node(
+            "# Rings of Power\n\n**Bold** rings and `inline` code ![Gandalf smiling](/g.png)\n\n```\nhidden rings\n```"
+        )
+        for child in node.children:
+            terms.collect(child)
+        self.assertEqual(
+            dict(terms.counts),
+            {"rings": 2, "power": 1, "bold": 1, "inline": 1, "code": 1, "gandalf": 1, "smiling": 1},
+        )
+
+
+class TestSearchIndex(SiteFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.make_site(
+            {
+                "index.md": "# Home\n\nWelcome hobbits.",
+                "blog/tom.md": "# Tom\n\nTom sings to hobbits.",
+                "blog/elves.md": "# Elves\n\nElves sing.",
+            },
+            "{{ Title }}{{ Content }}",
+        )
+
+    def build(self, dest="out", **kwargs):
+        dest = self.root / dest
+        search = SearchIndex.load(dest)
+        generate_pages_recursive(self.content, str(self.template), dest, search=search, **kwargs)
+        return search, search.write(dest, "/site/")
+
+    def read(self, name, dest="out"):
+        return json.loads((self.root / dest / "search" / name).read_text(encoding="utf-8"))
+
+    def test_publishes_documents_and_shards(self):
+        self.build()
+        self.assertEqual(self.read("docs.json"), [
+            ["/site/blog/elves.html", "Elves"],
+            ["/site/blog/tom.html", "Tom"],
+            ["/site/", "Home"],
+        ])
+        self.assertEqual(self.read("h.json"), {"hobbits": [1, 1, 2, 1], "home": [2, 1]})
+        self.assertEqual(self.read("meta.json")["shards"], ["e", "h", "s", "t", "w"])
+
+    def test_only_changed_pages_are_indexed_again(self):
+        _, written = self.build()
+        self.assertEqual(written, 7)
+        _, written = self.build()
+        self.assertEqual(written, 0)
+
+        (self.content / "blog" / "tom.md").write_text("# Tom\n\nTom sings to wizards.", encoding="utf-8")
+        search, written = self.build(incremental=True)
+        # docs.json is unchanged; shard h loses a posting and w gains one.
+        self.assertEqual(written, 2)
+        self.assertEqual(self.read("w.json"), {"welcome": [2, 1], "wizards": [1, 1]})
+
+        (self.content / "blog" / "elves.md").unlink()
+        self.build(incremental=True)
+        self.assertEqual(self.read("docs.json")[0], None)
+        # "elves" was the only term starting with e.
+        self.assertFalse((self.root / "out" / "search" / "e.json").exists())
+
+    def test_incremental_build_indexes_pages_it_would_skip(self):
+        generate_pages_recursive(self.content, str(self.template), self.root / "out")
+        search, _ = self.build(incremental=True)
+        self.assertEqual(len(search.pages), 3)
+
+    def test_ids_freed_by_retain_are_reused_lowest_first(self):
+        src = self.content / "index.md"
+        search = SearchIndex()
+        for name in "abcd":
+            search.update(name, src, f"/{name}/", name, {}, "digest")
+        search.retain(["a", "d"])
+        search.update("e", src, "/e/", "e", {}, "digest")
+        search.update("f", src, "/f/", "f", {}, "digest")
+        search.update("g", src, "/g/", "g", {}, "digest")
+        self.assertEqual({key: entry["id"] for key, entry in search.pages.items()}, {"a": 0, "d": 3, "e": 1, "f": 2, "g": 4})
+        reloaded = SearchIndex({"a": {"id": 2}, "b": {"id": 0}})
+        self.assertEqual([reloaded._take_id(), reloaded._take_id()], [1, 3])
+
+    def test_build_passes_the_manifest_digest(self):
+        with mock.patch("search_index.hash_file") as hash_file:
+            search, _ = self.build()
+        hash_file.assert_not_called()
+        self.assertEqual(search.pages["index.md"]["hash"], hash_file_digest(self.content / "index.md"))
+
+    def test_parallel_matches_serial(self):
+        self.build("serial")
+        self.build("parallel", jobs=2)
+        for name in ("docs.json", "h.json", "t.json"):
+            self.assertEqual(self.read(name, "parallel"), self.read(name, "serial"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from collections import Counter
+
+from build_manifest import load_manifest
+from page_generator import generate_pages_recursive
+from sharding import ShardMergeError, merge_shards, parse_shard, shard_of, write_shard_manifest
+from test_page_generator import SiteFixture
+
+
+class TestShardAssignment(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "2", "a/b", "2/"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of_is_stable_and_even(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of("blog/tom/index.md", 4))
+        counts = Counter(shard_of(f"posts/{n}.md", 4) for n in range(4000))
+        self.assertEqual(sorted(counts), [1, 2, 3, 4])
+        self.assertLess(max(counts.values()) - min(counts.values()), 200)
+
+
+class TestMergeShards(SiteFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.make_site(
+            {f"post{n}/index.md": f"# Post {n}\n\nSee [the next one](/post{n + 1})." for n in range(12)},
+            "<title>{{ Title }}</title>{{ Content }}",
+        )
+
+    def build(self, name, shard=None, basepath="/"):
+        dest = self.root / name
+        dest.mkdir()
+        (dest / "style.css").write_text("body {}", encoding="utf-8")
+        generate_pages_recursive(self.content, str(self.template), dest, basepath, shard=shard)
+        if shard is not None:
+            write_shard_manifest(dest, shard)
+        return dest
+
+    def files(self, directory):
+        return {
+            path.relative_to(directory).as_posix(): path.read_bytes()
+            for path in directory.rglob("*")
+            if path.is_file() and not path.name.startswith(".")
+        }
+
+    def test_merged_shards_match_a_full_build(self):
+        full = self.build("full")
+        shards = [self.build(f"shard{index}", (index, 3)) for index in (1, 2, 3)]
+        self.assertEqual(sum(len(load_manifest(shard)["pages"]) for shard in shards), 12)
+
+        merged = self.root / "merged"
+        merged.mkdir()
+        (merged / "stale.html").write_text("old", encoding="utf-8")
+        counts = merge_shards(shards, merged)
+        self.assertEqual(self.files(merged), self.files(full))
+        self.assertEqual(counts, {"written": 13, "unchanged": 0, "removed": 1})
+        self.assertEqual(load_manifest(merged)["pages"], load_manifest(full)["pages"])
+        self.assertEqual(merge_shards(shards, merged)["unchanged"], 13)
+
+    def test_conflicts_are_reported_before_writing(self):
+        shards = [self.build(f"shard{index}", (index, 3)) for index in (1, 2, 3)]
+        (shards[1] / "style.css").write_text("body { color: red }", encoding="utf-8")
+        write_shard_manifest(shards[1], (2, 3))
+        (shards[2] / "style.css").write_text("tampered", encoding="utf-8")
+        merged = self.root / "merged"
+        with self.assertRaises(ShardMergeError) as raised:
+            merge_shards(shards, merged)
+        self.assertEqual(len(raised.exception.problems), 2)
+        self.assertIn("style.css: differs between", raised.exception.problems[0])
+        self.assertFalse(merged.exists())
+
+    def test_incomplete_or_mismatched_shard_sets_are_rejected(self):
+        first = self.build("shard1", (1, 2))
+        second = self.build("shard2", (2, 2), basepath="/site/")
+        with self.assertRaisesRegex(ShardMergeError, "missing shards 2 of 2"):
+            merge_shards([first], self.root / "merged")
+        with self.assertRaisesRegex(ShardMergeError, "different basepath"):
+            merge_shards([first, second], self.root / "merged")
+        with self.assertRaisesRegex(ShardMergeError, "no readable shard manifest"):
+            merge_shards([first, self.root / "missing"], self.root / "merged")
+
+
+if __name__ == "__main__":
+    unittest.main()
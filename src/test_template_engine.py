@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from fingerprint import AssetMap
+from template_engine import TemplateError, compile_template, load_template, rewrite_root_urls
+
+
+class TestTemplateEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = self.root / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_render_placeholders(self):
+        path = self.write("t.html", "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><body><p>x</p></body>",
+        )
+
+    def test_render_rewrites_template_root_urls(self):
+        path = self.write("t.html", '<link href="/index.css" />{{ Content }}<a href="https://x.y/">x</a>')
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Content": '<img src="/a.png" alt="a"></img>'}, "/site/"),
+            '<link href="/site/index.css" /><img src="/a.png" alt="a"></img><a href="https://x.y/">x</a>',
+        )
+
+    def test_values_are_not_rescanned(self):
+        path = self.write("t.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "literal {{ Title }}"}),
+            "<h1>T</h1>literal {{ Title }}",
+        )
+
+    def test_missing_value_keeps_placeholder(self):
+        path = self.write("t.html", "{{ Title }}|{{ Content }}")
+        self.assertEqual(compile_template(path).render({"Title": "T"}), "T|{{ Content }}")
+
+    def test_partials(self):
+        self.write("header.html", "<header>{{ Title }}</header>")
+        self.write("footer.html", "<footer>bye</footer>")
+        path = self.write("t.html", "{{> header.html }}<main>{{ Content }}</main>{{> footer.html }}")
+        self.assertEqual(
+            compile_template(path).render({"Title": "T", "Content": "C"}),
+            "<header>T</header><main>C</main><footer>bye</footer>",
+        )
+
+    def test_layout_inheritance(self):
+        self.write("base.html", "<html>{% block head %}<title>{{ Title }}</title>{% endblock %}{% block body %}default{% endblock %}</html>")
+        path = self.write("page.html", '{% extends "base.html" %}\nignored{% block body %}<main>{{ Content }}</main>{% endblock %}')
+        self.assertEqual(
+            compile_template(path).render({"Title": "T", "Content": "C"}),
+            "<html><title>T</title><main>C</main></html>",
+        )
+
+    def test_multi_level_inheritance(self):
+        self.write("base.html", "[{% block a %}base-a{% endblock %}|{% block b %}base-b{% endblock %}]")
+        self.write("mid.html", '{% extends "base.html" %}{% block a %}mid-a{% endblock %}{% block b %}mid-b{% endblock %}')
+        path = self.write("leaf.html", '{% extends "mid.html" %}{% block b %}leaf-b{% endblock %}')
+        self.assertEqual(compile_template(path).render({}), "[mid-a|leaf-b]")
+
+    def test_unclosed_block_raises(self):
+        path = self.write("t.html", "{% block body %}never closed")
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_partial_cycle_raises(self):
+        path = self.write("t.html", "{{> t.html }}")
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_load_template_caches_until_partial_changes(self):
+        partial = self.write("nav.html", "<nav>one</nav>")
+        path = self.write("t.html", "{{> nav.html }}{{ Content }}")
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        partial.write_text("<nav>two, longer</nav>", encoding="utf-8")
+        os.utime(partial, ns=(1, 1))
+        second = load_template(path)
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.digest, first.digest)
+        self.assertEqual(second.render({"Content": ""}), "<nav>two, longer</nav>")
+
+    def test_iter_render_streams_chunked_values(self):
+        path = self.write("t.html", '<link href="/i.css" />{{ Content }}')
+        template = compile_template(path)
+        chunks = ['<a hr', 'ef="/x">', 'y</a><img s', 'rc', '="/p.png" />']
+        self.assertEqual(
+            list(template.iter_render({"Content": iter(chunks)}, "/b/")),
+            ['<link href="/b/i.css" />', *chunks, ""],
+        )
+
+    def test_values_are_not_rewritten(self):
+        path = self.write("t.html", '<a href="/">home</a>{{ Content }}')
+        code = '<pre><code>&lt;a href="/x"&gt; <a href="/y"></code></pre>'
+        self.assertEqual(
+            compile_template(path).render({"Content": code}, "/site/"),
+            '<a href="/site/">home</a>' + code,
+        )
+
+    def test_rewrite_root_urls_default_basepath(self):
+        self.assertEqual(rewrite_root_urls('href="/x"', "/"), 'href="/x"')
+
+    def test_rewrite_renames_fingerprinted_assets(self):
+        assets = AssetMap({"/a.css": "/a.0123456789.css"})
+        self.assertEqual(
+            rewrite_root_urls('<link href="/a.css"><a href="/b">b</a><img src="/a.css">', "/site/", assets),
+            '<link href="/site/a.0123456789.css"><a href="/site/b">b</a><img src="/site/a.0123456789.css">',
+        )
+        self.assertEqual(rewrite_root_urls('href="/a.css" href="/"', "/", assets), 'href="/a.0123456789.css" href="/"')
+
+    def test_bind_is_cached_per_asset_map(self):
+        path = self.write("t.html", '<link href="/a.css" />{{ Content }}')
+        template = compile_template(path)
+        first = AssetMap({"/a.css": "/a.1111111111.css"})
+        second = AssetMap({"/a.css": "/a.2222222222.css"})
+        self.assertEqual(template.render({"Content": ""}, "/", first), '<link href="/a.1111111111.css" />')
+        self.assertEqual(template.render({"Content": ""}, "/", second), '<link href="/a.2222222222.css" />')
+        self.assertEqual(template.render({"Content": ""}), '<link href="/a.css" />')
+
+
+if __name__ == "__main__":
+    unittest.main()
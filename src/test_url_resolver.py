@@ -0,0 +1,52 @@
+import unittest
+
+from fingerprint import AssetMap
+from htmlnode import LeafNode, ParentNode
+from url_resolver import UrlResolver, split_url
+
+
+class TestUrlResolver(unittest.TestCase):
+
+    def test_split_url(self):
+        self.assertEqual(split_url("/a.png?v=1#top"), ("/a.png", "?v=1#top"))
+        self.assertEqual(split_url("/a/#b"), ("/a/", "#b"))
+        self.assertEqual(split_url("/a"), ("/a", ""))
+
+    def test_resolve(self):
+        resolver = UrlResolver("/site/")
+        self.assertEqual(resolver.resolve("/blog/"), "/site/blog/")
+        self.assertEqual(resolver.resolve("/"), "/site/")
+        self.assertEqual(resolver.resolve("//cdn.example.com/a.js"), "//cdn.example.com/a.js")
+        self.assertEqual(resolver.resolve("https://example.com/"), "https://example.com/")
+        self.assertEqual(resolver.resolve("notes.html"), "notes.html")
+
+    def test_resolve_swaps_fingerprinted_assets(self):
+        assets = AssetMap({"/a.css": "/a.0123456789.css"})
+        resolver = UrlResolver("/site/", assets)
+        self.assertEqual(resolver.resolve("/a.css?v=2"), "/site/a.0123456789.css?v=2")
+        self.assertEqual(resolver.resolve("/b.css"), "/site/b.css")
+
+    def test_rewrite_only_touches_href_and_src_props(self):
+        node = ParentNode("p", [
+            LeafNode("a", "link", {"href": "/blog/"}),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "/not/a/url"}),
+            LeafNode("code", 'href="/literal"'),
+        ])
+        self.assertIs(UrlResolver("/site/").rewrite(node), node)
+        self.assertEqual(
+            node.to_html(),
+            '<p><a href="/site/blog/">link</a><img src="/site/images/a.png" alt="/not/a/url">'
+            '<code>href="/literal"</code></p>',
+        )
+
+    def test_digest_covers_basepath_and_assets(self):
+        digests = {
+            UrlResolver().digest,
+            UrlResolver("/site/").digest,
+            UrlResolver("/", AssetMap({"/a.css": "/a.1.css"})).digest,
+        }
+        self.assertEqual(len(digests), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
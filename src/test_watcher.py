@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from image_info import ImageIndex
+from test_image_info import png
+from watcher import SiteWatcher
+
+
+class TestSiteWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        self.docs = root / "docs"
+        (self.content / "blog").mkdir(parents=True)
+        self.static.mkdir()
+        (self.content / "index.md").write_text("# Home\n\nWelcome.", encoding="utf-8")
+        (self.content / "blog" / "index.md").write_text("# Blog\n\nPosts.", encoding="utf-8")
+        (self.static / "index.css").write_text("body {}", encoding="utf-8")
+        (root / "nav.html").write_text("<nav>one</nav>", encoding="utf-8")
+        self.template = root / "template.html"
+        self.template.write_text("{{> nav.html }}<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.docs)
+        self.watcher.prime()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def poll(self):
+        return self.watcher.poll()
+
+    def touch(self, path, text):
+        path.write_text(text, encoding="utf-8")
+        # Make sure the change is visible even on coarse mtime clocks.
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.poll(), {})
+
+    def test_rebuilds_are_logged(self):
+        self.touch(self.content / "index.md", "# Home\n\nEdited.")
+        with self.assertLogs("watcher", "INFO") as logs:
+            self.poll()
+        self.assertRegex(logs.output[0], r"Rebuilt in [\d.]+ ms: 1 pages, 0 assets, 0 removed")
+
+    def test_edited_page_is_the_only_page_rendered(self):
+        self.touch(self.content / "index.md", "# Home\n\nEdited.")
+        self.assertEqual(self.poll()["pages"], 1)
+        self.assertIn("<p>Edited.</p>", (self.docs / "index.html").read_text(encoding="utf-8"))
+        self.assertFalse((self.docs / "blog" / "index.html").exists())
+
+    def test_edited_page_reuses_unchanged_blocks(self):
+        misses = self.watcher.block_cache.misses
+        self.touch(self.content / "index.md", "# Home\n\nEdited.")
+        self.poll()
+        self.assertEqual(self.watcher.block_cache.misses - misses, 1)
+
+    def test_template_change_rerenders_from_memory(self):
+        self.touch(self.template, "<main>{{ Title }}|{{ Content }}</main>")
+        summary = self.poll()
+        self.assertEqual(summary["pages"], 2)
+        self.assertEqual(
+            (self.docs / "blog" / "index.html").read_text(encoding="utf-8"),
+            "<main>Blog|<div><h1>Blog</h1><p>Posts.</p></div></main>",
+        )
+
+    def test_partial_change_rerenders_everything(self):
+        self.touch(self.template.parent / "nav.html", "<nav>two</nav>")
+        self.assertEqual(self.poll()["pages"], 2)
+        self.assertTrue((self.docs / "index.html").read_text(encoding="utf-8").startswith("<nav>two</nav>"))
+
+    def test_assets_are_copied_and_removed(self):
+        self.touch(self.static / "index.css", "body { color: red }")
+        self.assertEqual(self.poll()["assets"], 1)
+        self.assertEqual((self.docs / "index.css").read_text(encoding="utf-8"), "body { color: red }")
+        (self.static / "index.css").unlink()
+        self.assertEqual(self.poll()["assets_removed"], 1)
+        self.assertFalse((self.docs / "index.css").exists())
+
+    def test_removed_page_output_is_deleted(self):
+        self.touch(self.content / "index.md", "# Home\n\nEdited.")
+        self.poll()
+        (self.content / "index.md").unlink()
+        self.assertEqual(self.poll()["pages_removed"], 1)
+        self.assertFalse((self.docs / "index.html").exists())
+
+    def test_broken_page_keeps_watching(self):
+        self.touch(self.content / "index.md", "# Home\n\nThis **never closes")
+        with self.assertLogs("watcher", "ERROR"):
+            self.assertEqual(self.poll()["pages"], 0)
+        self.touch(self.content / "index.md", "# Home\n\nFixed.")
+        self.assertEqual(self.poll()["pages"], 1)
+
+    def test_poll_of_given_paths_checks_only_those(self):
+        self.touch(self.content / "index.md", "# Home\n\nEdited.")
+        self.touch(self.content / "blog" / "index.md", "# Blog\n\nEdited.")
+        self.assertEqual(self.watcher.poll([self.content / "blog"])["pages"], 1)
+        self.assertFalse((self.docs / "index.html").exists())
+        self.assertEqual(self.poll()["pages"], 1)
+
+    def test_render_page_writes_one_page(self):
+        dest = self.watcher.render_page(self.content / "blog" / "index.md")
+        self.assertEqual(dest, self.docs / "blog" / "index.html")
+        self.assertIn("<p>Posts.</p>", dest.read_text(encoding="utf-8"))
+        self.assertFalse((self.docs / "index.html").exists())
+        with self.assertRaises(ValueError):
+            self.watcher.render_page(self.static / "index.css")
+
+    def test_invalidated_files_are_rebuilt_without_changing(self):
+        self.assertEqual(self.watcher.invalidate([self.static]), 1)
+        self.assertEqual(self.watcher.poll([])["assets"], 1)
+        self.watcher.invalidate([self.template])
+        self.assertEqual(self.poll()["pages"], 2)
+        self.assertEqual(self.watcher.invalidate(), 5)
+        self.assertEqual(len(self.watcher.block_cache), 0)
+        self.assertEqual(self.poll(), {"pages": 2, "pages_removed": 0, "assets": 1, "assets_removed": 0})
+        self.assertEqual(self.poll(), {})
+
+    def test_images_get_dimensions_and_follow_edits(self):
+        (self.static / "a.png").write_bytes(png(100, 50))
+        self.touch(self.content / "index.md", "# Home\n\n![A](/a.png)")
+        images = ImageIndex()
+        images.refresh(self.static)
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.docs, images=images)
+        self.watcher.prime()
+        self.touch(self.template, "{{ Content }}")
+        self.assertEqual(self.poll()["pages"], 2)
+        self.assertIn('width="100" height="50" loading="lazy"', (self.docs / "index.html").read_text(encoding="utf-8"))
+        image = self.static / "a.png"
+        image.write_bytes(png(200, 80))
+        os.utime(image, ns=(0, image.stat().st_mtime_ns + 1_000_000_000))
+        self.assertEqual(self.poll()["pages"], 2)
+        self.assertIn('width="200" height="80"', (self.docs / "index.html").read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
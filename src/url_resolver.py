@@ -0,0 +1,62 @@
+import hashlib
+
+
+def split_url(url: str) -> tuple:
+    """Split "/a/b.png?x#y" into ("/a/b.png", "?x#y")."""
+    for position, char in enumerate(url):
+        if char in "?#":
+            return url[:position], url[position:]
+    return url, ""
+
+
+def is_root_relative(url: str) -> bool:
+    """Whether url is a path on this site, like "/blog/", rather than "//host/..." or "https://..."."""
+    return url.startswith("/") and not url.startswith("//")
+
+
+class UrlResolver:
+    """
+    Point the root-relative href and src props of an HTML tree at basepath,
+    swapping static assets for their fingerprinted names on the way.
+
+    Working on props rather than on the finished HTML means text that only
+    looks like a URL attribute, such as href="/ inside a code sample, is
+    left alone, and no page has to be scanned as a string.
+    """
+
+    ATTRIBUTES = ("href", "src")
+
+    def __init__(self, basepath: str = "/", assets=None):
+        self.basepath = basepath
+        self.assets = assets
+        self.digest = hashlib.sha256(
+            f"{basepath}\0{assets.digest if assets else ''}".encode("utf-8")
+        ).hexdigest()
+
+    def resolve(self, url: str) -> str:
+        """The URL to emit for url; anything not root-relative is returned as is."""
+        if not is_root_relative(url):
+            return url
+        if self.assets:
+            path, rest = split_url(url)
+            fingerprinted = self.assets.get(path)
+            if fingerprinted is not None:
+                url = fingerprinted + rest
+        return self.basepath + url[1:]
+
+    def rewrite(self, node):
+        """
+        Resolve every href and src in the tree under node, in place.
+
+        Returns:
+            The same node, so it can be used as a block transform.
+        """
+        props = node.props
+        if props:
+            for attribute in self.ATTRIBUTES:
+                url = props.get(attribute)
+                if url is not None:
+                    props[attribute] = self.resolve(url)
+        for child in node.children or ():
+            self.rewrite(child)
+        return node
@@ -0,0 +1,285 @@
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+from block_cache import BlockCache
+from file_utils import write_html_chunks_to_file
+from image_info import IMAGE_SUFFIXES
+from page_generator import body_transform, output_path_for, page_values, parse_page
+from template_engine import TemplateError, load_template
+from url_resolver import UrlResolver
+
+
+logger = logging.getLogger(__name__)
+
+
+class SiteWatcher:
+    """
+    Keep a built site up to date while its sources are edited.
+
+    The watcher polls the content tree, the static tree and every file the
+    template is built from, and applies each change with the least work: an
+    edited page is re-parsed and re-rendered on its own, an edited asset is
+    copied on its own, and a template change re-renders every page from the
+    parsed bodies held in memory without parsing any markdown again. Within
+    an edited page, blocks that did not change come from a BlockCache.
+
+    Given an image_info.ImageIndex as images, pages get image dimensions as
+    in a build; an edited image refreshes the index, and every page is
+    parsed again if that changed any dimensions.
+    """
+
+    def __init__(self, dir_path_content, static_dir, template_path, dest_path_dir, basepath="/", block_cache=None, images=None):
+        self.content_dir = Path(dir_path_content)
+        self.static_dir = Path(static_dir)
+        self.template_path = Path(template_path)
+        self.dest_dir = Path(dest_path_dir)
+        self.basepath = basepath
+        self.block_cache = block_cache if block_cache is not None else BlockCache()
+        self.images = images
+        self.transform = body_transform(images, UrlResolver(basepath))
+        self.template = load_template(self.template_path)
+        # markdown path -> PageDocument
+        self.pages = {}
+        self.snapshot = self._scan()
+
+    def prime(self):
+        """Parse every page into memory so a template change never has to."""
+        for path in self.snapshot:
+            if self._is_page(path):
+                self._parse(path)
+        logger.info("Watching %d pages", len(self.pages))
+
+    def run(self, interval: float = 0.05):
+        """Poll for changes every interval seconds until interrupted."""
+        self.prime()
+        logger.info("Watching %s, %s and %s (Ctrl-C to stop)", self.content_dir, self.static_dir, self.template_path)
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+    def poll(self, paths=None) -> dict:
+        """
+        Apply every change since the last poll.
+
+        Args:
+            paths: If given, only these files or directories, absolute or
+                relative to the working directory, are checked for changes
+                instead of every watched file, along with anything
+                invalidated since
+
+        Returns:
+            dict: Counts of pages rendered, pages removed, assets copied and
+            assets removed, or an empty dict when nothing changed
+        """
+        current = self._scan() if paths is None else self._rescan(paths)
+        previous = self.snapshot
+        self.snapshot = current
+        changed = [path for path, signature in current.items() if previous.get(path) != signature]
+        removed = [path for path in previous if path not in current]
+        if not changed and not removed:
+            return {}
+
+        start = time.perf_counter()
+        summary = {"pages": 0, "pages_removed": 0, "assets": 0, "assets_removed": 0}
+        template_files = set(self.template.dependencies)
+        template_changed = any(path in template_files for path in changed + removed)
+
+        for path in removed:
+            if self._is_page(path):
+                self.pages.pop(path, None)
+                self._unlink(output_path_for(path, self.content_dir, self.dest_dir))
+                summary["pages_removed"] += 1
+            elif self._is_asset(path):
+                self._unlink(self.dest_dir / Path(path).relative_to(self.static_dir))
+                summary["assets_removed"] += 1
+
+        dirty_pages = []
+        for path in changed:
+            if self._is_page(path):
+                if self._parse(path):
+                    dirty_pages.append(path)
+            elif self._is_asset(path):
+                self._copy_asset(path)
+                summary["assets"] += 1
+
+        if any(self._is_image(path) for path in changed + removed) and self._refresh_images():
+            dirty_pages = [path for path in self.pages if self._parse(path)]
+        if template_changed and self._reload_template():
+            dirty_pages = list(self.pages)
+        for path in dirty_pages:
+            if self._write(path):
+                summary["pages"] += 1
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(
+            "Rebuilt in %.1f ms: %d pages, %d assets, %d removed",
+            elapsed, summary["pages"], summary["assets"], summary["pages_removed"] + summary["assets_removed"],
+        )
+        return summary
+
+    def render_page(self, path) -> Path:
+        """
+        Parse one page from its source as it is now and write it, whether
+        or not it changed.
+
+        Returns:
+            Path: The HTML file written
+
+        Raises:
+            ValueError: path is not a page in the content directory or
+                could not be parsed
+            OSError: path could not be read or its output written
+        """
+        path = self._key(path)
+        if not self._is_page(path):
+            raise ValueError(f"not a page in {self.content_dir}: {path}")
+        self.pages[path] = parse_page(path, self.transform, block_cache=self.block_cache)
+        stat = os.stat(path)
+        self.snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        dest = output_path_for(path, self.content_dir, self.dest_dir)
+        if not self._write(path):
+            raise OSError(f"could not write {dest}")
+        return dest
+
+    def invalidate(self, paths=None) -> int:
+        """
+        Forget what is known about paths, so that the next poll treats them
+        as changed: pages are parsed again, assets copied again and, for
+        any template file, the template is reloaded and every page
+        re-rendered. With no paths, everything is forgotten, including
+        the blocks rendered so far.
+
+        Returns:
+            int: Number of watched files invalidated
+        """
+        if paths is None:
+            self.block_cache = BlockCache(self.block_cache.max_entries, self.block_cache.salt)
+            self.pages.clear()
+            count = len(self.snapshot)
+            self.snapshot = dict.fromkeys(self.snapshot)
+            return count
+        count = 0
+        for path in map(self._key, paths):
+            prefix = path.rstrip(os.sep) + os.sep
+            for key in self.snapshot:
+                if key == path or key.startswith(prefix):
+                    self.snapshot[key] = None
+                    count += 1
+        return count
+
+    def _key(self, path) -> str:
+        """The name path is watched under, given it absolute or relative to the working directory."""
+        absolute = os.path.abspath(path)
+        for root in (self.content_dir, self.static_dir):
+            base = os.path.abspath(root)
+            if absolute == base or absolute.startswith(base + os.sep):
+                return os.path.normpath(os.path.join(str(root), os.path.relpath(absolute, base)))
+        return os.path.realpath(absolute)
+
+    def _scan(self) -> dict:
+        """Map every watched file to its (mtime, size) signature."""
+        signatures = {}
+        for root in (self.content_dir, self.static_dir):
+            _scan_tree(str(root), signatures)
+        for path in self.template.dependencies:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def _rescan(self, paths) -> dict:
+        """The snapshot, with paths and anything invalidated stated again."""
+        signatures = dict(self.snapshot)
+        paths = [self._key(path) for path in paths]
+        paths.extend(key for key, signature in self.snapshot.items() if signature is None)
+        for path in paths:
+            prefix = path.rstrip(os.sep) + os.sep
+            for key in [key for key in signatures if key == path or key.startswith(prefix)]:
+                del signatures[key]
+            if os.path.isdir(path):
+                _scan_tree(path, signatures)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def _is_page(self, path) -> bool:
+        return path.endswith('.md') and Path(path).is_relative_to(self.content_dir)
+
+    def _is_asset(self, path) -> bool:
+        return Path(path).is_relative_to(self.static_dir)
+
+    def _is_image(self, path) -> bool:
+        return self.images is not None and self._is_asset(path) and os.path.splitext(path)[1].lower() in IMAGE_SUFFIXES
+
+    def _parse(self, path) -> bool:
+        try:
+            self.pages[path] = parse_page(path, self.transform, block_cache=self.block_cache)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to parse %s: %s", path, e)
+            return False
+        return True
+
+    def _write(self, path) -> bool:
+        dest = output_path_for(path, self.content_dir, self.dest_dir)
+        chunks = self.template.iter_render(page_values(self.pages[path]), self.basepath)
+        return write_html_chunks_to_file(chunks, dest, log_operations=False)
+
+    def _refresh_images(self) -> bool:
+        """Read the headers of edited images; whether any dimensions changed."""
+        digest = self.images.digest
+        self.images.refresh(self.static_dir)
+        if self.images.digest == digest:
+            return False
+        # The transform's digest keys cached blocks, so it has to be rebuilt.
+        self.transform = body_transform(self.images, UrlResolver(self.basepath))
+        return True
+
+    def _reload_template(self) -> bool:
+        try:
+            self.template = load_template(self.template_path)
+        except (OSError, TemplateError) as e:
+            logger.error("Template not reloaded: %s", e)
+            return False
+        # Partials may have been added or dropped; watch the new set.
+        self.snapshot = self._scan()
+        return True
+
+    def _copy_asset(self, path):
+        dest = self.dest_dir / Path(path).relative_to(self.static_dir)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            shutil.copy2(path, dest)
+        except OSError as e:
+            logger.error("Failed to copy %s: %s", path, e)
+
+    def _unlink(self, path):
+        try:
+            Path(path).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _scan_tree(directory: str, signatures: dict):
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _scan_tree(entry.path, signatures)
+            elif entry.is_file():
+                stat = entry.stat()
+                signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)